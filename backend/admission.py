@@ -0,0 +1,127 @@
+"""
+准入控制
+限制同时访问飞书的请求数，超出的请求进入有界等待队列；
+预计排队时间超过上限（或超过请求剩余的超时预算）时立即返回429，
+让已接纳的请求在上游限流前完成，而不是所有请求一起超时
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+
+def overloaded_error(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="服务繁忙，请稍后重试",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionController:
+    """
+    并发上限 + 有界FIFO等待队列
+    排队时间按近期请求耗时的指数移动平均估算：前面还有n个请求时，
+    预计等待 (n + 1) / max_concurrency * 平均耗时
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        max_queue_wait: float = 5.0,
+        initial_service_time: float = 1.0,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.smoothing = smoothing
+        self._service_time = initial_service_time
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._counters: Dict[str, int] = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "bypassed": 0}
+
+    def estimated_wait(self) -> float:
+        """新请求排到队尾时的预计等待时间（秒）"""
+        if self._active < self.max_concurrency and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrency * self._service_time
+
+    def record_bypass(self) -> None:
+        """命中缓存、无需访问上游的请求不占用并发名额"""
+        self._counters["bypassed"] += 1
+
+    async def acquire(self, budget: Optional[float] = None) -> None:
+        """
+        取得一个并发名额，budget为请求剩余的超时预算
+        队列已满或预计等待超过上限时抛出429
+        """
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            self._counters["admitted"] += 1
+            return
+
+        max_wait = self.max_queue_wait if budget is None else min(self.max_queue_wait, budget)
+        estimate = self.estimated_wait()
+        if len(self._waiters) >= self.max_queue or estimate > max_wait:
+            self._counters["rejected"] += 1
+            raise overloaded_error(estimate)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._counters["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 名额在超时的同时移交过来，归还给下一个等待者
+                self._release_slot()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._counters["timed_out"] += 1
+            raise overloaded_error(self.estimated_wait())
+        self._counters["admitted"] += 1
+
+    def release(self, service_time: float) -> None:
+        self._service_time += self.smoothing * (service_time - self._service_time)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        # 名额直接移交给队首仍在等待的请求，避免新到的请求插队
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, budget: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire(budget)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self._counters,
+            "active": self._active,
+            "queue_depth": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "avg_service_ms": round(self._service_time * 1000, 1),
+            "estimated_wait_ms": round(self.estimated_wait() * 1000, 1),
+        }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+缓存后端基准测试
+对比memory、sqlite和redis（默认使用本地Redis协议替身服务）三种后端的
+单键读写与批量读写延迟，以及多线程并发读取时的吞吐
+
+    python bench_cache.py
+    python bench_cache.py --redis-url redis://127.0.0.1:6379/0 --keys 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from shared_cache import BaseCache, create_cache
+
+
+def _sample_value(size: int) -> str:
+    page = {"image_url": "https://example.com/a.png", "markup_status": "completed", "questions_info": []}
+    value = json.dumps([page])
+    return (value * (size // len(value) + 1))[:size]
+
+
+def _timed(fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_backend(cache: BaseCache, keys: int, value_size: int, batch: int, threads: int) -> Dict[str, float]:
+    value = _sample_value(value_size)
+    names = [f"bench:{i}" for i in range(keys)]
+    result = {}
+
+    result["set_us"] = _timed(lambda: [cache.set(name, value, ttl=60) for name in names]) / keys * 1e6
+    result["get_us"] = _timed(lambda: [cache.get(name) for name in names]) / keys * 1e6
+
+    batches = [names[i:i + batch] for i in range(0, keys, batch)]
+    result["set_many_us"] = _timed(
+        lambda: [cache.set_many({name: value for name in group}, ttl=60) for group in batches]
+    ) / keys * 1e6
+    result["get_many_us"] = _timed(lambda: [cache.get_many(group) for group in batches]) / keys * 1e6
+
+    def read_all(offset: int) -> None:
+        for name in names[offset::threads]:
+            cache.get(name)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        elapsed = _timed(lambda: list(executor.map(read_all, range(threads))))
+    result["concurrent_get_ops"] = keys / elapsed
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="缓存后端基准测试")
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--value-size", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--redis-url", default="", help="不指定时启动本地Redis协议替身服务")
+    args = parser.parse_args()
+
+    redis_url = args.redis_url
+    if not redis_url:
+        from resp_server import start_in_thread
+        port, _ = start_in_thread()
+        redis_url = f"redis://127.0.0.1:{port}/0"
+
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ("memory", "sqlite", "redis"):
+            cache = create_cache(
+                backend=backend,
+                max_bytes=512 * 1024 * 1024,
+                sqlite_path=os.path.join(directory, "bench.sqlite3"),
+                redis_url=redis_url,
+                redis_key_prefix="bench:",
+            )
+            result = run_backend(cache, args.keys, args.value_size, args.batch, args.threads)
+            print(
+                f"{backend:<7} set {result['set_us']:8.1f}us  get {result['get_us']:8.1f}us  "
+                f"set_many {result['set_many_us']:8.1f}us  get_many {result['get_many_us']:8.1f}us  "
+                f"并发读 {result['concurrent_get_ops']:10.0f} ops/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+中间件开销基准测试
+在不同中间件层数下对比每个请求的耗时：
+  call_next  @app.middleware("http")，经BaseHTTPMiddleware（每层一个内存流和任务组）
+  request    @app.middleware("request")，纯ASGI请求钩子
+  response   @app.middleware("response")，纯ASGI响应钩子
+  timing     计时中间件：call_next写法 vs 请求钩子+响应钩子写法（每层两个钩子）
+
+    python bench_middleware.py
+    python bench_middleware.py --depths 0 1 2 4 8 16 --requests 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict
+
+from fastapi import FastAPI, Request
+
+
+def build_app(kind: str, depth: int) -> FastAPI:
+    app = FastAPI(openapi_url=None)
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, bool]:
+        return {"ok": True}
+
+    for _ in range(depth):
+        if kind == "call_next":
+            @app.middleware("http")
+            async def passthrough(request: Request, call_next: Callable) -> Any:
+                return await call_next(request)
+        elif kind == "request":
+            @app.middleware("request")
+            async def noop_request(request: Request) -> None:
+                return None
+        elif kind == "response":
+            @app.middleware("response")
+            async def noop_response(request: Request, head: Any) -> None:
+                return None
+        elif kind == "timing_call_next":
+            @app.middleware("http")
+            async def timing(request: Request, call_next: Callable) -> Any:
+                start = time.perf_counter()
+                response = await call_next(request)
+                response.headers["X-Process-Time"] = f"{time.perf_counter() - start:.6f}"
+                return response
+        elif kind == "timing_hooks":
+            @app.middleware("request")
+            async def start_timer(request: Request) -> None:
+                request.state.start_time = time.perf_counter()
+
+            @app.middleware("response")
+            async def process_time(request: Request, head: Any) -> None:
+                head.headers["X-Process-Time"] = f"{time.perf_counter() - request.state.start_time:.6f}"
+        else:
+            raise ValueError(kind)
+    return app
+
+
+async def call(app: FastAPI) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/ping", "raw_path": b"/ping", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    body = []
+    received = False
+
+    async def receive() -> Dict[str, Any]:
+        # 与ASGI服务器一样，请求体之后的receive阻塞到客户端断开
+        nonlocal received
+        if received:
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    await call(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1, 4, 8], help="中间件层数")
+    parser.add_argument("--requests", type=int, default=2000, help="每组请求数")
+    args = parser.parse_args()
+
+    kinds = ["call_next", "request", "response", "timing_call_next", "timing_hooks"]
+    print(f"{'层数':>4} " + " ".join(f"{kind + '(us)':>22}" for kind in kinds))
+    for depth in args.depths:
+        apps = [build_app(kind, depth) for kind in kinds]
+        expected = asyncio.run(call(apps[0]))
+        assert all(asyncio.run(call(app)) == expected for app in apps)
+        timings = [asyncio.run(measure(app, args.requests)) for app in apps]
+        print(f"{depth:>4} " + " ".join(f"{us:>22.1f}" for us in timings))
+
+
+if __name__ == "__main__":
+    main()
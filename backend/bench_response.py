@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+响应序列化基准测试
+对比默认路径（重新校验response_model、jsonable_encoder、json.dumps）与
+trust_response_model快速路径，返回GradeDataResponse同构模型时每个请求的耗时
+
+    python bench_response.py
+    python bench_response.py --sizes 1024 1048576 --requests 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+
+class BenchResponse(BaseModel):
+    """与main.GradeDataResponse同构，避免导入main带来的配置和预热"""
+    success: bool
+    message: str
+    data: Optional[str] = None
+    version: Optional[str] = None
+    delta: Optional[List[Dict[str, Any]]] = None
+
+
+def _sample_data(size: int) -> str:
+    step = {"step_id": 1, "student_answer": "x=1", "analysis": "正确", "is_correct": True}
+    page = {"image_url": "https://example.com/a.png", "markup_status": "completed",
+            "questions_info": [{"question_number": "1", "question_text": "解方程", "answer_steps": [step] * 4}]}
+    value = json.dumps([page], ensure_ascii=False)
+    return (value * (size // len(value) + 1))[:size]
+
+
+def build_app(trust: bool, data: str) -> FastAPI:
+    app = FastAPI(trust_response_model=trust, openapi_url=None)
+
+    @app.get("/grade", response_model=BenchResponse)
+    async def grade() -> BenchResponse:
+        return BenchResponse(success=True, message="获取成功", data=data, version="0123456789abcdef")
+
+    return app
+
+
+async def call(app: FastAPI) -> bytes:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/grade", "raw_path": b"/grade", "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    body = []
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    await call(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1024, 256 * 1024, 4 * 1024 * 1024],
+                        help="data字段的字节数")
+    parser.add_argument("--requests", type=int, default=0, help="每组请求数（默认按大小自动选择）")
+    args = parser.parse_args()
+
+    print(f"{'data大小':>10} {'默认路径(us)':>14} {'快速路径(us)':>14} {'加速比':>8}")
+    for size in args.sizes:
+        data = _sample_data(size)
+        requests = args.requests or max(10, min(2000, 50_000_000 // max(size, 1)))
+        default_app, trusted_app = build_app(False, data), build_app(True, data)
+        assert asyncio.run(call(default_app)) == asyncio.run(call(trusted_app))
+        default_us = asyncio.run(measure(default_app, requests))
+        trusted_us = asyncio.run(measure(trusted_app, requests))
+        print(f"{size:>10} {default_us:>14.1f} {trusted_us:>14.1f} {default_us / trusted_us:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
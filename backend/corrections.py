@@ -0,0 +1,231 @@
+"""
+教师修正的合并写回
+教师在预览页修改某一步的is_correct或解析后，修正先进入内存队列：
+同一记录的多次修改合并为一份，短时间窗口内的多条记录合并为一次records/batch_update，
+并受写入频率限制。修正保存在多维表格的独立字段中，读取批改结果时覆盖到原文上
+"""
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 可修正的步骤字段
+CORRECTABLE_FIELDS = ("is_correct", "analysis")
+
+# 一条记录的修正：{"<题号>/<step_id>": {"is_correct": false, "analysis": "..."}}
+Corrections = Dict[str, Dict[str, object]]
+# 写回目标：(app_token, table_id, record_id)
+Target = Tuple[str, str, str]
+
+# 读取一批记录当前的修正：(app_token, table_id, record_ids) -> {record_id: Corrections}
+FetchCorrections = Callable[[str, str, List[str]], Dict[str, Corrections]]
+# 写入一批记录的修正：(app_token, table_id, {record_id: Corrections}) -> None
+WriteCorrections = Callable[[str, str, Dict[str, Corrections]], None]
+
+
+def correction_key(question_number: object, step_id: object) -> str:
+    return f"{str(question_number).strip()}/{step_id}"
+
+
+def parse_corrections(text: str) -> Corrections:
+    """解析修正字段的内容，格式错误时视为没有修正"""
+    if not text or not text.strip():
+        return {}
+    try:
+        value = json.loads(text)
+    except ValueError:
+        logger.warning("修正字段不是合法的JSON，已忽略")
+        return {}
+    return {str(key): edit for key, edit in value.items() if isinstance(edit, dict)} if isinstance(value, dict) else {}
+
+
+def merge_corrections(base: Corrections, edits: Corrections) -> Corrections:
+    """把新的修正合并到已有修正上，同一步骤的同一字段以新值为准"""
+    merged = {key: dict(edit) for key, edit in base.items()}
+    for key, edit in edits.items():
+        merged.setdefault(key, {}).update(edit)
+    return merged
+
+
+def apply_corrections(grade_data: str, corrections: Corrections) -> str:
+    """把修正覆盖到批改结果上，返回新的JSON字符串；没有命中任何步骤时原样返回"""
+    if not corrections:
+        return grade_data
+    try:
+        document = json.loads(grade_data)
+    except (TypeError, ValueError):
+        return grade_data
+    pages = document if isinstance(document, list) else [document]
+    changed = False
+    for page in pages:
+        if not isinstance(page, dict):
+            continue
+        for question in page.get("questions_info") or []:
+            if not isinstance(question, dict):
+                continue
+            for step in question.get("answer_steps") or []:
+                if not isinstance(step, dict):
+                    continue
+                edit = corrections.get(correction_key(question.get("question_number", ""), step.get("step_id")))
+                if edit:
+                    step.update({field: edit[field] for field in CORRECTABLE_FIELDS if field in edit})
+                    changed = True
+    return json.dumps(document, ensure_ascii=False) if changed else grade_data
+
+
+class CorrectionWriter:
+    """
+    后台线程按窗口批量写回修正
+    每批先读取这些记录当前的修正字段，合并上新的修正后整体写入，
+    不会覆盖其他进程或其他教师写入的修正；写入失败的修正重新排队，稍后重试
+    正在写回的修正在写入成功前仍由pending_for返回，读取到的结果始终包含已接受的修正
+    """
+
+    def __init__(
+        self,
+        fetch_current: FetchCorrections,
+        write: WriteCorrections,
+        flush_window: float = 1.0,
+        batch_size: int = 100,
+        max_requests_per_second: float = 5.0,
+        retry_delay: float = 5.0,
+    ) -> None:
+        self.fetch_current = fetch_current
+        self.write = write
+        self.flush_window = flush_window
+        self.batch_size = batch_size
+        self.min_interval = 1.0 / max_requests_per_second if max_requests_per_second > 0 else 0.0
+        self.retry_delay = retry_delay
+        self._pending: Dict[Target, Corrections] = {}
+        # 每个目标最早一条未写回修正的时间，用于计算窗口
+        self._since: Dict[Target, float] = {}
+        # 已取出、正在写回的修正，写入成功后才移除
+        self._in_flight: Dict[Target, Corrections] = {}
+        # 每写回成功一批加一，读取方据此判断读取期间是否有修正落盘
+        self._generation = 0
+        self._flush_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._last_request = 0.0
+        self._counters: Dict[str, int] = {"accepted": 0, "coalesced": 0, "flushed_records": 0, "requests": 0, "failures": 0}
+
+    def submit(self, target: Target, edits: Corrections) -> None:
+        with self._cond:
+            existing = self._pending.get(target)
+            if existing is None:
+                self._pending[target] = merge_corrections({}, edits)
+                self._since[target] = time.monotonic()
+            else:
+                self._counters["coalesced"] += len(edits.keys() & existing.keys())
+                self._pending[target] = merge_corrections(existing, edits)
+            self._counters["accepted"] += len(edits)
+            self._cond.notify()
+        self._ensure_running()
+
+    def pending_for(self, target: Target) -> Corrections:
+        """尚未写回（含正在写回）的修正，读取时一并覆盖，保证写回前后读到的一致"""
+        with self._cond:
+            return merge_corrections(self._in_flight.get(target) or {}, self._pending.get(target) or {})
+
+    def generation(self) -> int:
+        """
+        写回成功的批次计数
+        读取记录前后的计数不同时，读到的可能是写回前的旧值，而修正已不在pending_for中，这次的结果不应缓存
+        """
+        with self._cond:
+            return self._generation
+
+    def _ensure_running(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="correction-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # 等到最早的修正满一个窗口，或待写记录已够一批
+                wait = self.flush_window - (time.monotonic() - min(self._since.values()))
+                if wait > 0 and len(self._pending) < self.batch_size:
+                    self._cond.wait(timeout=wait)
+                    continue
+            if not self.flush() and self.retry_delay > 0:
+                time.sleep(self.retry_delay)
+
+    def flush(self) -> bool:
+        """
+        立即写回全部待写修正，返回是否全部成功
+        SCF在函数返回后冻结容器，后台线程无法按时写回，入口在每次调用结束时调用
+        """
+        # 同一时间只有一批在写回，正在写回的修正不会被另一次flush覆盖
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> bool:
+        with self._cond:
+            pending, self._pending = self._pending, {}
+            since, self._since = self._since, {}
+            self._in_flight = pending
+        if not pending:
+            return True
+
+        by_table: Dict[Tuple[str, str], List[Target]] = {}
+        for target in pending:
+            by_table.setdefault(target[:2], []).append(target)
+
+        ok = True
+        for (app_token, table_id), targets in by_table.items():
+            for i in range(0, len(targets), self.batch_size):
+                chunk = targets[i:i + self.batch_size]
+                try:
+                    self._write_chunk(app_token, table_id, {target[2]: pending[target] for target in chunk})
+                    with self._cond:
+                        self._counters["flushed_records"] += len(chunk)
+                        self._generation += 1
+                        for target in chunk:
+                            self._in_flight.pop(target, None)
+                except Exception as e:
+                    ok = False
+                    logger.warning("写回教师修正失败，稍后重试: %s", e)
+                    with self._cond:
+                        self._counters["failures"] += 1
+                        for target in chunk:
+                            # 重新排队，排队期间又收到的修正以新的为准
+                            self._pending[target] = merge_corrections(pending[target], self._pending.get(target, {}))
+                            self._since.setdefault(target, since.get(target, time.monotonic()))
+                            self._in_flight.pop(target, None)
+        return ok
+
+    def _write_chunk(self, app_token: str, table_id: str, edits: Dict[str, Corrections]) -> None:
+        record_ids = list(edits)
+        self._throttle()
+        current = self.fetch_current(app_token, table_id, record_ids)
+        merged = {
+            record_id: merge_corrections(current.get(record_id, {}), record_edits)
+            for record_id, record_edits in edits.items()
+        }
+        self._throttle()
+        self.write(app_token, table_id, merged)
+
+    def _throttle(self) -> None:
+        """按写入频率上限间隔发出请求"""
+        with self._cond:
+            now = time.monotonic()
+            delay = self._last_request + self.min_interval - now
+            self._last_request = max(now, self._last_request + self.min_interval)
+            self._counters["requests"] += 1
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                **self._counters,
+                "pending_records": len(self._pending),
+                "in_flight_records": len(self._in_flight),
+                "pending_edits": sum(len(edits) for edits in self._pending.values()),
+            }
@@ -30,7 +30,11 @@ def create_package():
     
     # 复制源代码文件
     print("\n2. 复制源代码文件...")
-    source_files = ["main.py", "scf_handler.py", "requirements.txt"]
+    source_files = ["main.py", "scf_handler.py", "grade_stats.py", "image_cache.py",
+                    "status_watch.py", "deadline.py", "hedging.py", "admission.py",
+                    "warmup.py", "structured_logging.py", "shared_cache.py",
+                    "exam_template.py", "value_compression.py", "grade_index.py",
+                    "corrections.py", "grade_delta.py", "requirements.txt"]
     for file in source_files:
         src = backend_dir / file
         if src.exists():
@@ -40,6 +44,15 @@ def create_package():
             print(f"   ✗ {file} 不存在，跳过")
             sys.exit(1)
     
+    # fastapi和starlette是修改过的版本，随源码复制，不从PyPI安装（见requirements.txt）
+    for package in ["fastapi", "starlette"]:
+        shutil.copytree(
+            backend_dir / package,
+            package_dir / package,
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+        )
+        print(f"   ✓ {package}/")
+    
     # 安装依赖
     print("\n3. 安装Python依赖到打包目录...")
     os.chdir(package_dir)
@@ -64,6 +77,23 @@ def create_package():
         print(f"   ✗ 依赖安装失败: {e}")
         sys.exit(1)
     
+    # 生成OpenAPI快照，线上直接返回快照，不必在冷启动后生成文档；
+    # 在打包目录中导入main，同时检查部署包能否正常启动
+    print("\n3.1 生成OpenAPI快照...")
+    snapshot = package_dir / "openapi.json"
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, main; main.app.write_openapi_snapshot(sys.argv[1])", str(snapshot)],
+        cwd=package_dir,
+        env={**os.environ, "OPENAPI_SNAPSHOT": ""},
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    if result.returncode != 0:
+        print(f"   ✗ 生成OpenAPI快照失败: {result.stderr[-500:]}")
+        sys.exit(1)
+    print(f"   ✓ openapi.json ({snapshot.stat().st_size} 字节)")
+    
     # 清理不必要的文件
     print("\n4. 清理不必要的文件...")
     cleanup_patterns = [
@@ -0,0 +1,59 @@
+"""
+请求级超时预算
+一次请求的所有上游调用都从同一个截止时间里扣除超时，
+剩余时间不足以完成下一阶段时立即返回504，而不是等到SCF强制终止函数
+"""
+import time
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+# 单个阶段至少需要的时间（秒），低于此值时不再发起上游请求
+MIN_STAGE_TIMEOUT = 0.5
+
+
+def deadline_exceeded_error(stage: str) -> HTTPException:
+    return HTTPException(
+        status_code=504,
+        detail=f"请求处理超时：剩余时间不足以完成{stage}，请稍后重试"
+    )
+
+
+class Deadline:
+    """
+    截止时间，基于单调时钟
+    每个上游阶段调用timeout_for取得本阶段的超时：不超过阶段自身上限，也不超过剩余预算
+    """
+
+    def __init__(self, budget: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.budget = budget
+        self.expires_at = clock() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() < MIN_STAGE_TIMEOUT
+
+    def can_afford(self, seconds: float) -> bool:
+        """剩余预算是否还够执行一个预计耗时seconds的可选阶段"""
+        return self.remaining() >= seconds
+
+    def timeout_for(self, stage: str, cap: float) -> float:
+        """
+        本阶段可用的超时时间
+        剩余预算低于MIN_STAGE_TIMEOUT时抛出504，避免发起注定超时的请求
+        """
+        remaining = self.remaining()
+        if remaining < MIN_STAGE_TIMEOUT:
+            raise deadline_exceeded_error(stage)
+        return min(cap, remaining)
+
+
+def stage_timeout(deadline: Optional[Deadline], stage: str, cap: float) -> float:
+    """未传入截止时间时沿用阶段自身的超时上限"""
+    if deadline is None:
+        return cap
+    return deadline.timeout_for(stage, cap)
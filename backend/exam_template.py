@@ -0,0 +1,182 @@
+"""
+试卷模板驻留
+同一场考试每个学生的批改结果都重复着相同的题号、题型和很长的LaTeX题干。
+缓存时把文档拆成按哈希标识、全班共享的试卷模板和每个学生自己的作答数据，
+读取时再拼回完整的JSON
+"""
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from shared_cache import ValueCodec
+
+# 属于试卷模板的题目字段，其余字段（answer_steps等）属于学生作答
+TEMPLATE_FIELDS = ("question_number", "question_type", "question_text")
+
+# 一道题的模板：按原顺序保存的 (字段, 值)；一份试卷模板：每页的题目模板
+QuestionTemplate = Tuple[Tuple[str, object], ...]
+ExamTemplate = Tuple[Tuple[QuestionTemplate, ...], ...]
+
+
+class InternedDocument:
+    """
+    拆分后的批改结果：模板ID + 去掉模板字段后的作答数据（紧凑JSON）
+    template引用共享的模板对象本身，还原时不必查表，模板被释放后已取出的文档仍可还原
+    """
+
+    __slots__ = ("template_id", "template", "answers", "raw_size")
+
+    def __init__(self, template_id: str, template: ExamTemplate, answers: str, raw_size: int) -> None:
+        self.template_id = template_id
+        self.template = template
+        self.answers = answers
+        self.raw_size = raw_size
+
+
+def split_document(grade_data: str) -> Optional[Tuple[ExamTemplate, List[dict]]]:
+    """
+    把批改结果拆成试卷模板和作答数据
+    不是 [{..., questions_info: [...]}] 结构的文档返回None，按原样保存
+    """
+    try:
+        document = json.loads(grade_data)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(document, list) or not document:
+        return None
+
+    template = []
+    answers = []
+    for page in document:
+        if not isinstance(page, dict) or not isinstance(page.get("questions_info"), list):
+            return None
+        page_template = []
+        page_answers = []
+        for question in page["questions_info"]:
+            if not isinstance(question, dict):
+                return None
+            page_template.append(tuple((key, question[key]) for key in question if key in TEMPLATE_FIELDS))
+            page_answers.append({key: value for key, value in question.items() if key not in TEMPLATE_FIELDS})
+        template.append(tuple(page_template))
+        answers.append({**page, "questions_info": page_answers})
+    return tuple(template), answers
+
+
+def template_id_of(template: ExamTemplate) -> str:
+    canonical = json.dumps(template, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ExamTemplateStore:
+    """
+    模板按引用计数共享：最后一个引用它的文档被淘汰时释放
+    内存统计按UTF-8字节计：原始文档总大小、模板与作答数据的实际占用
+    """
+
+    def __init__(self) -> None:
+        # template_id -> [模板, 引用计数, 字节数]
+        self._templates: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._documents = 0
+        self._raw_bytes = 0
+        self._answer_bytes = 0
+        self._template_bytes = 0
+
+    def intern(self, grade_data: str) -> Optional[InternedDocument]:
+        split = split_document(grade_data)
+        if split is None:
+            return None
+        template, answers = split
+        template_id = template_id_of(template)
+        document = InternedDocument(
+            template_id=template_id,
+            template=template,
+            answers=json.dumps(answers, ensure_ascii=False, separators=(",", ":")),
+            raw_size=len(grade_data.encode("utf-8")),
+        )
+        with self._lock:
+            entry = self._templates.get(template_id)
+            if entry is None:
+                size = len(json.dumps(template, ensure_ascii=False).encode("utf-8"))
+                entry = self._templates[template_id] = [template, 0, size]
+                self._template_bytes += size
+            entry[1] += 1
+            # 同一模板的文档共用一个模板对象
+            document.template = entry[0]
+            self._documents += 1
+            self._raw_bytes += document.raw_size
+            self._answer_bytes += self.answer_size(document)
+        return document
+
+    def rebuild(self, document: InternedDocument) -> str:
+        pages = json.loads(document.answers)
+        for page, page_template in zip(pages, document.template):
+            page["questions_info"] = [
+                {**dict(question_template), **answers}
+                for question_template, answers in zip(page_template, page["questions_info"])
+            ]
+        return json.dumps(pages, ensure_ascii=False)
+
+    def release(self, document: InternedDocument) -> None:
+        with self._lock:
+            entry = self._templates.get(document.template_id)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._templates[document.template_id]
+                self._template_bytes -= entry[2]
+            self._documents -= 1
+            self._raw_bytes -= document.raw_size
+            self._answer_bytes -= self.answer_size(document)
+
+    @staticmethod
+    def answer_size(document: InternedDocument) -> int:
+        return len(document.answers.encode("utf-8"))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            stored = self._answer_bytes + self._template_bytes
+            return {
+                "templates": len(self._templates),
+                "documents": self._documents,
+                "raw_bytes": self._raw_bytes,
+                "stored_bytes": stored,
+                "saved_bytes": self._raw_bytes - stored,
+                "ratio": round(self._raw_bytes / stored, 2) if stored else None,
+            }
+
+
+class InterningCodec(ValueCodec):
+    """
+    MemoryCache的值编码：批改结果拆成共享模板 + 作答数据，其余值（令牌、record_id）原样保存
+    条目大小只计作答数据，模板的内存在exam_templates统计中单独列出
+    """
+
+    def __init__(self, store: Optional[ExamTemplateStore] = None) -> None:
+        self.store = store or ExamTemplateStore()
+
+    def encode(self, value: str) -> object:
+        # 只有JSON数组才可能是批改结果，其余值不必尝试解析
+        if not value.lstrip().startswith("["):
+            return value
+        document = self.store.intern(value)
+        return document if document is not None else value
+
+    def decode(self, stored: object) -> str:
+        if isinstance(stored, InternedDocument):
+            return self.store.rebuild(stored)
+        return stored
+
+    def size(self, stored: object) -> int:
+        if isinstance(stored, InternedDocument):
+            return self.store.answer_size(stored)
+        return super().size(stored)
+
+    def release(self, stored: object) -> None:
+        if isinstance(stored, InternedDocument):
+            self.store.release(stored)
+
+    def stats(self) -> Dict[str, object]:
+        return {"exam_templates": self.store.stats()}
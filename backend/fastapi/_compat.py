@@ -10,6 +10,7 @@ from typing import (
     FrozenSet,
     List,
     Mapping,
+    Optional,
     Sequence,
     Set,
     Tuple,
@@ -258,6 +259,12 @@ if PYDANTIC_V2:
         assert issubclass(origin_type, sequence_types)  # type: ignore[arg-type]
         return sequence_annotation_to_type[origin_type](value)  # type: ignore[no-any-return]
 
+    def get_list_item_validator(
+        field: ModelField,
+    ) -> Optional[Callable[[Any, Tuple[Union[str, int], ...]], Tuple[Any, Any]]]:
+        # Pydantic v2 validates the whole list in one call, no per-item hook
+        return None
+
     def get_missing_field_error(loc: Tuple[str, ...]) -> Dict[str, Any]:
         error = ValidationError.from_exception_data(
             "Field required", [{"type": "missing", "loc": loc, "input": {}}]
@@ -493,6 +500,28 @@ else:
     def serialize_sequence_value(*, field: ModelField, value: Any) -> Sequence[Any]:
         return sequence_shape_to_type[field.shape](value)  # type: ignore[no-any-return,attr-defined]
 
+    def get_list_item_validator(
+        field: ModelField,
+    ) -> Optional[Callable[[Any, Tuple[Union[str, int], ...]], Tuple[Any, Any]]]:
+        """
+        For a plain `List[X]` field, a function validating one item at `loc`
+        exactly as validating the whole list would, returning `(value, errors)`.
+        `None` for any other field, or when validators run on the whole list.
+        """
+        if (
+            field.shape != SHAPE_LIST  # type: ignore[attr-defined]
+            or field.pre_validators  # type: ignore[attr-defined]
+            or field.post_validators  # type: ignore[attr-defined]
+        ):
+            return None
+
+        def validate_item(
+            value: Any, loc: Tuple[Union[str, int], ...]
+        ) -> Tuple[Any, Any]:
+            return field._validate_singleton(value, {}, loc, None)  # type: ignore[attr-defined]
+
+        return validate_item
+
     def get_missing_field_error(loc: Tuple[str, ...]) -> Dict[str, Any]:
         missing_field_error = ErrorWrapper(MissingError(), loc=loc)  # type: ignore[call-arg]
         new_error = ValidationError([missing_field_error], RequestErrorModel)
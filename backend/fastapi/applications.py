@@ -1,3 +1,4 @@
+import json
 from enum import Enum
 from typing import (
     Any,
@@ -28,7 +29,6 @@ from fastapi.openapi.docs import (
     get_swagger_ui_html,
     get_swagger_ui_oauth2_redirect_html,
 )
-from fastapi.openapi.utils import get_openapi
 from fastapi.params import Depends
 from fastapi.types import DecoratedCallable, IncEx
 from fastapi.utils import generate_unique_id
@@ -39,6 +39,7 @@ from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.errors import ServerErrorMiddleware
 from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.middleware.hooks import HOOK_MIDDLEWARE
 from starlette.requests import Request
 from starlette.responses import HTMLResponse, JSONResponse, Response
 from starlette.routing import BaseRoute
@@ -813,6 +814,52 @@ class FastAPI(Starlette):
                 """
             ),
         ] = True,
+        trust_response_model: Annotated[
+            bool,
+            Doc(
+                """
+                Trust that an endpoint returning an instance of exactly its
+                `response_model` class returns valid data: skip validating it
+                again and serialize it in a single pass, instead of validating,
+                converting with `jsonable_encoder` and then dumping to JSON.
+
+                Any other return value (dicts, subclasses, other types) is still
+                validated and serialized as usual. It can also be set per router
+                or per *path operation* with `add_api_route()` / `api_route()`.
+                """
+            ),
+        ] = False,
+        max_body_size: Annotated[
+            Optional[int],
+            Doc(
+                """
+                The maximum size in bytes of a request body read by the *path
+                operations*. Larger bodies are rejected with a 413 status code
+                as soon as the limit is exceeded, without reading the rest.
+                `None` means no limit.
+
+                JSON bodies declared as a list (e.g. `items: List[Item]`) are
+                always parsed and validated item by item while they stream in,
+                so a large list is never held in memory as raw bytes and as
+                decoded JSON at the same time.
+                """
+            ),
+        ] = None,
+        openapi_snapshot: Annotated[
+            Optional[str],
+            Doc(
+                """
+                Path to a JSON file with a pre-generated OpenAPI schema, written
+                with `app.write_openapi_snapshot()` (e.g. at build time).
+
+                When the file exists, `app.openapi()` loads the schema from it and
+                the OpenAPI URL serves its bytes directly, so the schema is never
+                generated (and `fastapi.openapi.utils` is never imported) in that
+                process. When the file doesn't exist, the schema is generated on
+                first use as usual, which keeps it dynamic during development.
+                """
+            ),
+        ] = None,
         **extra: Annotated[
             Any,
             Doc(
@@ -874,6 +921,9 @@ class FastAPI(Starlette):
             ),
         ] = "3.1.0"
         self.openapi_schema: Optional[Dict[str, Any]] = None
+        self.openapi_snapshot = openapi_snapshot
+        self._openapi_snapshot_body: Optional[bytes] = None
+        self._openapi_snapshot_read = False
         if self.openapi_url:
             assert self.title, "A title must be provided for OpenAPI, e.g.: 'My API'"
             assert self.version, "A version must be provided for OpenAPI, e.g.: '2.1.0'"
@@ -946,6 +996,8 @@ class FastAPI(Starlette):
             include_in_schema=include_in_schema,
             responses=responses,
             generate_unique_id_function=generate_unique_id_function,
+            trust_response_model=trust_response_model,
+            max_body_size=max_body_size,
         )
         self.exception_handlers: Dict[
             Any, Callable[[Request, Any], Union[Response, Awaitable[Response]]]
@@ -1030,34 +1082,82 @@ class FastAPI(Starlette):
         [FastAPI docs for OpenAPI](https://fastapi.tiangolo.com/how-to/extending-openapi/).
         """
         if not self.openapi_schema:
-            self.openapi_schema = get_openapi(
-                title=self.title,
-                version=self.version,
-                openapi_version=self.openapi_version,
-                summary=self.summary,
-                description=self.description,
-                terms_of_service=self.terms_of_service,
-                contact=self.contact,
-                license_info=self.license_info,
-                routes=self.routes,
-                webhooks=self.webhooks.routes,
-                tags=self.openapi_tags,
-                servers=self.servers,
-                separate_input_output_schemas=self.separate_input_output_schemas,
-            )
+            snapshot = self.read_openapi_snapshot()
+            if snapshot is not None:
+                self.openapi_schema = json.loads(snapshot)
+                if self.servers:
+                    self.openapi_schema["servers"] = self.servers
+            else:
+                self.openapi_schema = self.generate_openapi()
         return self.openapi_schema
 
+    def generate_openapi(self) -> Dict[str, Any]:
+        """
+        Generate the OpenAPI schema from the application routes, ignoring any
+        cached schema or `openapi_snapshot`.
+        """
+        from fastapi.openapi.utils import get_openapi
+
+        return get_openapi(
+            title=self.title,
+            version=self.version,
+            openapi_version=self.openapi_version,
+            summary=self.summary,
+            description=self.description,
+            terms_of_service=self.terms_of_service,
+            contact=self.contact,
+            license_info=self.license_info,
+            routes=self.routes,
+            webhooks=self.webhooks.routes,
+            tags=self.openapi_tags,
+            servers=self.servers,
+            separate_input_output_schemas=self.separate_input_output_schemas,
+        )
+
+    def read_openapi_snapshot(self) -> Optional[bytes]:
+        """
+        Return the contents of the `openapi_snapshot` file, or `None` when it is
+        not configured or doesn't exist. The file is read only once.
+        """
+        if not self._openapi_snapshot_read:
+            self._openapi_snapshot_read = True
+            if self.openapi_snapshot:
+                try:
+                    with open(self.openapi_snapshot, "rb") as f:
+                        self._openapi_snapshot_body = f.read()
+                except FileNotFoundError:
+                    pass
+        return self._openapi_snapshot_body
+
+    def write_openapi_snapshot(self, path: str) -> None:
+        """
+        Generate the OpenAPI schema and write it to `path`, encoded the same way
+        the OpenAPI URL serves it, to be used later as `openapi_snapshot`.
+        """
+        body = JSONResponse(self.generate_openapi()).body
+        with open(path, "wb") as f:
+            f.write(body)
+
     def setup(self) -> None:
         if self.openapi_url:
             urls = (server_data.get("url") for server_data in self.servers)
             server_urls = {url for url in urls if url}
+            configured_servers = len(self.servers)
 
-            async def openapi(req: Request) -> JSONResponse:
+            async def openapi(req: Request) -> Response:
                 root_path = req.scope.get("root_path", "").rstrip("/")
                 if root_path not in server_urls:
                     if root_path and self.root_path_in_servers:
                         self.servers.insert(0, {"url": root_path})
                         server_urls.add(root_path)
+                if (
+                    self.openapi_schema is None
+                    and len(self.servers) == configured_servers
+                ):
+                    # The snapshot already has the configured servers, serve it as is
+                    snapshot = self.read_openapi_snapshot()
+                    if snapshot is not None:
+                        return Response(snapshot, media_type="application/json")
                 return JSONResponse(self.openapi())
 
             self.add_route(self.openapi_url, openapi, include_in_schema=False)
@@ -1136,6 +1236,8 @@ class FastAPI(Starlette):
         generate_unique_id_function: Callable[[routing.APIRoute], str] = Default(
             generate_unique_id
         ),
+        trust_response_model: Union[bool, DefaultPlaceholder] = Default(False),
+        max_body_size: Union[Optional[int], DefaultPlaceholder] = Default(None),
     ) -> None:
         self.router.add_api_route(
             path,
@@ -1162,6 +1264,8 @@ class FastAPI(Starlette):
             name=name,
             openapi_extra=openapi_extra,
             generate_unique_id_function=generate_unique_id_function,
+            trust_response_model=trust_response_model,
+            max_body_size=max_body_size,
         )
 
     def api_route(
@@ -1192,6 +1296,8 @@ class FastAPI(Starlette):
         generate_unique_id_function: Callable[[routing.APIRoute], str] = Default(
             generate_unique_id
         ),
+        trust_response_model: Union[bool, DefaultPlaceholder] = Default(False),
+        max_body_size: Union[Optional[int], DefaultPlaceholder] = Default(None),
     ) -> Callable[[DecoratedCallable], DecoratedCallable]:
         def decorator(func: DecoratedCallable) -> DecoratedCallable:
             self.router.add_api_route(
@@ -1219,6 +1325,8 @@ class FastAPI(Starlette):
                 name=name,
                 openapi_extra=openapi_extra,
                 generate_unique_id_function=generate_unique_id_function,
+                trust_response_model=trust_response_model,
+                max_body_size=max_body_size,
             )
             return func
 
@@ -4552,7 +4660,18 @@ class FastAPI(Starlette):
             str,
             Doc(
                 """
-                The type of middleware. Currently only supports `http`.
+                The type of middleware:
+
+                * `http`: `func(request, call_next)` wraps the whole request and
+                    returns the response, run by `BaseHTTPMiddleware`.
+                * `request`: `func(request)` runs before the path operation and
+                    can return a response to send instead.
+                * `response`: `func(request, head)` runs when the response starts
+                    and can change `head.status_code` and `head.headers`.
+
+                `request` and `response` hooks are plain ASGI middlewares, with
+                no per request streams or tasks, so they are much cheaper than
+                `http` and streaming responses are not buffered through them.
                 """
             ),
         ],
@@ -4581,10 +4700,27 @@ class FastAPI(Starlette):
             response.headers["X-Process-Time"] = str(process_time)
             return response
         ```
+
+        The same with hooks:
+
+        ```python
+        @app.middleware("request")
+        async def start_timer(request: Request):
+            request.state.start_time = time.time()
+
+
+        @app.middleware("response")
+        async def add_process_time_header(request: Request, head):
+            process_time = time.time() - request.state.start_time
+            head.headers["X-Process-Time"] = str(process_time)
+        ```
         """
 
         def decorator(func: DecoratedCallable) -> DecoratedCallable:
-            self.add_middleware(BaseHTTPMiddleware, dispatch=func)
+            if middleware_type in HOOK_MIDDLEWARE:
+                self.add_middleware(HOOK_MIDDLEWARE[middleware_type], hook=func)
+            else:
+                self.add_middleware(BaseHTTPMiddleware, dispatch=func)
             return func
 
         return decorator
@@ -34,6 +34,7 @@ class Dependant:
         security_scopes: Optional[List[str]] = None,
         use_cache: bool = True,
         path: Optional[str] = None,
+        concurrent: bool = False,
     ) -> None:
         self.path_params = path_params or []
         self.query_params = query_params or []
@@ -52,6 +53,8 @@ class Dependant:
         self.name = name
         self.call = call
         self.use_cache = use_cache
+        # Opted in with Depends(concurrent=True)
+        self.concurrent = concurrent
         # Store the path to be able to re-generate a dependable from it in overrides
         self.path = path
         # Save the cache key at creation to optimize performance
@@ -151,6 +151,7 @@ def get_sub_dependant(
         name=name,
         security_scopes=security_scopes,
         use_cache=depends.use_cache,
+        concurrent=depends.concurrent,
     )
     if security_requirement:
         sub_dependant.security_requirements.append(security_requirement)
@@ -246,6 +247,7 @@ def get_dependant(
     name: Optional[str] = None,
     security_scopes: Optional[List[str]] = None,
     use_cache: bool = True,
+    concurrent: bool = False,
 ) -> Dependant:
     path_param_names = get_path_param_names(path)
     endpoint_signature = get_typed_signature(call)
@@ -256,6 +258,7 @@ def get_dependant(
         path=path,
         security_scopes=security_scopes,
         use_cache=use_cache,
+        concurrent=concurrent,
     )
     for param_name, param in signature_params.items():
         is_path_param = param_name in path_param_names
@@ -513,11 +516,25 @@ async def solve_generator(
     return await stack.enter_async_context(cm)
 
 
+class ValidatedBody:
+    """
+    A body for a single, non-embedded body field that was already validated
+    while it was read, e.g. a JSON list validated item by item as it streamed.
+    """
+
+    __slots__ = ("field", "value", "errors")
+
+    def __init__(self, field: ModelField, value: Any, errors: List[Any]) -> None:
+        self.field = field
+        self.value = value
+        self.errors = errors
+
+
 async def solve_dependencies(
     *,
     request: Union[Request, WebSocket],
     dependant: Dependant,
-    body: Optional[Union[Dict[str, Any], FormData]] = None,
+    body: Optional[Union[Dict[str, Any], FormData, ValidatedBody]] = None,
     background_tasks: Optional[StarletteBackgroundTasks] = None,
     response: Optional[Response] = None,
     dependency_overrides_provider: Optional[Any] = None,
@@ -529,6 +546,19 @@ async def solve_dependencies(
     Response,
     Dict[Tuple[Callable[..., Any], Tuple[str]], Any],
 ]:
+    if (
+        dependency_cache is None
+        and response is None
+        and background_tasks is None
+        and not (
+            dependency_overrides_provider
+            and dependency_overrides_provider.dependency_overrides
+        )
+    ):
+        # Top-level call without overrides: run the precompiled plan
+        return await _run_plan(
+            plan=get_dependant_plan(dependant), request=request, body=body
+        )
     values: Dict[str, Any] = {}
     errors: List[Any] = []
     if response is None:
@@ -641,6 +671,284 @@ async def solve_dependencies(
     return values, errors, background_tasks, response, dependency_cache
 
 
+class _ParamExtractor:
+    """Per-field lookup data for request_params_to_args, computed once."""
+
+    __slots__ = ("field", "alias", "name", "loc", "is_sequence")
+
+    def __init__(self, field: ModelField) -> None:
+        field_info = field.field_info
+        assert isinstance(
+            field_info, params.Param
+        ), "Params must be subclasses of Param"
+        self.field = field
+        self.alias = field.alias
+        self.name = field.name
+        self.loc = (field_info.in_.value, field.alias)
+        self.is_sequence = is_scalar_sequence_field(field)
+
+
+def _extract_params(
+    extractors: Sequence[_ParamExtractor],
+    received_params: Union[Mapping[str, Any], QueryParams, Headers],
+    errors: List[Any],
+) -> Dict[str, Any]:
+    # Same semantics as request_params_to_args, without per-request field checks
+    values: Dict[str, Any] = {}
+    multi_valued = isinstance(received_params, (QueryParams, Headers))
+    for extractor in extractors:
+        field = extractor.field
+        if extractor.is_sequence and multi_valued:
+            value = (
+                received_params.getlist(extractor.alias)  # type: ignore[union-attr]
+                or field.default
+            )
+        else:
+            value = received_params.get(extractor.alias)
+        if value is None:
+            if field.required:
+                errors.append(get_missing_field_error(loc=extractor.loc))
+            else:
+                values[extractor.name] = deepcopy(field.default)
+            continue
+        v_, errors_ = field.validate(value, values, loc=extractor.loc)
+        if isinstance(errors_, ErrorWrapper):
+            errors.append(errors_)
+        elif isinstance(errors_, list):
+            errors.extend(
+                _regenerate_error_with_loc(errors=errors_, loc_prefix=())
+            )
+        else:
+            values[extractor.name] = v_
+    return values
+
+
+_CALL_GENERATOR = "generator"
+_CALL_COROUTINE = "coroutine"
+_CALL_SYNC = "sync"
+
+
+class _PlanStep:
+    """One node of a dependant tree, in post-order."""
+
+    __slots__ = (
+        "dependant",
+        "call",
+        "kind",
+        "children",
+        "path_params",
+        "query_params",
+        "header_params",
+        "cookie_params",
+    )
+
+    def __init__(self, dependant: Dependant, children: List[int]) -> None:
+        self.dependant = dependant
+        self.call = dependant.call
+        self.kind: Optional[str] = None
+        if self.call is not None:
+            if is_gen_callable(self.call) or is_async_gen_callable(self.call):
+                self.kind = _CALL_GENERATOR
+            elif is_coroutine_callable(self.call):
+                self.kind = _CALL_COROUTINE
+            else:
+                self.kind = _CALL_SYNC
+        self.children = children
+        self.path_params = [_ParamExtractor(f) for f in dependant.path_params]
+        self.query_params = [_ParamExtractor(f) for f in dependant.query_params]
+        self.header_params = [
+            _ParamExtractor(f) for f in dependant.header_params
+        ]
+        self.cookie_params = [
+            _ParamExtractor(f) for f in dependant.cookie_params
+        ]
+
+
+class DependantPlan:
+    """
+    A dependant tree flattened into post-order steps, so solving it needs no
+    recursion and no per-request introspection of the dependency callables.
+    The last step is the dependant itself.
+    """
+
+    __slots__ = ("steps",)
+
+    def __init__(self, dependant: Dependant) -> None:
+        self.steps: List[_PlanStep] = []
+        self._add(dependant)
+
+    def _add(self, dependant: Dependant) -> int:
+        children = [self._add(sub) for sub in dependant.dependencies]
+        self.steps.append(_PlanStep(dependant, children))
+        return len(self.steps) - 1
+
+
+def get_dependant_plan(dependant: Dependant) -> DependantPlan:
+    """
+    Return the plan for a dependant, compiling it on first use. The plan is
+    cached on the dependant, which is fully built before the first request.
+    """
+    plan: Optional[DependantPlan] = getattr(dependant, "_plan", None)
+    if plan is None:
+        plan = DependantPlan(dependant)
+        dependant._plan = plan  # type: ignore[attr-defined]
+    return plan
+
+
+async def _run_plan(
+    *,
+    plan: DependantPlan,
+    request: Union[Request, WebSocket],
+    body: Optional[Union[Dict[str, Any], FormData, ValidatedBody]],
+) -> Tuple[
+    Dict[str, Any],
+    List[Any],
+    Optional[StarletteBackgroundTasks],
+    Response,
+    Dict[Tuple[Callable[..., Any], Tuple[str]], Any],
+]:
+    """
+    Solve a dependant tree from its plan, with the same results, errors and
+    call order guarantees as the recursive solve_dependencies.
+
+    Consecutive plain ``async def`` dependencies declared with
+    ``Depends(concurrent=True)`` that don't depend on each other are awaited
+    concurrently. All other dependencies run one at a time, in order, so one
+    that raises stops the dependencies after it. If several concurrent
+    dependencies raise, the first one in declaration order is re-raised.
+    Context variables set inside a dependency that ran concurrently are not
+    visible to later dependencies.
+    """
+    steps = plan.steps
+    response = Response()
+    del response.headers["content-length"]
+    response.status_code = None  # type: ignore
+    background_tasks: Optional[StarletteBackgroundTasks] = None
+    dependency_cache: Dict[Tuple[Callable[..., Any], Tuple[str]], Any] = {}
+    errors: List[Any] = []
+    results: List[Any] = [None] * len(steps)
+    failed = [False] * len(steps)
+    # Coroutine steps waiting to be awaited together, with their arguments
+    pending: Dict[int, Dict[str, Any]] = {}
+    pending_keys = set()
+
+    def store(index: int, solved: Any) -> None:
+        results[index] = solved
+        cache_key = steps[index].dependant.cache_key
+        if cache_key not in dependency_cache:
+            dependency_cache[cache_key] = solved
+
+    async def flush() -> None:
+        if not pending:
+            return
+        batch = list(pending.items())
+        pending.clear()
+        pending_keys.clear()
+        if len(batch) == 1:
+            index, sub_values = batch[0]
+            call = cast(Callable[..., Any], steps[index].call)
+            store(index, await call(**sub_values))
+            return
+        outcomes: List[Any] = [None] * len(batch)
+        raised: List[Optional[Exception]] = [None] * len(batch)
+
+        async def run(
+            position: int, index: int, sub_values: Dict[str, Any]
+        ) -> None:
+            call = cast(Callable[..., Any], steps[index].call)
+            try:
+                outcomes[position] = await call(**sub_values)
+            except Exception as e:
+                raised[position] = e
+
+        async with anyio.create_task_group() as tg:
+            for position, (index, sub_values) in enumerate(batch):
+                tg.start_soon(run, position, index, sub_values)
+        for exc in raised:
+            if exc is not None:
+                raise exc
+        for position, (index, _) in enumerate(batch):
+            store(index, outcomes[position])
+
+    values: Dict[str, Any] = {}
+    for index, step in enumerate(steps):
+        dependant = step.dependant
+        values = {}
+        step_failed = False
+        for child in step.children:
+            if child in pending:
+                await flush()
+                break
+        for child in step.children:
+            if failed[child]:
+                step_failed = True
+                continue
+            name = steps[child].dependant.name
+            if name is not None:
+                values[name] = results[child]
+        step_errors: List[Any] = []
+        for extractors, received in (
+            (step.path_params, request.path_params),
+            (step.query_params, request.query_params),
+            (step.header_params, request.headers),
+            (step.cookie_params, request.cookies),
+        ):
+            if extractors:
+                values.update(_extract_params(extractors, received, step_errors))
+        if dependant.body_params:
+            body_values, body_errors = await request_body_to_args(
+                required_params=dependant.body_params, received_body=body
+            )
+            values.update(body_values)
+            step_errors.extend(body_errors)
+        if step_errors:
+            errors.extend(step_errors)
+            step_failed = True
+        if dependant.http_connection_param_name:
+            values[dependant.http_connection_param_name] = request
+        if dependant.request_param_name and isinstance(request, Request):
+            values[dependant.request_param_name] = request
+        elif dependant.websocket_param_name and isinstance(request, WebSocket):
+            values[dependant.websocket_param_name] = request
+        if dependant.background_tasks_param_name:
+            if background_tasks is None:
+                background_tasks = BackgroundTasks()
+            values[dependant.background_tasks_param_name] = background_tasks
+        if dependant.response_param_name:
+            values[dependant.response_param_name] = response
+        if dependant.security_scopes_param_name:
+            values[dependant.security_scopes_param_name] = SecurityScopes(
+                scopes=dependant.security_scopes
+            )
+        failed[index] = step_failed
+        if step_failed or index == len(steps) - 1:
+            continue
+        cache_key = dependant.cache_key
+        if cache_key in pending_keys:
+            await flush()
+        if dependant.use_cache and cache_key in dependency_cache:
+            results[index] = dependency_cache[cache_key]
+        elif step.kind == _CALL_COROUTINE and dependant.concurrent:
+            pending[index] = values
+            pending_keys.add(cache_key)
+        else:
+            await flush()
+            call = cast(Callable[..., Any], step.call)
+            if step.kind == _CALL_GENERATOR:
+                stack = request.scope.get("fastapi_astack")
+                assert isinstance(stack, AsyncExitStack)
+                solved = await solve_generator(
+                    call=call, stack=stack, sub_values=values
+                )
+            elif step.kind == _CALL_COROUTINE:
+                solved = await call(**values)
+            else:
+                solved = await run_in_threadpool(call, **values)
+            store(index, solved)
+    await flush()
+    return values, errors, background_tasks, response, dependency_cache
+
+
 def request_params_to_args(
     required_params: Sequence[ModelField],
     received_params: Union[Mapping[str, Any], QueryParams, Headers],
@@ -678,10 +986,14 @@ def request_params_to_args(
 
 async def request_body_to_args(
     required_params: List[ModelField],
-    received_body: Optional[Union[Dict[str, Any], FormData]],
+    received_body: Optional[Union[Dict[str, Any], FormData, ValidatedBody]],
 ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
     values = {}
     errors: List[Dict[str, Any]] = []
+    if isinstance(received_body, ValidatedBody):
+        if received_body.errors:
+            return values, list(received_body.errors)
+        return {received_body.field.name: received_body.value}, errors
     if required_params:
         field = required_params[0]
         field_info = field.field_info
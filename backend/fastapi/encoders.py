@@ -202,6 +202,17 @@ def jsonable_encoder(
     [FastAPI docs for JSON Compatible Encoder](https://fastapi.tiangolo.com/tutorial/encoder/).
     """
     custom_encoder = custom_encoder or {}
+    if include is None and exclude is None and not custom_encoder:
+        type_encoder = _get_type_encoder(
+            type(obj),
+            by_alias,
+            exclude_unset,
+            exclude_defaults,
+            exclude_none,
+            sqlalchemy_safe,
+        )
+        if type_encoder is not None:
+            return type_encoder(obj)
     if custom_encoder:
         if type(obj) in custom_encoder:
             return custom_encoder[type(obj)](obj)
@@ -339,3 +350,246 @@ def jsonable_encoder(
         custom_encoder=custom_encoder,
         sqlalchemy_safe=sqlalchemy_safe,
     )
+
+
+# Values of these exact types are already JSON compatible.
+_JSON_NATIVE_TYPES = (str, int, float, bool, type(None))
+
+TypeEncoder = Callable[[Any], Any]
+# (type, by_alias, exclude_unset, exclude_defaults, exclude_none, sqlalchemy_safe)
+_TypeEncoderKey = Tuple[type, bool, bool, bool, bool, bool]
+_type_encoders: Dict[_TypeEncoderKey, Optional[TypeEncoder]] = {}
+# Bounds the cache for apps that create types dynamically (e.g. `create_model()`
+# per request). Types seen after the cache is full are simply not cached.
+TYPE_ENCODERS_MAX_SIZE = 4096
+
+
+def _get_type_encoder(
+    type_: type,
+    by_alias: bool,
+    exclude_unset: bool,
+    exclude_defaults: bool,
+    exclude_none: bool,
+    sqlalchemy_safe: bool,
+) -> Optional[TypeEncoder]:
+    """
+    The memoized encoder for values of exactly `type_` with these options, or
+    `None` if values of this type take the generic `jsonable_encoder` path.
+    """
+    key = (type_, by_alias, exclude_unset, exclude_defaults, exclude_none, sqlalchemy_safe)
+    try:
+        return _type_encoders[key]
+    except KeyError:
+        pass
+    encoder = _build_type_encoder(*key)
+    if len(_type_encoders) < TYPE_ENCODERS_MAX_SIZE:
+        _type_encoders[key] = encoder
+    return encoder
+
+
+def clear_type_encoders() -> None:
+    """
+    Forget all memoized per-type and per-model encoders. Call it after changing
+    `ENCODERS_BY_TYPE` once values have already been encoded.
+    """
+    _type_encoders.clear()
+    _model_encoders.clear()
+
+
+def _child_encoder(
+    by_alias: bool,
+    exclude_unset: bool,
+    exclude_defaults: bool,
+    exclude_none: bool,
+    sqlalchemy_safe: bool,
+) -> TypeEncoder:
+    """Encode a nested value, like a recursive `jsonable_encoder` call would."""
+
+    def encode(value: Any) -> Any:
+        value_type = type(value)
+        if value_type in _JSON_NATIVE_TYPES:
+            return value
+        encoder = _get_type_encoder(
+            value_type,
+            by_alias,
+            exclude_unset,
+            exclude_defaults,
+            exclude_none,
+            sqlalchemy_safe,
+        )
+        if encoder is not None:
+            return encoder(value)
+        return jsonable_encoder(
+            value,
+            by_alias=by_alias,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+            sqlalchemy_safe=sqlalchemy_safe,
+        )
+
+    return encode
+
+
+def _build_type_encoder(
+    type_: type,
+    by_alias: bool,
+    exclude_unset: bool,
+    exclude_defaults: bool,
+    exclude_none: bool,
+    sqlalchemy_safe: bool,
+) -> Optional[TypeEncoder]:
+    """
+    Resolve once what `jsonable_encoder` would do for values of `type_` (without
+    include/exclude or custom encoders), following the same order of checks.
+    """
+    if issubclass(type_, BaseModel):
+        if not sqlalchemy_safe:
+            return None
+        return get_model_encoder(
+            type_,
+            by_alias=by_alias,
+            exclude_unset=exclude_unset,
+            exclude_defaults=exclude_defaults,
+            exclude_none=exclude_none,
+        )
+    if dataclasses.is_dataclass(type_):
+        return None
+    if issubclass(type_, Enum):
+        return lambda obj: obj.value
+    if issubclass(type_, PurePath):
+        return str
+    if issubclass(type_, (str, int, float, type(None))):
+        return lambda obj: obj
+    if issubclass(type_, dict):
+        # Like the recursive calls for dicts, exclude_defaults isn't passed down.
+        encode_child = _child_encoder(
+            by_alias, exclude_unset, False, exclude_none, sqlalchemy_safe
+        )
+
+        def encode_dict(obj: Dict[Any, Any]) -> Dict[Any, Any]:
+            encoded_dict = {}
+            for key, value in obj.items():
+                if value is None and exclude_none:
+                    continue
+                if sqlalchemy_safe and isinstance(key, str) and key.startswith("_sa"):
+                    continue
+                encoded_dict[encode_child(key)] = encode_child(value)
+            return encoded_dict
+
+        return encode_dict
+    if issubclass(type_, (list, set, frozenset, GeneratorType, tuple, deque)):
+        encode_item = _child_encoder(
+            by_alias, exclude_unset, exclude_defaults, exclude_none, sqlalchemy_safe
+        )
+        return lambda obj: [encode_item(item) for item in obj]
+    if type_ in ENCODERS_BY_TYPE:
+        return ENCODERS_BY_TYPE[type_]
+    for encoder, classes_tuple in encoders_by_class_tuples.items():
+        if issubclass(type_, classes_tuple):
+            return encoder
+    return None
+
+ModelEncoder = Callable[[BaseModel], Dict[str, Any]]
+_model_encoders: Dict[Tuple[Type[BaseModel], bool, bool, bool, bool], ModelEncoder] = {}
+
+
+def get_model_encoder(
+    model: Type[BaseModel],
+    *,
+    by_alias: bool = True,
+    exclude_unset: bool = False,
+    exclude_defaults: bool = False,
+    exclude_none: bool = False,
+) -> Optional[ModelEncoder]:
+    """
+    Return a function that converts an instance of exactly `model` into the same
+    JSON compatible data as `jsonable_encoder(instance, ...)` with these options.
+
+    The field keys, aliases and defaults are looked up once per model and option
+    set. Field values that are already JSON compatible are passed through as is
+    (large strings are not copied or traversed), nested models use their own
+    compiled encoder and anything else is converted like `.dict()` does, then
+    passed through `jsonable_encoder`.
+
+    Returns `None` for models that can't be compiled this way: Pydantic v2 models
+    (already serialized by pydantic-core), custom root types, models with
+    `json_encoders` and models with field-level include/exclude settings.
+    """
+    key = (model, by_alias, exclude_unset, exclude_defaults, exclude_none)
+    try:
+        return _model_encoders[key]
+    except KeyError:
+        pass
+    if (
+        PYDANTIC_V2
+        or "__root__" in model.__fields__
+        or getattr(model.__config__, "json_encoders", None)  # type: ignore[attr-defined]
+        or getattr(model, "__exclude_fields__", None)
+        or getattr(model, "__include_fields__", None)
+    ):
+        return None
+
+    # field name -> (output key, has a default that exclude_defaults compares to, default)
+    specs: Dict[str, Tuple[str, bool, Any]] = {
+        name: (field.alias if by_alias else name, not field.required, field.default)
+        for name, field in model.__fields__.items()
+    }
+
+    def encode(obj: BaseModel) -> Dict[str, Any]:
+        fields_set = obj.__fields_set__ if exclude_unset else None  # type: ignore[attr-defined]
+        result: Dict[str, Any] = {}
+        for name, value in obj.__dict__.items():
+            if fields_set is not None and name not in fields_set:
+                continue
+            if exclude_none and value is None:
+                continue
+            spec = specs.get(name)
+            if spec is None:
+                # An extra field, allowed by the model config.
+                if name.startswith("_sa"):
+                    continue
+                output_key = name
+            else:
+                output_key, has_default, default = spec
+                if exclude_defaults and has_default and default == value:
+                    continue
+            value_type = type(value)
+            if value_type in _JSON_NATIVE_TYPES:
+                result[output_key] = value
+                continue
+            nested = (
+                get_model_encoder(
+                    value_type,
+                    by_alias=by_alias,
+                    exclude_unset=exclude_unset,
+                    exclude_defaults=exclude_defaults,
+                    exclude_none=exclude_none,
+                )
+                if isinstance(value, BaseModel)
+                else None
+            )
+            if nested is not None:
+                result[output_key] = nested(value)
+            else:
+                # The same two steps as for the whole model in `jsonable_encoder`:
+                # `.dict()` conversion of the value, then encoding the result.
+                value = model._get_value(  # type: ignore[attr-defined]
+                    value,
+                    to_dict=True,
+                    by_alias=by_alias,
+                    include=None,
+                    exclude=None,
+                    exclude_unset=exclude_unset,
+                    exclude_defaults=exclude_defaults,
+                    exclude_none=exclude_none,
+                )
+                result[output_key] = jsonable_encoder(
+                    value,
+                    exclude_none=exclude_none,
+                    exclude_defaults=exclude_defaults,
+                )
+        return result
+
+    _model_encoders[key] = encode
+    return encode
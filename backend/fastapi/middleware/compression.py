@@ -0,0 +1,9 @@
+from starlette.middleware.compression import (  # noqa
+    CompressionMiddleware as CompressionMiddleware,
+)
+from starlette.middleware.compression import (  # noqa
+    CompressionRule as CompressionRule,
+)
+from starlette.middleware.compression import (  # noqa
+    PrecompressedResponse as PrecompressedResponse,
+)
@@ -0,0 +1,7 @@
+from starlette.middleware.hooks import (  # noqa
+    RequestHookMiddleware as RequestHookMiddleware,
+)
+from starlette.middleware.hooks import ResponseHead as ResponseHead  # noqa
+from starlette.middleware.hooks import (  # noqa
+    ResponseHookMiddleware as ResponseHookMiddleware,
+)
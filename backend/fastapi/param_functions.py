@@ -2244,6 +2244,21 @@ def Depends(  # noqa: N802
             """
         ),
     ] = True,
+    concurrent: Annotated[
+        bool,
+        Doc(
+            """
+            Set `concurrent` to `True` on `async def` dependencies that don't
+            depend on each other's side effects, so that consecutive ones are
+            awaited concurrently instead of one after the other.
+
+            By default dependencies run one at a time, in declaration order, so
+            a dependency that raises (e.g. an authentication check) stops the
+            ones declared after it. Concurrent dependencies all run, even if
+            one of them raises.
+            """
+        ),
+    ] = False,
 ) -> Any:
     """
     Declare a FastAPI dependency.
@@ -2274,7 +2289,9 @@ def Depends(  # noqa: N802
         return commons
     ```
     """
-    return params.Depends(dependency=dependency, use_cache=use_cache)
+    return params.Depends(
+        dependency=dependency, use_cache=use_cache, concurrent=concurrent
+    )
 
 
 def Security(  # noqa: N802
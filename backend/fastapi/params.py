@@ -754,15 +754,21 @@ class File(Form):
 
 class Depends:
     def __init__(
-        self, dependency: Optional[Callable[..., Any]] = None, *, use_cache: bool = True
+        self,
+        dependency: Optional[Callable[..., Any]] = None,
+        *,
+        use_cache: bool = True,
+        concurrent: bool = False,
     ):
         self.dependency = dependency
         self.use_cache = use_cache
+        self.concurrent = concurrent
 
     def __repr__(self) -> str:
         attr = getattr(self.dependency, "__name__", type(self.dependency).__name__)
         cache = "" if self.use_cache else ", use_cache=False"
-        return f"{self.__class__.__name__}({attr}{cache})"
+        concurrent = ", concurrent=True" if self.concurrent else ""
+        return f"{self.__class__.__name__}({attr}{cache}{concurrent})"
 
 
 class Security(Depends):
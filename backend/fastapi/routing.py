@@ -1,12 +1,15 @@
 import asyncio
+import codecs
 import dataclasses
 import email.message
 import inspect
 import json
+import re
 from contextlib import AsyncExitStack
 from enum import Enum, IntEnum
 from typing import (
     Any,
+    AsyncIterator,
     Callable,
     Coroutine,
     Dict,
@@ -17,27 +20,29 @@ from typing import (
     Tuple,
     Type,
     Union,
+    cast,
 )
 
 from fastapi import params
 from fastapi._compat import (
     ModelField,
-    Undefined,
     _get_model_config,
     _model_dump,
     _normalize_errors,
+    get_list_item_validator,
     lenient_issubclass,
 )
 from fastapi.datastructures import Default, DefaultPlaceholder
 from fastapi.dependencies.models import Dependant
 from fastapi.dependencies.utils import (
+    ValidatedBody,
     get_body_field,
     get_dependant,
     get_parameterless_sub_dependant,
     get_typed_return_annotation,
     solve_dependencies,
 )
-from fastapi.encoders import jsonable_encoder
+from fastapi.encoders import get_model_encoder, jsonable_encoder
 from fastapi.exceptions import (
     FastAPIError,
     RequestValidationError,
@@ -193,6 +198,259 @@ async def run_endpoint_function(
         return await run_in_threadpool(dependant.call, **values)
 
 
+_JSON_CONTAINER_TOKEN = re.compile(r'["\[\]{}]')
+_JSON_STRING_TOKEN = re.compile(r'["\\]')
+_JSON_SCALAR_END = re.compile(r"[ \t\n\r,\]]")
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JSONArrayParser:
+    """
+    Split a JSON array into its items incrementally: `feed()` it text as it
+    arrives and it returns the items completed so far, decoded with `json`.
+    Only the incomplete item at the end is kept in memory. Malformed input
+    raises `json.JSONDecodeError`, with `pos` counted from the start of the
+    whole document.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        # Characters already dropped from the front of the buffer
+        self._offset = 0
+        self._pos = 0
+        # "open", "first" (after "["), "value" (after ","), "item",
+        # "separator" or "closed"
+        self._state = "open"
+        self._item_start = 0
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._scalar = False
+
+    def _error(self, msg: str, pos: int) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self._buffer, self._offset + pos)
+
+    def _start_item(self, pos: int) -> None:
+        self._state = "item"
+        self._item_start = pos
+        self._scan = pos + 1
+        first = self._buffer[pos]
+        self._depth = 1 if first in "[{" else 0
+        self._in_string = first == '"'
+        self._scalar = first not in '[{"'
+
+    def _item_end(self) -> int:
+        # Index just past the current item, or -1 if it is not complete yet
+        buffer = self._buffer
+        if self._scalar:
+            match = _JSON_SCALAR_END.search(buffer, self._item_start)
+            return match.start() if match else -1
+        pos = self._scan
+        while True:
+            if self._in_string:
+                match = _JSON_STRING_TOKEN.search(buffer, pos)
+                if match is None or match.end() >= len(buffer):
+                    # Keep a trailing backslash for the next chunk
+                    self._scan = match.start() if match else len(buffer)
+                    return -1
+                if match.group() == "\\":
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._depth == 0:
+                    return pos
+                continue
+            match = _JSON_CONTAINER_TOKEN.search(buffer, pos)
+            if match is None:
+                self._scan = len(buffer)
+                return -1
+            token = match.group()
+            pos = match.end()
+            if token == '"':
+                self._in_string = True
+            elif token in "[{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+
+    def _decode_item(self) -> Any:
+        try:
+            item, end = self._decoder.raw_decode(self._buffer, self._item_start)
+        except json.JSONDecodeError as e:
+            raise self._error(e.msg, e.pos) from None
+        self._pos = end
+        self._state = "separator"
+        return item
+
+    def feed(self, text: str) -> List[Any]:
+        self._buffer += text
+        items: List[Any] = []
+        while True:
+            if self._state == "item":
+                if self._item_end() < 0:
+                    break
+                items.append(self._decode_item())
+                continue
+            pos = _JSON_WHITESPACE.match(self._buffer, self._pos).end()  # type: ignore[union-attr]
+            self._pos = pos
+            if pos == len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if self._state == "open":
+                if char != "[":
+                    raise self._error("Expecting '['", pos)
+                self._state = "first"
+                self._pos = pos + 1
+            elif self._state == "separator":
+                if char == ",":
+                    self._state = "value"
+                elif char == "]":
+                    self._state = "closed"
+                else:
+                    raise self._error("Expecting ',' delimiter", pos)
+                self._pos = pos + 1
+            elif self._state == "closed":
+                raise self._error("Extra data", pos)
+            elif char == "]":
+                if self._state == "value":
+                    raise self._error("Expecting value", pos)
+                self._state = "closed"
+                self._pos = pos + 1
+            else:
+                self._start_item(pos)
+                # Most items are already complete: decode them directly and
+                # only scan the one cut off at the end of the buffer
+                try:
+                    item, end = self._decoder.raw_decode(self._buffer, pos)
+                except json.JSONDecodeError:
+                    continue
+                # A number may continue in the next chunk ("2." + "5"), so
+                # scalars only count once a terminator follows them
+                if not self._scalar or _JSON_SCALAR_END.match(self._buffer, end):
+                    items.append(item)
+                    self._pos = end
+                    self._state = "separator"
+        # Drop what was consumed, keeping only the incomplete item
+        keep = self._item_start if self._state == "item" else self._pos
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._offset += keep
+            self._pos -= keep
+            self._scan -= keep
+            self._item_start -= keep
+        return items
+
+    def close(self) -> List[Any]:
+        """Finish the document, returning the last item if it was a number etc."""
+        items: List[Any] = []
+        if self._state == "item":
+            # A trailing scalar, or an incomplete item that fails to decode
+            items.append(self._decode_item())
+        if self._state == "closed":
+            return items
+        if self._state == "separator":
+            raise self._error("Expecting ',' delimiter", len(self._buffer))
+        raise self._error("Expecting value", len(self._buffer))
+
+
+def _check_content_length(request: Request, max_body_size: Optional[int]) -> None:
+    if max_body_size is None:
+        return
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_body_size:
+            raise HTTPException(status_code=413)
+
+
+async def _iter_body(
+    request: Request, max_body_size: Optional[int]
+) -> AsyncIterator[bytes]:
+    """Iterate over the request body, enforcing `max_body_size` as bytes arrive."""
+    _check_content_length(request, max_body_size)
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if max_body_size is not None and received > max_body_size:
+            raise HTTPException(status_code=413)
+        yield chunk
+
+
+async def _read_body(request: Request, max_body_size: Optional[int]) -> bytes:
+    if max_body_size is None:
+        return await request.body()
+    if not hasattr(request, "_body"):
+        chunks = [chunk async for chunk in _iter_body(request, max_body_size)]
+        request._body = b"".join(chunks)
+    return request._body
+
+
+async def _read_json_list_body(
+    request: Request,
+    field: ModelField,
+    validate_item: Callable[[Any, Tuple[Union[str, int], ...]], Tuple[Any, Any]],
+    max_body_size: Optional[int],
+) -> Any:
+    """
+    Read a JSON body for a list field, parsing and validating it item by item
+    as it streams in, so neither the raw body nor the decoded JSON has to be
+    held in memory at once.
+
+    Bodies that are not a UTF-8 JSON array (e.g. `null` or an object) are read
+    and decoded whole as usual, and validated later by `solve_dependencies()`.
+    """
+    chunks = _iter_body(request, max_body_size)
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= 4 and head.lstrip(b" \t\n\r"):
+            break
+    else:
+        # Small body: nothing to stream
+        request._body = head
+        return await request.json() if head else None
+    if not head.lstrip(b" \t\n\r").startswith(b"[") or json.detect_encoding(
+        head
+    ) not in ("utf-8", "utf-8-sig"):
+        request._body = head + b"".join([chunk async for chunk in chunks])
+        return await request.json()
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parser = _JSONArrayParser()
+    values: List[Any] = []
+    errors: List[Any] = []
+    index = 0
+
+    def validate(items: List[Any]) -> None:
+        nonlocal index
+        for item in items:
+            value, errors_ = validate_item(item, ("body", index))
+            index += 1
+            if errors_:
+                errors.append(errors_)
+                # The value won't be used, stop keeping validated items
+                values.clear()
+            elif not errors:
+                values.append(value)
+
+    validate(parser.feed(decoder.decode(head)))
+    async for chunk in chunks:
+        validate(parser.feed(decoder.decode(chunk)))
+    validate(parser.feed(decoder.decode(b"", final=True)))
+    validate(parser.close())
+    return ValidatedBody(field, values, errors)
+
+
+def _reads_request(dependant: Dependant) -> bool:
+    # Whether any dependency could read the request body itself
+    if dependant.request_param_name or dependant.http_connection_param_name:
+        return True
+    return any(_reads_request(sub) for sub in dependant.dependencies)
+
+
 def get_request_handler(
     dependant: Dependant,
     body_field: Optional[ModelField] = None,
@@ -206,42 +464,66 @@ def get_request_handler(
     response_model_exclude_defaults: bool = False,
     response_model_exclude_none: bool = False,
     dependency_overrides_provider: Optional[Any] = None,
+    trusted_response_model: Optional[Type[BaseModel]] = None,
+    max_body_size: Optional[int] = None,
 ) -> Callable[[Request], Coroutine[Any, Any, Response]]:
     assert dependant.call is not None, "dependant.call must be a function"
     is_coroutine = asyncio.iscoroutinefunction(dependant.call)
     is_body_form = body_field and isinstance(body_field.field_info, params.Form)
+    # A JSON list body is validated item by item while it streams in, unless
+    # something else may need to read the body after it was consumed
+    list_item_validator = None
+    if body_field and not is_body_form and not _reads_request(dependant):
+        list_item_validator = get_list_item_validator(body_field)
     if isinstance(response_class, DefaultPlaceholder):
         actual_response_class: Type[Response] = response_class.value
     else:
         actual_response_class = response_class
+    # Instances of exactly the trusted response model skip re-validation and are
+    # encoded in a single pass. Anything else takes the regular path below.
+    trusted_model_encoder = None
+    if (
+        trusted_response_model is not None
+        and response_model_include is None
+        and response_model_exclude is None
+    ):
+        trusted_model_encoder = get_model_encoder(
+            trusted_response_model,
+            by_alias=response_model_by_alias,
+            exclude_unset=response_model_exclude_unset,
+            exclude_defaults=response_model_exclude_defaults,
+            exclude_none=response_model_exclude_none,
+        )
 
     async def app(request: Request) -> Response:
         try:
             body: Any = None
             if body_field:
                 if is_body_form:
+                    _check_content_length(request, max_body_size)
                     body = await request.form()
                     stack = request.scope.get("fastapi_astack")
                     assert isinstance(stack, AsyncExitStack)
                     stack.push_async_callback(body.close)
                 else:
-                    body_bytes = await request.body()
-                    if body_bytes:
-                        json_body: Any = Undefined
-                        content_type_value = request.headers.get("content-type")
-                        if not content_type_value:
-                            json_body = await request.json()
-                        else:
-                            message = email.message.Message()
-                            message["content-type"] = content_type_value
-                            if message.get_content_maintype() == "application":
-                                subtype = message.get_content_subtype()
-                                if subtype == "json" or subtype.endswith("+json"):
-                                    json_body = await request.json()
-                        if json_body != Undefined:
-                            body = json_body
-                        else:
-                            body = body_bytes
+                    is_json = True
+                    content_type_value = request.headers.get("content-type")
+                    if content_type_value:
+                        message = email.message.Message()
+                        message["content-type"] = content_type_value
+                        subtype = message.get_content_subtype()
+                        is_json = message.get_content_maintype() == "application"
+                        is_json = is_json and (
+                            subtype == "json" or subtype.endswith("+json")
+                        )
+                    if is_json and list_item_validator is not None:
+                        body = await _read_json_list_body(
+                            request, body_field, list_item_validator, max_body_size
+                        )
+                    else:
+                        body_bytes = await _read_body(request, max_body_size)
+                        if body_bytes:
+                            body = await request.json() if is_json else body_bytes
         except json.JSONDecodeError as e:
             raise RequestValidationError(
                 [
@@ -269,6 +551,9 @@ def get_request_handler(
         )
         values, errors, background_tasks, sub_response, _ = solved_result
         if errors:
+            if isinstance(body, ValidatedBody):
+                # Streamed bodies are not kept, only their validated items
+                body = None
             raise RequestValidationError(_normalize_errors(errors), body=body)
         else:
             raw_response = await run_endpoint_function(
@@ -289,17 +574,23 @@ def get_request_handler(
                 response_args["status_code"] = current_status_code
             if sub_response.status_code:
                 response_args["status_code"] = sub_response.status_code
-            content = await serialize_response(
-                field=response_field,
-                response_content=raw_response,
-                include=response_model_include,
-                exclude=response_model_exclude,
-                by_alias=response_model_by_alias,
-                exclude_unset=response_model_exclude_unset,
-                exclude_defaults=response_model_exclude_defaults,
-                exclude_none=response_model_exclude_none,
-                is_coroutine=is_coroutine,
-            )
+            if (
+                trusted_model_encoder is not None
+                and type(raw_response) is trusted_response_model
+            ):
+                content = trusted_model_encoder(raw_response)
+            else:
+                content = await serialize_response(
+                    field=response_field,
+                    response_content=raw_response,
+                    include=response_model_include,
+                    exclude=response_model_exclude,
+                    by_alias=response_model_by_alias,
+                    exclude_unset=response_model_exclude_unset,
+                    exclude_defaults=response_model_exclude_defaults,
+                    exclude_none=response_model_exclude_none,
+                    is_coroutine=is_coroutine,
+                )
             response = actual_response_class(content, **response_args)
             if not is_body_allowed_for_status_code(response.status_code):
                 response.body = b""
@@ -397,6 +688,8 @@ class APIRoute(routing.Route):
         generate_unique_id_function: Union[
             Callable[["APIRoute"], str], DefaultPlaceholder
         ] = Default(generate_unique_id),
+        trust_response_model: Union[bool, DefaultPlaceholder] = Default(False),
+        max_body_size: Union[Optional[int], DefaultPlaceholder] = Default(None),
     ) -> None:
         self.path = path
         self.endpoint = endpoint
@@ -423,6 +716,8 @@ class APIRoute(routing.Route):
         self.callbacks = callbacks
         self.openapi_extra = openapi_extra
         self.generate_unique_id_function = generate_unique_id_function
+        self.trust_response_model = trust_response_model
+        self.max_body_size = max_body_size
         self.tags = tags or []
         self.responses = responses or {}
         self.name = get_name(endpoint) if name is None else name
@@ -496,7 +791,22 @@ class APIRoute(routing.Route):
         self.body_field = get_body_field(dependant=self.dependant, name=self.unique_id)
         self.app = request_response(self.get_route_handler())
 
+    def get_trusted_response_model(self) -> Optional[Type[BaseModel]]:
+        """
+        The response model whose instances can be serialized without being
+        validated again, when `trust_response_model` is enabled.
+        """
+        trust = self.trust_response_model
+        if isinstance(trust, DefaultPlaceholder):
+            trust = trust.value
+        if not trust or not lenient_issubclass(self.response_model, BaseModel):
+            return None
+        return cast(Type[BaseModel], self.response_model)
+
     def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        max_body_size = self.max_body_size
+        if isinstance(max_body_size, DefaultPlaceholder):
+            max_body_size = max_body_size.value
         return get_request_handler(
             dependant=self.dependant,
             body_field=self.body_field,
@@ -510,6 +820,8 @@ class APIRoute(routing.Route):
             response_model_exclude_defaults=self.response_model_exclude_defaults,
             response_model_exclude_none=self.response_model_exclude_none,
             dependency_overrides_provider=self.dependency_overrides_provider,
+            trusted_response_model=self.get_trusted_response_model(),
+            max_body_size=max_body_size,
         )
 
     def matches(self, scope: Scope) -> Tuple[Match, Scope]:
@@ -760,6 +1072,30 @@ class APIRouter(routing.Router):
                 """
             ),
         ] = Default(generate_unique_id),
+        trust_response_model: Annotated[
+            bool,
+            Doc(
+                """
+                Trust that an endpoint returning an instance of exactly its
+                `response_model` class returns valid data: skip validating it
+                again and serialize it in a single pass.
+
+                Any other return value (dicts, subclasses, other types) is still
+                validated and serialized as usual.
+                """
+            ),
+        ] = Default(False),
+        max_body_size: Annotated[
+            Optional[int],
+            Doc(
+                """
+                The maximum size in bytes of a request body read by the *path
+                operations* in this router. Larger bodies are rejected with a
+                413 status code as soon as the limit is exceeded, without
+                reading the rest. `None` means no limit.
+                """
+            ),
+        ] = Default(None),
     ) -> None:
         super().__init__(
             routes=routes,
@@ -785,6 +1121,8 @@ class APIRouter(routing.Router):
         self.route_class = route_class
         self.default_response_class = default_response_class
         self.generate_unique_id_function = generate_unique_id_function
+        self.trust_response_model = trust_response_model
+        self.max_body_size = max_body_size
 
     def route(
         self,
@@ -838,6 +1176,8 @@ class APIRouter(routing.Router):
         generate_unique_id_function: Union[
             Callable[[APIRoute], str], DefaultPlaceholder
         ] = Default(generate_unique_id),
+        trust_response_model: Union[bool, DefaultPlaceholder] = Default(False),
+        max_body_size: Union[Optional[int], DefaultPlaceholder] = Default(None),
     ) -> None:
         route_class = route_class_override or self.route_class
         responses = responses or {}
@@ -857,6 +1197,12 @@ class APIRouter(routing.Router):
         current_generate_unique_id = get_value_or_default(
             generate_unique_id_function, self.generate_unique_id_function
         )
+        current_trust_response_model = get_value_or_default(
+            trust_response_model, self.trust_response_model
+        )
+        current_max_body_size = get_value_or_default(
+            max_body_size, self.max_body_size
+        )
         route = route_class(
             self.prefix + path,
             endpoint=endpoint,
@@ -884,6 +1230,8 @@ class APIRouter(routing.Router):
             callbacks=current_callbacks,
             openapi_extra=openapi_extra,
             generate_unique_id_function=current_generate_unique_id,
+            trust_response_model=current_trust_response_model,
+            max_body_size=current_max_body_size,
         )
         self.routes.append(route)
 
@@ -916,6 +1264,8 @@ class APIRouter(routing.Router):
         generate_unique_id_function: Callable[[APIRoute], str] = Default(
             generate_unique_id
         ),
+        trust_response_model: Union[bool, DefaultPlaceholder] = Default(False),
+        max_body_size: Union[Optional[int], DefaultPlaceholder] = Default(None),
     ) -> Callable[[DecoratedCallable], DecoratedCallable]:
         def decorator(func: DecoratedCallable) -> DecoratedCallable:
             self.add_api_route(
@@ -944,6 +1294,8 @@ class APIRouter(routing.Router):
                 callbacks=callbacks,
                 openapi_extra=openapi_extra,
                 generate_unique_id_function=generate_unique_id_function,
+                trust_response_model=trust_response_model,
+                max_body_size=max_body_size,
             )
             return func
 
@@ -1226,6 +1578,16 @@ class APIRouter(routing.Router):
                     generate_unique_id_function,
                     self.generate_unique_id_function,
                 )
+                current_trust_response_model = get_value_or_default(
+                    route.trust_response_model,
+                    router.trust_response_model,
+                    self.trust_response_model,
+                )
+                current_max_body_size = get_value_or_default(
+                    route.max_body_size,
+                    router.max_body_size,
+                    self.max_body_size,
+                )
                 self.add_api_route(
                     prefix + route.path,
                     route.endpoint,
@@ -1255,6 +1617,8 @@ class APIRouter(routing.Router):
                     callbacks=current_callbacks,
                     openapi_extra=route.openapi_extra,
                     generate_unique_id_function=current_generate_unique_id,
+                    trust_response_model=current_trust_response_model,
+                    max_body_size=current_max_body_size,
                 )
             elif isinstance(route, routing.Route):
                 methods = list(route.methods or [])
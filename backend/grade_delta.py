@@ -0,0 +1,183 @@
+"""
+批改结果的版本与增量
+批改进行中（markup_status未完成）时文档逐题增长，客户端每次刷新都重新下载全文。
+服务端为每条记录保留最近几个版本，客户端带上已有的版本号时只返回JSON Patch（RFC 6902）格式的增量
+"""
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from grade_stats import content_fingerprint
+from shared_cache import ValueCodec
+
+# 版本号取内容指纹的前缀，同样的内容总是同一个版本号
+VERSION_LENGTH = 16
+
+PatchOperation = Dict[str, Any]
+
+
+def version_of(grade_data: str) -> str:
+    return content_fingerprint(grade_data)[:VERSION_LENGTH]
+
+
+def _pointer(path: str, token: object) -> str:
+    """拼接JSON Pointer，按RFC 6901转义~和/"""
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+
+def _same(old: Any, new: Any) -> bool:
+    # True == 1 成立，类型不同时也要生成替换
+    return type(old) is type(new) and old == new
+
+
+def _diff(old: Any, new: Any, path: str, ops: List[PatchOperation]) -> None:
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": _pointer(path, key)})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": _pointer(path, key), "value": value})
+            elif not _same(old[key], value):
+                _diff(old[key], value, _pointer(path, key), ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for i in range(common):
+            if not _same(old[i], new[i]):
+                _diff(old[i], new[i], _pointer(path, i), ops)
+        # 先从尾部删除多余元素，再按顺序追加新元素，下标始终有效
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": _pointer(path, i)})
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": _pointer(path, i), "value": new[i]})
+    else:
+        ops.append({"op": "replace", "path": path, "value": new})
+
+
+def diff_documents(old: Any, new: Any) -> List[PatchOperation]:
+    """
+    生成把old变成new的JSON Patch操作列表
+    新增的题目、步骤表现为add，修改的步骤字段表现为replace，内容相同时为空列表
+    """
+    ops: List[PatchOperation] = []
+    if not _same(old, new):
+        _diff(old, new, "", ops)
+    return ops
+
+
+class GradeVersionStore:
+    """
+    每条记录保留最近max_versions个版本的原文，记录数超过上限或总大小超过max_bytes时淘汰最久未访问的记录
+    原文经codec编码保存（如压缩），大小按编码后的字节数计算
+    增量的JSON比全文还大时返回全文
+    """
+
+    def __init__(
+        self,
+        max_records: int = 500,
+        max_versions: int = 4,
+        max_bytes: int = 32 * 1024 * 1024,
+        codec: Optional[ValueCodec] = None,
+    ) -> None:
+        self.max_records = max_records
+        self.max_versions = max_versions
+        self.max_bytes = max_bytes
+        self.codec = codec or ValueCodec()
+        # (环境, 索引值) -> 版本号 -> (编码后的原文, 字节数)，按新旧排序
+        self._records: "OrderedDict[Tuple[str, str], OrderedDict[str, Tuple[object, int]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"full": 0, "delta": 0, "unchanged": 0, "unknown_version": 0, "bytes_saved": 0}
+
+    def record(self, environment: str, index_value: str, grade_data: str) -> str:
+        """保存一个版本并返回其版本号"""
+        version = version_of(grade_data)
+        key = (environment, index_value)
+        with self._lock:
+            versions = self._records.get(key)
+            if versions is not None and version in versions:
+                # 内容未变，不必重新编码
+                self._records.move_to_end(key)
+                versions.move_to_end(version)
+                return version
+        # 编码（压缩）在锁外进行
+        stored = self.codec.encode(grade_data)
+        size = self.codec.size(stored)
+        with self._lock:
+            versions = self._records.get(key)
+            if versions is None:
+                versions = self._records[key] = OrderedDict()
+            else:
+                self._records.move_to_end(key)
+            self._release(versions.pop(version, None))
+            versions[version] = (stored, size)
+            self._bytes += size
+            while len(versions) > self.max_versions:
+                self._release(versions.popitem(last=False)[1])
+            while self._records and (len(self._records) > self.max_records or self._bytes > self.max_bytes):
+                for entry in self._records.popitem(last=False)[1].values():
+                    self._release(entry)
+        return version
+
+    def _release(self, entry: Optional[Tuple[object, int]]) -> None:
+        # 调用方持有self._lock
+        if entry is not None:
+            self._bytes -= entry[1]
+            self.codec.release(entry[0])
+
+    def _get(self, environment: str, index_value: str, version: str) -> Optional[str]:
+        with self._lock:
+            versions = self._records.get((environment, index_value))
+            entry = versions.get(version) if versions else None
+            # 在锁内解码，避免条目同时被淘汰、释放
+            return self.codec.decode(entry[0]) if entry is not None else None
+
+    def delta(
+        self,
+        environment: str,
+        index_value: str,
+        grade_data: str,
+        since: Optional[str],
+    ) -> Tuple[str, Optional[List[PatchOperation]]]:
+        """
+        记录当前版本，并计算从since到当前版本的增量
+        返回 (当前版本号, 增量)；没有since、since已被淘汰或增量不划算时增量为None，调用方返回全文
+        """
+        version = self.record(environment, index_value, grade_data)
+        if not since:
+            self._count("full")
+            return version, None
+        if since == version:
+            self._count("unchanged", len(grade_data.encode("utf-8")))
+            return version, []
+        base = self._get(environment, index_value, since)
+        if base is None:
+            self._count("unknown_version")
+            return version, None
+        try:
+            ops = diff_documents(json.loads(base), json.loads(grade_data))
+        except (TypeError, ValueError):
+            self._count("full")
+            return version, None
+        full_size = len(grade_data.encode("utf-8"))
+        delta_size = len(json.dumps(ops, ensure_ascii=False).encode("utf-8"))
+        if delta_size >= full_size:
+            self._count("full")
+            return version, None
+        self._count("delta", full_size - delta_size)
+        return version, ops
+
+    def _count(self, outcome: str, saved: int = 0) -> None:
+        with self._lock:
+            self._counters[outcome] += 1
+            self._counters["bytes_saved"] += saved
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._counters,
+                "records": len(self._records),
+                "versions": sum(len(versions) for versions in self._records.values()),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,253 @@
+"""
+批改结果倒排索引
+对本进程见过的批改结果按题目建立倒排表：题号、题型、是否答对，以及作答和解析文本的字符二元组，
+"第3题答错且解析提到'不等式'的学生"这类查询在内存中求交集即可，不必再逐份下载JSON
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from grade_stats import content_fingerprint
+
+# 文本检索使用的n元组长度
+NGRAM_SIZE = 2
+# 每个词项在词项集合、词项元组和倒排表中的大致内存开销（字节，实测约240）
+TERM_BYTES = 240
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryTooShortError(ValueError):
+    """文本查询短于n元组长度，无法走索引"""
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub("", text).lower()
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> Set[str]:
+    text = normalize_text(text)
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def question_correctness(question: dict) -> Optional[bool]:
+    """一道题的对错：任一步骤错误即为错，全部步骤正确才为对，否则未判定"""
+    results = [step.get("is_correct") for step in question.get("answer_steps") or [] if isinstance(step, dict)]
+    if any(result is False for result in results):
+        return False
+    if results and all(result is True for result in results):
+        return True
+    return None
+
+
+def question_texts(question: dict) -> Tuple[str, ...]:
+    """一道题各步骤作答和解析的规范化文本，每个字段一项，用于校验二元组命中的结果"""
+    return tuple(
+        normalize_text(step[field])
+        for step in question.get("answer_steps") or [] if isinstance(step, dict)
+        for field in ("student_answer", "analysis")
+        if isinstance(step.get(field), str)
+    )
+
+
+def question_terms(question: dict) -> Set[Tuple[str, Any]]:
+    """一道题在倒排表中的全部词项"""
+    terms: Set[Tuple[str, Any]] = {
+        ("question_number", str(question.get("question_number", "")).strip()),
+        ("question_type", str(question.get("question_type") or "unknown")),
+    }
+    correct = question_correctness(question)
+    if correct is not None:
+        terms.add(("is_correct", correct))
+    for step in question.get("answer_steps") or []:
+        if not isinstance(step, dict):
+            continue
+        for field in ("student_answer", "analysis"):
+            value = step.get(field)
+            if isinstance(value, str):
+                terms.update(("gram", gram) for gram in ngrams(value))
+    return terms
+
+
+class GradeIndex:
+    """
+    单个环境的倒排索引，倒排单元是"某个学生的某道题"，
+    因此题号、对错和文本条件落在同一道题上才算命中
+    二元组只用于筛选候选，文本条件最终按子串在同一个字段中校验
+    文档数或估算内存超过上限时按最近更新淘汰最旧的文档
+    """
+
+    def __init__(self, max_documents: int = 5000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 词项 -> 题目单元ID集合
+        self._postings: Dict[Tuple[str, Any], Set[int]] = {}
+        # 题目单元ID -> 索引值
+        self._unit_owner: Dict[int, str] = {}
+        # 题目单元ID -> 各字段的规范化文本
+        self._unit_texts: Dict[int, Tuple[str, ...]] = {}
+        # 索引值 -> (内容指纹, [(题目单元ID, 词项集合)], 估算字节数)
+        self._documents: "OrderedDict[str, Tuple[str, List[Tuple[int, Set[Tuple[str, Any]]]], int]]" = OrderedDict()
+        self._bytes = 0
+        self._next_unit = 0
+
+    def add(self, index_value: str, grade_data: str) -> bool:
+        """
+        索引一份批改结果，同一索引值的旧内容会被替换；内容未变时直接返回
+        返回是否（重新）建立了索引
+        """
+        fingerprint = content_fingerprint(grade_data)
+        with self._lock:
+            existing = self._documents.get(index_value)
+            if existing is not None and existing[0] == fingerprint:
+                self._documents.move_to_end(index_value)
+                return False
+        try:
+            document = json.loads(grade_data)
+        except (TypeError, ValueError):
+            return False
+        pages = document if isinstance(document, list) else [document]
+        questions = [
+            question
+            for page in pages if isinstance(page, dict)
+            for question in page.get("questions_info") or [] if isinstance(question, dict)
+        ]
+        # 词项在锁外计算，锁内只更新倒排表
+        question_term_sets = [(question_terms(question), question_texts(question)) for question in questions]
+        size = sum(
+            TERM_BYTES * len(terms) + sum(len(text.encode("utf-8")) for text in texts)
+            for terms, texts in question_term_sets
+        )
+
+        with self._lock:
+            self._remove(index_value)
+            if size > self.max_bytes:
+                # 单份文档超过上限时不索引，旧内容也已移除
+                return False
+            units = []
+            for terms, texts in question_term_sets:
+                unit = self._next_unit
+                self._next_unit += 1
+                self._unit_owner[unit] = index_value
+                self._unit_texts[unit] = texts
+                for term in terms:
+                    self._postings.setdefault(term, set()).add(unit)
+                units.append((unit, terms))
+            self._documents[index_value] = (fingerprint, units, size)
+            self._bytes += size
+            while len(self._documents) > self.max_documents or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._documents)))
+        return True
+
+    def _remove(self, index_value: str) -> None:
+        # 调用方持有self._lock
+        existing = self._documents.pop(index_value, None)
+        if existing is None:
+            return
+        self._bytes -= existing[2]
+        for unit, terms in existing[1]:
+            self._unit_owner.pop(unit, None)
+            self._unit_texts.pop(unit, None)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                postings.discard(unit)
+                if not postings:
+                    del self._postings[term]
+
+    def search(
+        self,
+        question_number: Optional[str] = None,
+        question_type: Optional[str] = None,
+        is_correct: Optional[bool] = None,
+        text: Optional[str] = None,
+    ) -> List[str]:
+        """
+        返回至少有一道题同时满足全部条件的索引值，按索引值排序
+        text先按字符二元组筛选候选，再校验它（忽略空白和大小写）是同一道题某个作答或解析字段的子串
+        """
+        terms: List[Tuple[str, Any]] = []
+        needle = normalize_text(text) if text else ""
+        if question_number is not None:
+            terms.append(("question_number", question_number.strip()))
+        if question_type is not None:
+            terms.append(("question_type", question_type))
+        if is_correct is not None:
+            terms.append(("is_correct", is_correct))
+        if text:
+            grams = ngrams(text)
+            if not grams:
+                raise QueryTooShortError(text)
+            terms.extend(("gram", gram) for gram in grams)
+
+        with self._lock:
+            if not terms:
+                return sorted(self._documents, key=_index_sort_key)
+            posting_lists = [self._postings.get(term, set()) for term in terms]
+            # 从最短的倒排表开始求交集
+            posting_lists.sort(key=len)
+            units = set(posting_lists[0])
+            for postings in posting_lists[1:]:
+                if not units:
+                    break
+                units &= postings
+            if needle:
+                # 二元组可能顺序不同或分散在不同字段，逐个候选按子串校验
+                units = {unit for unit in units if any(needle in field for field in self._unit_texts[unit])}
+            owners = {self._unit_owner[unit] for unit in units}
+        return sorted(owners, key=_index_sort_key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "questions": len(self._unit_owner),
+                "terms": len(self._postings),
+                "bytes": self._bytes,
+            }
+
+
+def _index_sort_key(index_value: str) -> Tuple[int, float, str]:
+    """数字索引值按数值排序，其余按字符串排序"""
+    try:
+        return 0, float(index_value), index_value
+    except ValueError:
+        return 1, 0.0, index_value
+
+
+class GradeIndexRegistry:
+    """每个环境一个索引"""
+
+    def __init__(self, max_documents: int = 5000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._indexes: Dict[str, GradeIndex] = {}
+        self._lock = threading.Lock()
+
+    def get(self, environment: str) -> GradeIndex:
+        with self._lock:
+            index = self._indexes.get(environment)
+            if index is None:
+                index = self._indexes[environment] = GradeIndex(self.max_documents, self.max_bytes)
+            return index
+
+    def add_many(self, environment: str, documents: Iterable[Tuple[str, str]]) -> int:
+        index = self.get(environment)
+        return sum(index.add(index_value, grade_data) for index_value, grade_data in documents if index_value)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            indexes = dict(self._indexes)
+        return {environment: index.stats() for environment, index in indexes.items()}
+
+
+def timed_search(index: GradeIndex, **conditions) -> Tuple[List[str], float]:
+    """执行查询并返回 (索引值列表, 耗时毫秒)"""
+    start = time.perf_counter()
+    result = index.search(**conditions)
+    return result, round((time.perf_counter() - start) * 1000, 3)
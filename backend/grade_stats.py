@@ -0,0 +1,225 @@
+"""
+班级批改统计聚合
+把单份批改结果JSON折叠成按题目/题型计数的部分聚合，再合并成全班统计表
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# 单题计数器各列的下标：[学生数, 步骤数, 正确, 错误, 未判定, 模型不一致]
+_STUDENTS, _STEPS, _CORRECT, _INCORRECT, _UNKNOWN, _INCONSISTENT = range(6)
+_COUNTER_WIDTH = 6
+
+
+def _new_counters() -> List[int]:
+    return [0] * _COUNTER_WIDTH
+
+
+class RecordStats:
+    """
+    单条记录（一名学生）的部分聚合
+    只保存计数，不保留题干/作答文本，缓存成本只有几百字节
+    """
+
+    __slots__ = ("questions", "question_types", "pages", "markup_status")
+
+    def __init__(self) -> None:
+        # question_number -> 计数器列表
+        self.questions: Dict[str, List[int]] = {}
+        # question_number -> question_type（以首次出现的为准）
+        self.question_types: Dict[str, str] = {}
+        self.pages = 0
+        # markup_status -> 页数
+        self.markup_status: Dict[str, int] = {}
+
+
+def summarize_grade_document(document: Any) -> RecordStats:
+    """
+    把一份批改结果折叠成RecordStats
+
+    批改结果是页面列表（也兼容单个页面对象），每页包含questions_info，
+    每道题的answer_steps里带is_correct和可选的models_consistent
+    """
+    stats = RecordStats()
+    pages = document if isinstance(document, list) else [document]
+
+    for page in pages:
+        if not isinstance(page, dict):
+            continue
+        stats.pages += 1
+        status = str(page.get("markup_status") or "unknown")
+        stats.markup_status[status] = stats.markup_status.get(status, 0) + 1
+
+        for question in page.get("questions_info") or []:
+            if not isinstance(question, dict):
+                continue
+            number = str(question.get("question_number", "")).strip() or "?"
+            counters = stats.questions.get(number)
+            if counters is None:
+                counters = stats.questions[number] = _new_counters()
+                counters[_STUDENTS] = 1
+                stats.question_types[number] = str(question.get("question_type") or "unknown")
+
+            for step in question.get("answer_steps") or []:
+                if not isinstance(step, dict):
+                    continue
+                counters[_STEPS] += 1
+                is_correct = step.get("is_correct")
+                if is_correct is True:
+                    counters[_CORRECT] += 1
+                elif is_correct is False:
+                    counters[_INCORRECT] += 1
+                else:
+                    counters[_UNKNOWN] += 1
+                if step.get("models_consistent") is False:
+                    counters[_INCONSISTENT] += 1
+
+    return stats
+
+
+def summarize_grade_data(grade_data: str) -> RecordStats:
+    """解析批改结果JSON字符串并折叠成RecordStats"""
+    return summarize_grade_document(json.loads(grade_data))
+
+
+class GradeStatsAccumulator:
+    """
+    增量合并多条记录的部分聚合
+    每次merge后即可丢弃原始文档，内存占用只和题目数量相关
+    """
+
+    def __init__(self) -> None:
+        self.questions: Dict[str, List[int]] = {}
+        self.question_types: Dict[str, str] = {}
+        self.markup_status: Dict[str, int] = {}
+        self.records = 0
+        self.pages = 0
+        self.failed: List[Dict[str, str]] = []
+
+    def merge(self, stats: RecordStats) -> None:
+        self.records += 1
+        self.pages += stats.pages
+        for status, count in stats.markup_status.items():
+            self.markup_status[status] = self.markup_status.get(status, 0) + count
+        for number, counters in stats.questions.items():
+            total = self.questions.get(number)
+            if total is None:
+                total = self.questions[number] = _new_counters()
+                self.question_types[number] = stats.question_types.get(number, "unknown")
+            for i in range(_COUNTER_WIDTH):
+                total[i] += counters[i]
+
+    def add_failure(self, index_value: str, reason: str) -> None:
+        self.failed.append({"index_value": index_value, "reason": reason})
+
+    def to_table(self) -> Dict[str, Any]:
+        """
+        生成紧凑的统计表
+        questions/question_types使用columns + rows的表格形式，避免每行重复字段名
+        """
+        question_rows = []
+        type_totals: Dict[str, List[int]] = {}
+        for number in sorted(self.questions, key=_question_sort_key):
+            counters = self.questions[number]
+            question_type = self.question_types.get(number, "unknown")
+            question_rows.append([
+                number,
+                question_type,
+                counters[_STUDENTS],
+                counters[_STEPS],
+                counters[_CORRECT],
+                counters[_INCORRECT],
+                counters[_UNKNOWN],
+                counters[_INCONSISTENT],
+                _error_rate(counters),
+            ])
+            type_total = type_totals.setdefault(question_type, _new_counters())
+            for i in range(_COUNTER_WIDTH):
+                type_total[i] += counters[i]
+
+        type_rows = [
+            [
+                question_type,
+                counters[_STEPS],
+                counters[_CORRECT],
+                counters[_INCORRECT],
+                counters[_UNKNOWN],
+                counters[_INCONSISTENT],
+                _error_rate(counters),
+            ]
+            for question_type, counters in sorted(type_totals.items())
+        ]
+
+        return {
+            "records": self.records,
+            "pages": self.pages,
+            "markup_status": self.markup_status,
+            "questions": {
+                "columns": [
+                    "question_number", "question_type", "students", "steps",
+                    "correct", "incorrect", "unknown", "inconsistent", "error_rate",
+                ],
+                "rows": question_rows,
+            },
+            "question_types": {
+                "columns": [
+                    "question_type", "steps", "correct", "incorrect",
+                    "unknown", "inconsistent", "error_rate",
+                ],
+                "rows": type_rows,
+            },
+            "failed": self.failed,
+        }
+
+
+def _error_rate(counters: List[int]) -> Optional[float]:
+    judged = counters[_CORRECT] + counters[_INCORRECT]
+    if not judged:
+        return None
+    return round(counters[_INCORRECT] / judged, 4)
+
+
+def _question_sort_key(number: str) -> Tuple[int, Any]:
+    # 题号通常是数字字符串，按数值排序；非数字题号排在后面
+    try:
+        return (0, float(number))
+    except ValueError:
+        return (1, number)
+
+
+def content_fingerprint(content: str) -> str:
+    """参考字段内容的指纹，用作部分聚合缓存键的一部分"""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class RecordStatsCache:
+    """
+    按记录缓存部分聚合（线程安全的LRU）
+    键里包含数据来源（json链接或参考字段指纹），来源变化后自动失效
+    """
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], RecordStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[RecordStats]:
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is not None:
+                self._entries.move_to_end(key)
+            return stats
+
+    def put(self, key: Tuple[str, str, str], stats: RecordStats) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = stats
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,159 @@
+"""
+对冲请求（hedged requests）
+首个请求超过自适应阈值（近期延迟的分位数）仍未返回时，再发出一个相同请求，
+取先成功返回的结果并取消另一个；对冲次数受预算限制，避免放大上游压力
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class HedgeCancelled(Exception):
+    """对冲中落败的请求被取消"""
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class HedgedCaller:
+    """
+    以线程池执行可取消的调用
+    被调函数接收一个threading.Event，在读取响应的间隙检查它以尽早放弃落败的请求
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float = 5.0,
+        max_hedge_ratio: float = 0.1,
+        window: int = 500,
+        min_samples: int = 20,
+        max_workers: int = 16,
+    ) -> None:
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        # 首个请求的延迟样本，用于计算对冲阈值
+        self._primary_latency: Deque[float] = deque(maxlen=window)
+        # 调用方实际等待的延迟
+        self._observed_latency: Deque[float] = deque(maxlen=window)
+        # 对冲预算（令牌桶）：每个请求存入max_hedge_ratio个令牌，每次对冲消耗1个
+        self._hedge_tokens = 1.0
+        self._counters: Dict[str, int] = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    def threshold(self) -> float:
+        """当前的对冲阈值（秒）"""
+        with self._lock:
+            samples = list(self._primary_latency)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        value = percentile(samples, self.percentile)
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def call(self, fn: Callable[[threading.Event], T]) -> T:
+        start = time.monotonic()
+        with self._lock:
+            self._counters["requests"] += 1
+            self._hedge_tokens = min(10.0, self._hedge_tokens + self.max_hedge_ratio)
+
+        primary_cancel = threading.Event()
+        primary = self._executor.submit(fn, primary_cancel)
+        # 首个请求成功完成时记录其延迟，作为不做对冲时的延迟样本，也用于计算对冲阈值；
+        # 失败或落败后放弃读取（抛出HedgeCancelled）的请求没有完整的延迟，不计入
+        primary.add_done_callback(lambda future: self._record_primary(future, start))
+
+        done, _ = wait([primary], timeout=self.threshold())
+        if done or not self._take_hedge_token():
+            try:
+                return primary.result()
+            finally:
+                self._record_observed(start)
+
+        hedge_cancel = threading.Event()
+        hedge = self._executor.submit(fn, hedge_cancel)
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if error is not None:
+                        first_error = first_error or error
+                        continue
+                    # 取消落败的请求：未开始的直接取消，已开始的通过Event通知其放弃读取
+                    for other in pending:
+                        cancels[other].set()
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self._counters["hedge_wins"] += 1
+                    return future.result()
+            raise first_error
+        finally:
+            self._record_observed(start)
+
+    def _take_hedge_token(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens >= 1.0:
+                self._hedge_tokens -= 1.0
+                self._counters["hedged"] += 1
+                return True
+            self._counters["budget_exhausted"] += 1
+            return False
+
+    def _record_primary(self, future, start: float) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._primary_latency.append(time.monotonic() - start)
+
+    def _record_observed(self, start: float) -> None:
+        with self._lock:
+            self._observed_latency.append(time.monotonic() - start)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        对冲指标：调用方实际看到的延迟分位数，以及首个请求自身的延迟分位数
+        （即不做对冲时的延迟），两者对比即为对冲带来的尾延迟改善
+        """
+        with self._lock:
+            observed = list(self._observed_latency)
+            primary = list(self._primary_latency)
+            counters = dict(self._counters)
+        requests = counters["requests"] or 1
+        return {
+            **counters,
+            "hedge_rate": round(counters["hedged"] / requests, 4),
+            "threshold_ms": round(self.threshold() * 1000, 1),
+            "latency_ms": _percentiles_ms(observed),
+            "unhedged_latency_ms": _percentiles_ms(primary),
+        }
+
+
+def _percentiles_ms(samples: List[float]) -> Dict[str, Optional[float]]:
+    result = {}
+    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value = percentile(samples, q)
+        result[name] = None if value is None else round(value * 1000, 1)
+    return result
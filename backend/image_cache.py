@@ -0,0 +1,215 @@
+"""
+答题卡图片的磁盘缓存
+每张图片只从上游下载一次，按总大小做LRU淘汰，由FileResponse按块或零拷贝发送
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLargeError(Exception):
+    """上游图片超过单张大小上限"""
+
+
+class NotAnImageError(Exception):
+    """上游返回的内容不是图片"""
+
+
+class CachedImage:
+    """缓存中的一张图片：数据文件路径与响应所需的元信息"""
+
+    __slots__ = ("key", "path", "size", "content_type", "etag", "last_modified")
+
+    def __init__(
+        self,
+        key: str,
+        path: str,
+        size: int,
+        content_type: str,
+        etag: str,
+        last_modified: str,
+    ) -> None:
+        self.key = key
+        self.path = path
+        self.size = size
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ImageDiskCache:
+    """
+    以URL的sha256为键的磁盘缓存
+    数据写入<key>.bin，元信息写入<key>.json；启动时扫描目录按访问时间重建LRU顺序
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_image_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_image_bytes = max_image_bytes
+        self._entries: "OrderedDict[str, CachedImage]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        # 同一URL并发未命中时只下载一次，其余请求等待下载完成
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + ".bin", base + ".json"
+
+    def _load_index(self) -> None:
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            data_path, meta_path = self._paths(key)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                stat = os.stat(data_path)
+            except (OSError, ValueError):
+                continue
+            found.append((stat.st_atime, CachedImage(
+                key=key,
+                path=data_path,
+                size=stat.st_size,
+                content_type=meta.get("content_type", "application/octet-stream"),
+                etag=meta.get("etag", f'"{key[:32]}"'),
+                last_modified=meta.get("last_modified", formatdate(stat.st_mtime, usegmt=True)),
+            )))
+        for _, entry in sorted(found, key=lambda pair: pair[0]):
+            self._entries[entry.key] = entry
+            self._total_bytes += entry.size
+        self._evict()
+
+    def get(self, url: str) -> Optional[CachedImage]:
+        key = self.key_for(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not os.path.exists(entry.path):
+                # 文件被外部清理（如/tmp回收），视为未命中
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+        self.touch(entry)
+        return entry
+
+    def get_or_fetch(self, url: str, client: httpx.Client, timeout: float = 30) -> CachedImage:
+        entry = self.get(url)
+        if entry is not None:
+            return entry
+
+        key = self.key_for(url)
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+        with fetch_lock:
+            # 等待期间其他请求可能已经下载完成
+            entry = self.get(url)
+            if entry is not None:
+                return entry
+            try:
+                return self._fetch(key, url, client, timeout)
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(key, None)
+
+    def _fetch(self, key: str, url: str, client: httpx.Client, timeout: float) -> CachedImage:
+        data_path, meta_path = self._paths(key)
+        tmp_path = f"{data_path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            with client.stream("GET", url, timeout=timeout) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "").split(";")[0].strip()
+                if not content_type.startswith("image/"):
+                    raise NotAnImageError(content_type or "unknown")
+                declared = response.headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > self.max_image_bytes:
+                    raise ImageTooLargeError(declared)
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image_bytes:
+                            raise ImageTooLargeError(str(size))
+                        f.write(chunk)
+                last_modified = response.headers.get("last-modified") or formatdate(time.time(), usegmt=True)
+            os.replace(tmp_path, data_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        entry = CachedImage(
+            key=key,
+            path=data_path,
+            size=size,
+            content_type=content_type,
+            etag=f'"{key[:16]}-{size:x}"',
+            last_modified=last_modified,
+        )
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "url": url,
+                "content_type": entry.content_type,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+            }, f)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._entries[key] = entry
+            self._total_bytes += size
+            self._evict()
+        logger.info("图片已缓存 - 大小: %s字节, 缓存总量: %s字节", size, self._total_bytes)
+        return entry
+
+    def touch(self, entry: CachedImage) -> None:
+        """更新访问时间，让重启后重建的LRU顺序与实际访问一致"""
+        try:
+            os.utime(entry.path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        # 调用方持有self._lock
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
@@ -21,18 +21,99 @@ if hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_pref
             sys.path.remove(venv_site_packages)
         sys.path.insert(0, venv_site_packages)
 
+# backend目录下的业务模块（如grade_stats）仍需可导入，放在sys.path末尾，
+# 保证第三方包优先从虚拟环境加载
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+import importlib.util
+
+# fastapi和starlette使用backend目录下的修改版（压缩协商、Range、流式列表请求体、OpenAPI快照等），
+# 随源码一起部署；不经sys.path查找，避免虚拟环境里装过的PyPI版本被优先加载
+VENDORED_PACKAGES = ("starlette", "fastapi")
+
+
+def load_vendored_package(name: str) -> None:
+    package_dir = os.path.join(current_dir, name)
+    loaded = sys.modules.get(name)
+    if loaded is not None:
+        if os.path.dirname(os.path.abspath(loaded.__file__ or "")) != package_dir:
+            raise RuntimeError(f"{name}已从{loaded.__file__}导入，本服务需要backend/{name}下的版本")
+        return
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(package_dir, "__init__.py"), submodule_search_locations=[package_dir]
+    )
+    if spec is None or spec.loader is None:
+        raise RuntimeError(f"找不到backend/{name}，部署包需要包含该目录")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+
+
+for _name in VENDORED_PACKAGES:
+    load_vendored_package(_name)
+
 import json
 import logging
+import tempfile
+import threading
 import httpx
-from typing import Optional
-from fastapi import FastAPI, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.middleware.compression import CompressionMiddleware, CompressionRule, PrecompressedResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from exam_template import InterningCodec
+from grade_index import GradeIndexRegistry, QueryTooShortError, timed_search
+from grade_stats import (
+    GradeStatsAccumulator,
+    RecordStats,
+    RecordStatsCache,
+    content_fingerprint,
+    summarize_grade_data,
+)
+from admission import AdmissionController
+from corrections import (
+    CORRECTABLE_FIELDS,
+    CorrectionWriter,
+    Corrections,
+    apply_corrections,
+    correction_key,
+    parse_corrections,
+)
+from grade_delta import GradeVersionStore
+from deadline import Deadline, deadline_exceeded_error, stage_timeout
+from hedging import HedgeCancelled, HedgedCaller
+from image_cache import (
+    ImageDiskCache,
+    ImageTooLargeError,
+    NotAnImageError,
+)
+from shared_cache import ValueCodec, create_cache
+from value_compression import CompressingCodec
+from structured_logging import logging_stats, setup_logging
+from status_watch import COMPLETED_STATUS, StatusWatcher, format_sse, markup_status_of
+from warmup import HotKeyTracker, Warmup
+
+# 配置日志：后台线程写出，请求内容日志按路由采样（如 /api/grade-data=0.01,*=0），单条日志限制大小
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "json"),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+    max_chars=int(os.getenv("LOG_MAX_CHARS", "4000")),
+    payload_sample_rates=os.getenv("LOG_PAYLOAD_SAMPLE_RATES", "*=0"),
 )
 logger = logging.getLogger(__name__)
 
@@ -44,21 +125,73 @@ except ImportError:
     # 如果没有安装python-dotenv，忽略
     pass
 
-app = FastAPI(title="批改结果查询API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预热在后台线程进行，服务立即开始接收请求，预热完成前/api/ready返回503
+    if WARMUP_ENABLED:
+        warmup.start_in_background()
+    yield
+    hot_keys.save()
+
+
+# OpenAPI快照：打包时生成（见create_package.py），文件存在时直接返回快照，冷启动后不再生成文档；
+# 本地开发时文件不存在，文档按路由动态生成。设为空字符串则始终动态生成
+OPENAPI_SNAPSHOT = os.getenv("OPENAPI_SNAPSHOT", os.path.join(current_dir, "openapi.json"))
+
+# 请求体大小上限（字节），边接收边计数，超过即返回413；0表示不限制
+MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(4 * 1024 * 1024)))
+
+# 接口都返回各自response_model的实例，信任这些实例可以跳过重复校验，一次序列化完成
+app = FastAPI(
+    title="批改结果查询API",
+    lifespan=lifespan,
+    trust_response_model=True,
+    openapi_snapshot=OPENAPI_SNAPSHOT or None,
+    max_body_size=MAX_REQUEST_BODY_BYTES or None,
+)
+# 这些参数只有backend/fastapi支持，其他版本的FastAPI会把它们收进extra而悄悄不生效，此时直接报错
+BACKEND_FASTAPI_OPTIONS = ("trust_response_model", "openapi_snapshot", "max_body_size")
+unsupported_options = [name for name in BACKEND_FASTAPI_OPTIONS if name in app.extra]
+if unsupported_options:
+    raise RuntimeError(f"当前fastapi不支持{unsupported_options}，需要使用backend/fastapi")
 
 # 配置CORS，允许前端跨域访问
 # 生产环境建议通过环境变量限制allow_origins为具体域名
 cors_origins_env = os.getenv("CORS_ORIGINS", "*")
 cors_origins = cors_origins_env.split(",") if cors_origins_env != "*" else ["*"]
+# 浏览器缓存预检结果的时间（秒），期间同一来源、同一接口不再发OPTIONS请求；Chrome最多缓存7200秒
+CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))
 
+# 预检请求由中间件直接应答，不进入路由
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    max_age=CORS_MAX_AGE,
 )
 
+# 响应压缩：按客户端支持在zstd、br、gzip中协商（zstd和br需安装zstandard、brotli），
+# 小于COMPRESSION_MIN_SIZE字节的响应不压缩；已带Content-Encoding的响应（如压缩缓存直接输出）原样返回
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+# 各编码的压缩级别，如 gzip=6,br=4,zstd=3
+COMPRESSION_LEVELS = {
+    name.strip(): int(level)
+    for name, _, level in (item.partition("=") for item in os.getenv("COMPRESSION_LEVELS", "").split(",") if item.strip())
+}
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+        levels=COMPRESSION_LEVELS,
+        content_types={
+            # 状态订阅的事件很小且要求及时送达：不设大小下限，用最低级别逐条压缩并立即刷新
+            "text/event-stream": CompressionRule(minimum_size=0, levels={"gzip": 1, "br": 1, "zstd": 1}),
+        },
+    )
+
 # 环境配置：测试环境和线上环境对应的app_token和table_id
 ENV_CONFIG = {
     "test": {
@@ -76,18 +209,211 @@ ENV_CONFIG = {
 # 飞书开放平台配置
 FEISHU_APP_ID = os.getenv("FEISHU_APP_ID", "")
 FEISHU_APP_SECRET = os.getenv("FEISHU_APP_SECRET", "")
+SEARCH_FILTER_BATCH_SIZE = 50  # 按索引值列表搜索时，每次请求的过滤条件数量
+
+# 请求超时预算：SCF在30秒时强制终止函数，预留余量用于冷启动和返回响应
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))
+# 剩余时间低于该值时跳过json链接下载，直接使用参考字段
+LINK_FETCH_MIN_BUDGET = float(os.getenv("LINK_FETCH_MIN_BUDGET", "3"))
+
+# json链接对冲请求（默认关闭）：首个请求慢于近期延迟的分位数时再发一个请求，取先返回者
+LINK_HEDGING_ENABLED = os.getenv("LINK_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+link_hedger = HedgedCaller(
+    percentile=float(os.getenv("LINK_HEDGE_PERCENTILE", "0.95")),
+    initial_delay=float(os.getenv("LINK_HEDGE_INITIAL_DELAY", "1.0")),
+    max_hedge_ratio=float(os.getenv("LINK_HEDGE_MAX_RATIO", "0.1")),  # 对冲请求占比上限
+)
+
+# 缓存配置
+# 多worker部署（WEB_CONCURRENCY>1）时默认使用SQLite共享缓存，各进程互相预热；单进程默认使用进程内缓存；
+# 多个容器之间共享缓存使用redis
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite" if WEB_CONCURRENCY > 1 else "memory")
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+TOKEN_REFRESH_MARGIN = 300  # 令牌在过期前5分钟刷新
+RECORD_ID_CACHE_TTL = int(os.getenv("RECORD_ID_CACHE_TTL", str(24 * 3600)))
+GRADE_CACHE_TTL = int(os.getenv("GRADE_CACHE_TTL", "600"))
+# 进程内缓存中批改结果的保存形式：
+# compressed - 压缩保存（有zstandard时用zstd，否则gzip），读取时才解压，客户端接受该编码时直接输出压缩字节
+# interned   - 拆成全班共享的试卷模板 + 每个学生的作答数据，同一场考试的题干只保存一份
+# plain      - 原样保存
+CACHE_VALUE_FORMAT = os.getenv("CACHE_VALUE_FORMAT", "compressed")
+CACHE_EVICTION_SAMPLE = int(os.getenv("CACHE_EVICTION_SAMPLE", "8"))  # 大小感知淘汰的候选条目数，1为普通LRU
+
+
+def create_value_codec(value_format: str) -> Optional[ValueCodec]:
+    if value_format == "compressed":
+        return CompressingCodec(algorithm=os.getenv("CACHE_COMPRESSION", "auto"))
+    if value_format == "interned":
+        return InterningCodec()
+    if value_format != "plain":
+        raise ValueError(f"不支持的缓存值格式: {value_format}")
+    return None
+
+
+grade_cache = create_cache(
+    backend=CACHE_BACKEND,
+    max_bytes=CACHE_MAX_BYTES,
+    sqlite_path=os.getenv("CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "grade_cache.sqlite3")),
+    # 多个SCF容器共享缓存时配置CACHE_BACKEND=redis，如 redis://:password@host:6379/0
+    redis_url=os.getenv("REDIS_URL", ""),
+    redis_key_prefix=os.getenv("REDIS_KEY_PREFIX", "grade-query:"),
+    codec=create_value_codec(CACHE_VALUE_FORMAT),
+    eviction_sample=CACHE_EVICTION_SAMPLE,
+)
+
+# 准入控制配置
+# 需要访问飞书的批改结果查询最多GRADE_MAX_CONCURRENCY个同时进行，其余排队；
+# 队列满或预计排队时间超过GRADE_MAX_QUEUE_WAIT秒时直接返回429，命中缓存的请求不受限制；
+# SCF每个实例一次只处理一个请求，准入控制不起作用
+grade_admission = AdmissionController(
+    max_concurrency=int(os.getenv("GRADE_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("GRADE_MAX_QUEUE", "32")),
+    max_queue_wait=float(os.getenv("GRADE_MAX_QUEUE_WAIT", "5")),
+)
+
+# 班级统计配置
+STATS_MAX_RECORDS = int(os.getenv("STATS_MAX_RECORDS", "2000"))  # 单次统计的记录数上限
+STATS_FETCH_WORKERS = int(os.getenv("STATS_FETCH_WORKERS", "8"))  # 并发下载批改JSON的线程数
+record_stats_cache = RecordStatsCache(max_entries=int(os.getenv("STATS_CACHE_SIZE", "2048")))
+
+# 图片代理配置
+# 只代理白名单内的图片域名，避免被当作任意URL的转发器；配置为"*"时不限制
+IMAGE_PROXY_ALLOWED_HOSTS = [
+    host.strip().lower()
+    for host in os.getenv("IMAGE_PROXY_ALLOWED_HOSTS", "algo-public.s3.cn-north-1.amazonaws.com.cn").split(",")
+    if host.strip()
+]
+IMAGE_PROXY_MAX_AGE = int(os.getenv("IMAGE_PROXY_MAX_AGE", str(30 * 24 * 3600)))  # 浏览器缓存时间（秒）
+image_cache = ImageDiskCache(
+    directory=os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "grade_image_cache")),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),  # SCF的/tmp为512MB
+    max_image_bytes=int(os.getenv("IMAGE_PROXY_MAX_IMAGE_BYTES", str(20 * 1024 * 1024))),
+)
+
+# 倒排索引配置：本进程取到的批改结果按题目建立索引，支持按题号/对错/文本快速查找学生
+GRADE_INDEX_MAX_DOCUMENTS = int(os.getenv("GRADE_INDEX_MAX_DOCUMENTS", "5000"))  # 每个环境最多索引的文档数
+GRADE_INDEX_MAX_BYTES = int(os.getenv("GRADE_INDEX_MAX_BYTES", str(64 * 1024 * 1024)))  # 每个环境索引的估算内存上限（字节）
+grade_indexes = GradeIndexRegistry(max_documents=GRADE_INDEX_MAX_DOCUMENTS, max_bytes=GRADE_INDEX_MAX_BYTES)
+
+# 增量响应配置
+GRADE_VERSIONS_MAX_RECORDS = int(os.getenv("GRADE_VERSIONS_MAX_RECORDS", "500"))  # 保留版本的记录数上限
+GRADE_VERSIONS_PER_RECORD = int(os.getenv("GRADE_VERSIONS_PER_RECORD", "4"))  # 每条记录保留的最近版本数
+GRADE_VERSIONS_MAX_BYTES = int(os.getenv("GRADE_VERSIONS_MAX_BYTES", str(32 * 1024 * 1024)))  # 保留版本的总大小上限（编码后）
+# 版本原文与缓存使用同样的保存形式（默认压缩），计入SCF的内存限制
+grade_versions = GradeVersionStore(
+    max_records=GRADE_VERSIONS_MAX_RECORDS,
+    max_versions=GRADE_VERSIONS_PER_RECORD,
+    max_bytes=GRADE_VERSIONS_MAX_BYTES,
+    codec=create_value_codec(CACHE_VALUE_FORMAT),
+)
+
+# 教师修正配置
+# 修正保存在多维表格的一个文本字段中（需先在表格中创建），未配置时修正接口不可用
+CORRECTIONS_FIELD_NAME = os.getenv("CORRECTIONS_FIELD_NAME", "")
+CORRECTION_FLUSH_WINDOW = float(os.getenv("CORRECTION_FLUSH_WINDOW", "1"))  # 合并修正的时间窗口（秒）
+CORRECTION_MAX_RPS = float(os.getenv("CORRECTION_MAX_RPS", "5"))  # 写回请求的频率上限（次/秒）
+
+# 批改状态订阅配置
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "5"))  # 共享轮询间隔（秒）
+WATCH_MAX_INDEX_VALUES = int(os.getenv("WATCH_MAX_INDEX_VALUES", "50"))  # 单个订阅最多观察的索引值数量
+
+# 上游连接池：所有请求复用到飞书和json链接/图片域名的连接，省去每次调用的TLS握手
+UPSTREAM_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "60")),  # 空闲连接保留时间（秒）
+)
+feishu_http = httpx.Client(limits=UPSTREAM_LIMITS)
+link_http = httpx.Client(limits=UPSTREAM_LIMITS)
+
+# 启动预热配置
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_HOT_KEYS = int(os.getenv("WARMUP_HOT_KEYS", "50"))  # 每个环境预热的热点索引值数量
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))  # SCF冷启动时同步预热的整体时限（秒）
+# 预先建立连接的链接域名，默认与图片代理白名单相同
+WARMUP_LINK_HOSTS = [
+    host.strip().lower()
+    for host in os.getenv("WARMUP_LINK_HOSTS", ",".join(IMAGE_PROXY_ALLOWED_HOSTS)).split(",")
+    if host.strip() and host.strip() != "*"
+]
+hot_keys = HotKeyTracker(
+    path=os.getenv("HOT_KEYS_PATH", os.path.join(tempfile.gettempdir(), "grade_hot_keys.json")),
+    max_keys=int(os.getenv("HOT_KEYS_MAX", "500")),
+)
 
 
 class GradeDataRequest(BaseModel):
     """批改数据查询请求模型"""
     environment: str  # "test" or "production"
     record_id: str  # 索引列的单元格值（可能是数字或字符串）
+    version: Optional[str] = None  # 客户端已有的版本号，提供时尽量只返回增量
 
 
 class GradeDataResponse(BaseModel):
     success: bool
     message: str
     data: Optional[str] = None
+    version: Optional[str] = None  # 当前内容的版本号
+    delta: Optional[List[Dict[str, Any]]] = None  # 相对请求中version的JSON Patch，此时data为空
+
+
+class GradeStatsRequest(BaseModel):
+    """班级统计请求模型：按索引值列表、索引范围或视图圈定记录"""
+    environment: str  # "test" or "production"
+    index_values: Optional[List[str]] = None  # 索引列的单元格值列表
+    index_start: Optional[int] = None  # 索引范围起点（含）
+    index_end: Optional[int] = None  # 索引范围终点（含）
+    view_id: Optional[str] = None  # 多维表格视图ID
+    max_records: int = 500
+
+
+class GradeStatsResponse(BaseModel):
+    success: bool
+    message: str
+    data: Optional[Dict[str, Any]] = None
+
+
+class GradeIndexSearchResponse(BaseModel):
+    success: bool
+    message: str
+    data: Optional[Dict[str, Any]] = None
+
+
+class StepCorrection(BaseModel):
+    """对某一步的修正，is_correct和analysis至少提供一个"""
+    question_number: str
+    step_id: str
+    is_correct: Optional[bool] = None
+    analysis: Optional[str] = None
+
+
+class GradeCorrectionRequest(BaseModel):
+    environment: str
+    record_id: str  # 索引列的单元格值
+    corrections: List[StepCorrection]
+
+
+class GradeCorrectionResponse(BaseModel):
+    success: bool
+    message: str
+    data: Optional[Dict[str, Any]] = None
+
+
+def grade_field_names(index_field_name: str) -> List[str]:
+    """批量读取批改结果时需要的字段"""
+    field_names = [index_field_name, "自动批改结果参考", "自动批改结果json链接"]
+    if CORRECTIONS_FIELD_NAME:
+        field_names.append(CORRECTIONS_FIELD_NAME)
+    return field_names
+
+
+def record_id_cache_key(app_token: str, table_id: str, index_field_name: str, index_value: str) -> str:
+    return f"record_id:{app_token}:{table_id}:{index_field_name}:{index_value}"
+
+
+def grade_data_cache_key(app_token: str, table_id: str, record_id: str) -> str:
+    return f"grade:{app_token}:{table_id}:{record_id}"
 
 
 def find_record_by_index_value(
@@ -95,7 +421,8 @@ def find_record_by_index_value(
     table_id: str,
     index_value: str,
     tenant_access_token: str,
-    index_field_name: str = "索引"
+    index_field_name: str = "索引",
+    deadline: Optional[Deadline] = None
 ) -> Optional[str]:
     """
     根据索引列的单元格值查找对应的record_id
@@ -112,6 +439,13 @@ def find_record_by_index_value(
     # 处理索引值：如果是数字字符串，尝试转换为数字
     # 飞书API中，数字字段的值应该是数字类型
     index_value_trimmed = index_value.strip()
+
+    # record_id不会随批改结果变化，命中缓存时无需调用搜索API
+    cache_key = record_id_cache_key(app_token, table_id, index_field_name, index_value_trimmed)
+    cached_record_id = grade_cache.get(cache_key)
+    if cached_record_id:
+        return cached_record_id
+
     try:
         # 尝试转换为整数（适用于数字类型的索引字段）
         filter_value = int(index_value_trimmed)
@@ -146,90 +480,100 @@ def find_record_by_index_value(
         "automatic_fields": False
     }
     
-    with httpx.Client() as client:
-        try:
-            response = client.post(url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"飞书API HTTP错误: {str(e)}")
-            raise HTTPException(
-                status_code=503,
-                detail=f"无法连接到飞书服务: {str(e)}"
-            )
-        except httpx.RequestError as e:
-            logger.error(f"网络请求错误: {str(e)}")
-            raise HTTPException(
-                status_code=503,
-                detail=f"网络请求失败: {str(e)}"
-            )
+    timeout = stage_timeout(deadline, "搜索记录", 30)
+    try:
+        response = feishu_http.post(url, headers=headers, json=payload, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+    except httpx.HTTPStatusError as e:
+        logger.error("飞书API HTTP错误: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"无法连接到飞书服务: {str(e)}"
+        )
+    except httpx.RequestError as e:
+        logger.error("网络请求错误: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"网络请求失败: {str(e)}"
+        )
+    
+    if result.get("code") != 0:
+        error_msg = result.get('msg', '未知错误')
+        error_code = result.get('code', 0)
         
-        if result.get("code") != 0:
-            error_msg = result.get('msg', '未知错误')
-            error_code = result.get('code', 0)
-            
-            logger.warning(f"搜索记录失败 - code: {error_code}, msg: {error_msg}, 索引值: {index_value}")
-            
-            # 如果是记录不存在或查询无结果，返回None而不是抛出异常
-            if 'not found' in error_msg.lower() or error_code == 1254047:
-                return None
-            
-            raise HTTPException(
-                status_code=400,
-                detail=f"搜索记录失败: {error_msg}"
-            )
+        logger.warning("搜索记录失败 - code: %s, msg: %s, 索引值: %s", error_code, error_msg, index_value)
         
-        data = result.get("data", {})
-        records = data.get("items", [])
+        # 如果是记录不存在或查询无结果，返回None而不是抛出异常
+        if 'not found' in error_msg.lower() or error_code == 1254047:
+            return None
         
-        # 如果找到记录，返回第一条的record_id
-        if records:
-            record_id = records[0].get("record_id")
-            if record_id:
-                logger.info(f"找到记录 - 索引值: {index_value}, record_id: {record_id}")
-                return record_id
+        raise HTTPException(
+            status_code=400,
+            detail=f"搜索记录失败: {error_msg}"
+        )
     
+    data = result.get("data", {})
+    records = data.get("items", [])
+    
+    # 如果找到记录，返回第一条的record_id
+    if records:
+        record_id = records[0].get("record_id")
+        if record_id:
+            logger.info("找到记录 - 索引值: %s, record_id: %s", index_value, record_id)
+            grade_cache.set(cache_key, record_id, ttl=RECORD_ID_CACHE_TTL)
+            return record_id
+
     # 没有找到匹配的记录
-    logger.info(f"未找到匹配的记录 - 索引值: {index_value}, 字段名: {index_field_name}")
+    logger.info("未找到匹配的记录 - 索引值: %s, 字段名: %s", index_value, index_field_name)
     return None
 
 
-def get_tenant_access_token() -> str:
+def get_tenant_access_token(deadline: Optional[Deadline] = None) -> str:
     """
     获取飞书tenant_access_token
     文档: https://open.feishu.cn/document/server-docs/authentication-management/access-token/tenant_access_token_internal
+    
+    令牌有效期约2小时，缓存到过期前5分钟，多worker部署时各进程共享
     """
+    cache_key = f"token:{FEISHU_APP_ID}"
+    cached_token = grade_cache.get(cache_key)
+    if cached_token:
+        return cached_token
+
     url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
     payload = {
         "app_id": FEISHU_APP_ID,
         "app_secret": FEISHU_APP_SECRET,
     }
     
+    timeout = stage_timeout(deadline, "获取访问令牌", 10)
     try:
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            
-            if result.get("code") != 0:
-                error_msg = result.get('msg', '未知错误')
-                logger.error(f"获取token失败: {error_msg}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"获取飞书访问令牌失败: {error_msg}"
-                )
-            
-            token = result.get("tenant_access_token", "")
-            if not token:
-                logger.error("获取到的token为空")
-                raise HTTPException(
-                    status_code=500,
-                    detail="获取飞书访问令牌失败: token为空"
-                )
-            
-            return token
+        response = feishu_http.post(url, json=payload, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        
+        if result.get("code") != 0:
+            error_msg = result.get('msg', '未知错误')
+            logger.error("获取token失败: %s", error_msg)
+            raise HTTPException(
+                status_code=500,
+                detail=f"获取飞书访问令牌失败: {error_msg}"
+            )
+        
+        token = result.get("tenant_access_token", "")
+        if not token:
+            logger.error("获取到的token为空")
+            raise HTTPException(
+                status_code=500,
+                detail="获取飞书访问令牌失败: token为空"
+            )
+        
+        expire = result.get("expire", 7200)
+        grade_cache.set(cache_key, token, ttl=expire - TOKEN_REFRESH_MARGIN)
+        return token
     except httpx.HTTPError as e:
-        logger.error(f"获取token时网络错误: {str(e)}")
+        logger.error("获取token时网络错误: %s", e)
         raise HTTPException(
             status_code=503,
             detail=f"无法连接到飞书服务: {str(e)}"
@@ -241,7 +585,8 @@ def get_record_field_value(
     table_id: str,
     record_id: str,
     tenant_access_token: str,
-    field_name: str = "自动批改结果参考"
+    field_name: str = "自动批改结果参考",
+    deadline: Optional[Deadline] = None
 ) -> Optional[str]:
     """
     获取记录指定字段的值
@@ -255,100 +600,291 @@ def get_record_field_value(
         "Authorization": f"Bearer {tenant_access_token}",
     }
     
-    with httpx.Client() as client:
+    timeout = stage_timeout(deadline, "获取记录", 30)
+    try:
+        response = feishu_http.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+    except httpx.HTTPStatusError as e:
+        # HTTP状态码错误
+        raise HTTPException(
+            status_code=503,
+            detail=f"无法连接到飞书服务: {str(e)}"
+        )
+    except httpx.RequestError as e:
+        # 网络请求错误
+        raise HTTPException(
+            status_code=503,
+            detail=f"网络请求失败: {str(e)}"
+        )
+    
+    if result.get("code") != 0:
+        error_msg = result.get('msg', '未知错误')
+        error_code = result.get('code', 0)
+        
+        # 如果是记录不存在，返回更友好的错误信息
+        if 'RecordIdNotFound' in error_msg or error_code == 1254047:
+            raise HTTPException(
+                status_code=404,
+                detail=f"记录ID {record_id} 不存在，请检查ID是否正确"
+            )
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"获取记录失败: {error_msg}"
+            )
+    
+    record_data = result.get("data", {}).get("record", {})
+    fields = record_data.get("fields", {})
+
+    return resolve_grade_data_from_fields(fields, field_name=field_name, deadline=deadline)
+
+
+def extract_field_text(field_value_raw, *dict_keys: str) -> str:
+    """
+    把飞书字段值转换为字符串
+    列表格式通常是IOpenSegment[]，拼接各段text；字典格式依次尝试dict_keys，都为空时退回str(dict)
+    """
+    if isinstance(field_value_raw, list):
+        return "".join([
+            str(item.get("text", "")) if isinstance(item, dict) else str(item)
+            for item in field_value_raw
+        ])
+    if isinstance(field_value_raw, dict):
+        for key in dict_keys or ("text",):
+            value = field_value_raw.get(key)
+            if value:
+                return value
+        return str(field_value_raw)
+    return str(field_value_raw) if field_value_raw else ""
+
+
+def resolve_grade_data_from_fields(
+    fields: dict,
+    field_name: str = "自动批改结果参考",
+    deadline: Optional[Deadline] = None
+) -> Optional[str]:
+    """
+    从记录字段中解析批改结果，并覆盖修正字段中的教师修正
+    """
+    grade_data = _resolve_original_grade_data(fields, field_name, deadline)
+    if grade_data and CORRECTIONS_FIELD_NAME:
+        corrections = parse_corrections(extract_field_text(fields.get(CORRECTIONS_FIELD_NAME), "text"))
+        grade_data = apply_corrections(grade_data, corrections)
+    return grade_data
+
+
+def _resolve_original_grade_data(
+    fields: dict,
+    field_name: str,
+    deadline: Optional[Deadline]
+) -> Optional[str]:
+    """
+    从记录字段中解析自动批改的原始结果
+    优先查找"自动批改结果json链接"字段并下载JSON，失败或为空时使用参考字段；
+    剩余时间不足时跳过链接下载，直接使用参考字段
+    """
+    # 优先查找"自动批改结果json链接"字段
+    link_field_name = "自动批改结果json链接"
+    if link_field_name in fields:
+        link_value = extract_field_text(fields[link_field_name], "text", "link")
+
+        if link_value and link_value.strip() and _should_skip_link_fetch(fields, field_name, deadline):
+            logger.warning("剩余时间不足以下载json链接，直接使用参考字段")
+        elif link_value and link_value.strip():
+            # 如果有链接，尝试从链接获取JSON
+            timeout = stage_timeout(deadline, "下载批改结果", 30)
+            try:
+                content = download_link_content(link_value.strip(), timeout=timeout)
+                if content and content.strip():
+                    return content
+            except httpx.HTTPError as e:
+                logger.warning("从链接获取数据失败 (HTTP错误): %s，尝试使用参考字段", e)
+            except Exception as e:
+                logger.warning("从链接获取数据失败: %s，尝试使用参考字段", e)
+
+    # 如果没有链接字段或链接获取失败，使用参考字段
+    if field_name in fields:
+        field_value = extract_field_text(fields[field_name], "text")
+        if field_value and field_value.strip():
+            return field_value.strip()
+
+    return None
+
+
+def download_link_content(url: str, timeout: float) -> str:
+    """下载json链接的内容；开启对冲时，慢于自适应阈值的下载会再发一个对冲请求"""
+    if not LINK_HEDGING_ENABLED:
+        link_response = link_http.get(url, timeout=timeout)
+        link_response.raise_for_status()
+        return link_response.text
+    return link_hedger.call(lambda cancel: _download_link_cancellable(url, timeout, cancel))
+
+
+def _download_link_cancellable(url: str, timeout: float, cancel: threading.Event) -> str:
+    """流式下载链接内容，每收到一个数据块检查一次是否已在对冲中落败"""
+    with link_http.stream("GET", url, timeout=timeout) as response:
+        response.raise_for_status()
+        chunks = []
+        for chunk in response.iter_bytes():
+            if cancel.is_set():
+                raise HedgeCancelled(url)
+            chunks.append(chunk)
+        return b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+
+
+def _should_skip_link_fetch(fields: dict, field_name: str, deadline: Optional[Deadline]) -> bool:
+    """链接下载是可选阶段：有参考字段可用且剩余预算不足时跳过"""
+    if deadline is None or deadline.can_afford(LINK_FETCH_MIN_BUDGET):
+        return False
+    return bool(extract_field_text(fields.get(field_name), "text").strip())
+
+
+def iter_table_records(
+    app_token: str,
+    table_id: str,
+    tenant_access_token: str,
+    field_names: List[str],
+    filter_spec: Optional[dict] = None,
+    view_id: Optional[str] = None,
+    sort_field_name: Optional[str] = None,
+    page_size: int = 100,
+    max_records: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
+) -> Iterator[dict]:
+    """
+    分页遍历搜索记录API的结果，逐条产出记录（包含record_id和fields）
+    文档: https://open.feishu.cn/document/docs/bitable-v1/app-table-record/search
+    """
+    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/search"
+    headers = {
+        "Authorization": f"Bearer {tenant_access_token}",
+        "Content-Type": "application/json",
+    }
+    payload: Dict[str, Any] = {
+        "field_names": field_names,
+        "automatic_fields": False,
+    }
+    if view_id:
+        payload["view_id"] = view_id
+    if filter_spec:
+        payload["filter"] = filter_spec
+    if sort_field_name:
+        payload["sort"] = [{"field_name": sort_field_name, "desc": False}]
+
+    page_token: Optional[str] = None
+    produced = 0
+    while True:
+        params = {"page_size": page_size}
+        if page_token:
+            params["page_token"] = page_token
+        timeout = stage_timeout(deadline, "搜索记录", 30)
         try:
-            response = client.get(url, headers=headers, timeout=30)
+            response = feishu_http.post(url, headers=headers, params=params, json=payload, timeout=timeout)
             response.raise_for_status()
             result = response.json()
         except httpx.HTTPStatusError as e:
-            # HTTP状态码错误
+            logger.error("飞书API HTTP错误: %s", e)
             raise HTTPException(
                 status_code=503,
                 detail=f"无法连接到飞书服务: {str(e)}"
             )
         except httpx.RequestError as e:
-            # 网络请求错误
+            logger.error("网络请求错误: %s", e)
             raise HTTPException(
                 status_code=503,
                 detail=f"网络请求失败: {str(e)}"
             )
-        
+
         if result.get("code") != 0:
             error_msg = result.get('msg', '未知错误')
-            error_code = result.get('code', 0)
-            
-            # 如果是记录不存在，返回更友好的错误信息
-            if 'RecordIdNotFound' in error_msg or error_code == 1254047:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"记录ID {record_id} 不存在，请检查ID是否正确"
-                )
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"获取记录失败: {error_msg}"
-                )
-        
-        record_data = result.get("data", {}).get("record", {})
-        fields = record_data.get("fields", {})
-        
-        # 优先查找"自动批改结果json链接"字段
-        link_field_name = "自动批改结果json链接"
-        if link_field_name in fields:
-            link_value_raw = fields[link_field_name]
-            link_value = ""
-            
-            # 处理不同类型的字段值
-            if isinstance(link_value_raw, list):
-                # 列表格式，通常是IOpenSegment[]
-                link_value = "".join([
-                    str(item.get("text", "")) if isinstance(item, dict) else str(item)
-                    for item in link_value_raw
-                ])
-            elif isinstance(link_value_raw, dict):
-                # 字典格式
-                link_value = link_value_raw.get("text", link_value_raw.get("link", ""))
-                if not link_value:
-                    link_value = str(link_value_raw)
-            else:
-                link_value = str(link_value_raw) if link_value_raw else ""
-            
-            if link_value and link_value.strip():
-                # 如果有链接，尝试从链接获取JSON
-                try:
-                    link_response = httpx.get(link_value.strip(), timeout=30)
-                    link_response.raise_for_status()
-                    content = link_response.text
-                    if content and content.strip():
-                        return content
-                except httpx.HTTPError as e:
-                    logger.warning(f"从链接获取数据失败 (HTTP错误): {e}，尝试使用参考字段")
-                except Exception as e:
-                    logger.warning(f"从链接获取数据失败: {e}，尝试使用参考字段")
-        
-        # 如果没有链接字段或链接获取失败，使用参考字段
-        if field_name in fields:
-            field_value_raw = fields[field_name]
-            
-            # 处理不同类型的字段值
-            if isinstance(field_value_raw, list):
-                # 列表格式，通常是IOpenSegment[]
-                field_value = "".join([
-                    str(item.get("text", "")) if isinstance(item, dict) else str(item)
-                    for item in field_value_raw
-                ])
-            elif isinstance(field_value_raw, dict):
-                # 字典格式
-                field_value = field_value_raw.get("text", "")
-                if not field_value:
-                    field_value = str(field_value_raw)
-            else:
-                field_value = str(field_value_raw) if field_value_raw else ""
-            
-            if field_value and field_value.strip():
-                return field_value.strip()
-        
-        return None
+            logger.warning("搜索记录失败 - code: %s, msg: %s", result.get("code"), error_msg)
+            raise HTTPException(
+                status_code=400,
+                detail=f"搜索记录失败: {error_msg}"
+            )
+
+        data = result.get("data", {})
+        for item in data.get("items") or []:
+            yield item
+            produced += 1
+            if max_records is not None and produced >= max_records:
+                return
+
+        page_token = data.get("page_token")
+        if not data.get("has_more") or not page_token:
+            return
+
+
+def iter_records_by_index_values(
+    app_token: str,
+    table_id: str,
+    tenant_access_token: str,
+    field_names: List[str],
+    index_field_name: str,
+    index_values: List[str],
+    view_id: Optional[str] = None,
+    max_records: Optional[int] = None,
+    deadline: Optional[Deadline] = None,
+) -> Iterator[dict]:
+    """按索引值列表搜索记录：按批次用or条件搜索，避免单次过滤条件过多"""
+    values = list(dict.fromkeys(v.strip() for v in index_values if v and v.strip()))
+    produced = 0
+    for start in range(0, len(values), SEARCH_FILTER_BATCH_SIZE):
+        conditions = [
+            {"field_name": index_field_name, "operator": "is", "value": [_coerce_index_value(v)]}
+            for v in values[start:start + SEARCH_FILTER_BATCH_SIZE]
+        ]
+        for item in iter_table_records(
+            app_token, table_id, tenant_access_token, field_names,
+            filter_spec={"conjunction": "or", "conditions": conditions},
+            view_id=view_id,
+            max_records=None if max_records is None else max_records - produced,
+            deadline=deadline,
+        ):
+            yield item
+            produced += 1
+        if max_records is not None and produced >= max_records:
+            return
+
+
+def index_value_text(field_value_raw) -> str:
+    """索引列的值转为字符串，数字索引去掉多余的小数部分（3.0 -> "3"）"""
+    if isinstance(field_value_raw, float) and field_value_raw.is_integer():
+        field_value_raw = int(field_value_raw)
+    return extract_field_text(field_value_raw, "text").strip()
+
+
+def resolve_environment_config(environment: str) -> Tuple[str, str, str]:
+    """
+    校验环境参数与飞书应用配置，返回 (app_token, table_id, index_field_name)
+    """
+    # 验证环境参数
+    if environment not in ["test", "production"]:
+        raise HTTPException(
+            status_code=400,
+            detail="environment参数必须是'test'或'production'"
+        )
+
+    # 获取环境配置
+    env_config = ENV_CONFIG[environment]
+    app_token = env_config["app_token"]
+    table_id = env_config["table_id"]
+    index_field_name = env_config.get("index_field_name", "索引")
+
+    if not app_token or not table_id:
+        raise HTTPException(
+            status_code=500,
+            detail=f"{environment}环境配置缺失，请检查环境变量"
+        )
+
+    if not FEISHU_APP_ID or not FEISHU_APP_SECRET:
+        raise HTTPException(
+            status_code=500,
+            detail="飞书应用配置缺失，请检查FEISHU_APP_ID和FEISHU_APP_SECRET环境变量"
+        )
+
+    return app_token, table_id, index_field_name
 
 
 @app.get("/")
@@ -357,6 +893,168 @@ async def root():
     return {"message": "批改结果查询API服务运行中"}
 
 
+@app.get("/api/metrics")
+def get_metrics():
+    """运行指标（同步接口，在线程池中执行：sqlite/redis缓存的统计需要查询数据库）"""
+    return {
+        "link_hedging": {"enabled": LINK_HEDGING_ENABLED, **link_hedger.stats()},
+        "cache": {"pid": os.getpid(), **grade_cache.stats()},
+        "admission": grade_admission.stats(),
+        "logging": logging_stats(),
+        "grade_index": grade_indexes.stats(),
+        "corrections": correction_writer.stats(),
+        "grade_versions": grade_versions.stats(),
+    }
+
+
+def cached_grade_data_target(environment: str, index_value: str) -> Optional[Tuple[str, str, str]]:
+    """
+    record_id已缓存时返回批改结果所在的 (app_token, table_id, record_id)，不访问飞书
+    """
+    app_token, table_id, index_field_name = resolve_environment_config(environment)
+    record_id = grade_cache.get(record_id_cache_key(app_token, table_id, index_field_name, index_value.strip()))
+    if not record_id:
+        return None
+    return app_token, table_id, record_id
+
+
+def with_pending_corrections(grade_data: str, target: Tuple[str, str, str]) -> str:
+    """
+    缓存命中的批改结果叠加尚未写回的修正
+    并发读取可能在修正提交后把不含修正的文档写入缓存，叠加后写回前读到的结果始终包含已接受的修正
+    """
+    return apply_corrections(grade_data, correction_writer.pending_for(target))
+
+
+def lookup_cached_grade_data(environment: str, index_value: str) -> Optional[str]:
+    """只查缓存的快速路径：record_id和已完成的批改结果都命中时直接返回"""
+    target = cached_grade_data_target(environment, index_value)
+    if not target:
+        return None
+    grade_data = grade_cache.get(grade_data_cache_key(*target))
+    if not grade_data:
+        return None
+    # 只记录确实查到批改结果的索引值，供下次启动时预热
+    hot_keys.record(environment, index_value.strip())
+    return with_pending_corrections(grade_data, target)
+
+
+def lookup_encoded_grade_data(environment: str, index_value: str, accept_encoding: str) -> Optional[Tuple[bytes, str]]:
+    """命中压缩缓存且客户端接受该编码时，返回压缩数据和编码，无需解压"""
+    target = cached_grade_data_target(environment, index_value)
+    # 有未写回的修正时压缩数据可能不含修正，走需要解压叠加的路径
+    if not target or correction_writer.pending_for(target):
+        return None
+    encoded = grade_cache.get_encoded(grade_data_cache_key(*target), accept_encoding)
+    if encoded is not None:
+        hot_keys.record(environment, index_value.strip())
+    return encoded
+
+
+def load_grade_data(request: GradeDataRequest, deadline: Deadline) -> str:
+    """
+    完整的查询流程：获取令牌、查找record_id、读取批改结果字段（必要时下载json链接）
+    """
+    app_token, table_id, index_field_name = resolve_environment_config(request.environment)
+    
+    # 获取tenant_access_token
+    tenant_access_token = get_tenant_access_token(deadline=deadline)
+    
+    # 先根据索引列的值查找record_id
+    record_id = find_record_by_index_value(
+        app_token=app_token,
+        table_id=table_id,
+        index_value=request.record_id,  # 这里实际是索引列的值
+        tenant_access_token=tenant_access_token,
+        index_field_name=index_field_name,
+        deadline=deadline
+    )
+    
+    if not record_id:
+        raise HTTPException(
+            status_code=404,
+            detail=f"未找到索引值为 '{request.record_id}' 的记录，请检查索引值是否正确"
+        )
+    
+    # 已完成批改的结果不再变化，命中缓存时直接返回
+    grade_cache_key = grade_data_cache_key(app_token, table_id, record_id)
+    cached_grade_data = grade_cache.get(grade_cache_key)
+    if cached_grade_data:
+        hot_keys.record(request.environment, request.record_id.strip())
+        return with_pending_corrections(cached_grade_data, (app_token, table_id, record_id))
+    
+    # 读取期间有修正写回成功时，读到的可能是写回前的旧值，这次的结果不缓存
+    correction_generation = correction_writer.generation()
+    # 获取记录字段值
+    # 优先尝试"自动批改结果json链接"字段
+    grade_data = get_record_field_value(
+        app_token=app_token,
+        table_id=table_id,
+        record_id=record_id,  # 使用找到的record_id
+        tenant_access_token=tenant_access_token,
+        field_name="自动批改结果参考",
+        deadline=deadline
+    )
+    
+    if not grade_data:
+        raise HTTPException(
+            status_code=404,
+            detail=f"索引值为 '{request.record_id}' 的记录的批改结果数据为空"
+        )
+    # 已接受但尚未写回的修正
+    grade_data = apply_corrections(grade_data, correction_writer.pending_for((app_token, table_id, record_id)))
+    
+    # 验证数据格式（尝试解析JSON）
+    try:
+        json.loads(grade_data)
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail="批改结果数据格式错误，无法解析为JSON"
+        )
+    
+    # 批改未完成的结果还会更新，只缓存已完成的
+    if markup_status_of(grade_data) == COMPLETED_STATUS and correction_writer.generation() == correction_generation:
+        grade_cache.set(grade_cache_key, grade_data, ttl=GRADE_CACHE_TTL)
+    grade_indexes.get(request.environment).add(request.record_id.strip(), grade_data)
+    hot_keys.record(request.environment, request.record_id.strip())
+    return grade_data
+
+
+async def resolve_grade_data(request: GradeDataRequest) -> str:
+    """
+    获取批改结果JSON字符串
+    命中缓存的请求直接返回；需要访问飞书的请求经过准入控制，过载时快速返回429
+    """
+    # 整个请求共用一个超时预算，各阶段的超时都从中扣除，排队时间也计入其中
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
+    try:
+        grade_data = await run_in_threadpool(lookup_cached_grade_data, request.environment, request.record_id)
+        if grade_data:
+            grade_admission.record_bypass()
+            return grade_data
+        async with grade_admission.slot(budget=deadline.remaining()):
+            return await run_in_threadpool(load_grade_data, request, deadline)
+        
+    except HTTPException as e:
+        # 上游请求因预算耗尽而超时时，统一返回504
+        if e.status_code == 503 and deadline.expired:
+            raise deadline_exceeded_error("批改结果查询")
+        raise
+    except httpx.HTTPError as e:
+        logger.error("获取批改数据时网络错误: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=503,
+            detail=f"网络请求失败: {str(e)}"
+        )
+    except Exception as e:
+        logger.error("获取批改数据时出错: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"服务器内部错误: {str(e)}"
+        )
+
+
 @app.post("/api/grade-data", response_model=GradeDataResponse)
 async def get_grade_data(request: GradeDataRequest):
     """
@@ -366,111 +1064,628 @@ async def get_grade_data(request: GradeDataRequest):
         request: 包含environment（test/production）和record_id（实际是索引列的单元格值）
     
     Returns:
-        GradeDataResponse: 包含批改结果JSON数据
+        GradeDataResponse: 包含批改结果JSON数据和版本号；请求带有仍保留着的version时，
+            data为空，delta为从该版本到当前版本的JSON Patch（内容未变时为空列表）
     
     Raises:
-        HTTPException: 各种错误情况（400, 404, 500, 503）
+        HTTPException: 各种错误情况（400, 404, 429, 500, 503, 504）
     """
-    try:
-        # 验证环境参数
-        if request.environment not in ["test", "production"]:
-            raise HTTPException(
-                status_code=400,
-                detail="environment参数必须是'test'或'production'"
-            )
-        
-        # 获取环境配置
-        env_config = ENV_CONFIG[request.environment]
-        app_token = env_config["app_token"]
-        table_id = env_config["table_id"]
-        index_field_name = env_config.get("index_field_name", "索引")
-        
-        if not app_token or not table_id:
-            raise HTTPException(
-                status_code=500,
-                detail=f"{request.environment}环境配置缺失，请检查环境变量"
-            )
-        
-        if not FEISHU_APP_ID or not FEISHU_APP_SECRET:
-            raise HTTPException(
-                status_code=500,
-                detail="飞书应用配置缺失，请检查FEISHU_APP_ID和FEISHU_APP_SECRET环境变量"
-            )
-        
-        # 获取tenant_access_token
-        tenant_access_token = get_tenant_access_token()
-        
-        # 先根据索引列的值查找record_id
-        try:
-            record_id = find_record_by_index_value(
-                app_token=app_token,
-                table_id=table_id,
-                index_value=request.record_id,  # 这里实际是索引列的值
-                tenant_access_token=tenant_access_token,
-                index_field_name=index_field_name
-            )
-        except HTTPException:
-            # 重新抛出HTTPException
-            raise
-        
-        if not record_id:
-            raise HTTPException(
-                status_code=404,
-                detail=f"未找到索引值为 '{request.record_id}' 的记录，请检查索引值是否正确"
-            )
-        
-        # 获取记录字段值
-        # 优先尝试"自动批改结果json链接"字段
-        try:
-            grade_data = get_record_field_value(
-                app_token=app_token,
-                table_id=table_id,
-                record_id=record_id,  # 使用找到的record_id
-                tenant_access_token=tenant_access_token,
-                field_name="自动批改结果参考"
-            )
-        except HTTPException:
-            # 重新抛出HTTPException（如记录不存在）
-            raise
-        
+    grade_data = await resolve_grade_data(request)
+    # 指纹、解析和比较整份文档都是CPU密集的，放到线程池中，不阻塞事件循环
+    version, delta = await run_in_threadpool(
+        grade_versions.delta, request.environment, request.record_id.strip(), grade_data, request.version
+    )
+    if delta is not None:
+        return GradeDataResponse(success=True, message="获取成功", version=version, delta=delta)
+    return GradeDataResponse(
+        success=True,
+        message="获取成功",
+        data=grade_data,
+        version=version
+    )
+
+
+@app.get("/api/grade-data/document")
+async def get_grade_document(request: Request, environment: str, index: str):
+    """
+    直接返回批改结果JSON本身（而不是包在data字段里的字符串）
+    命中压缩缓存且客户端接受该编码（Accept-Encoding）时原样输出压缩字节，不解压也不重新序列化
+
+    Args:
+        environment: test或production
+        index: 索引列的单元格值
+    """
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if accept_encoding:
+        encoded = await run_in_threadpool(lookup_encoded_grade_data, environment, index, accept_encoding)
+        if encoded is not None:
+            grade_admission.record_bypass()
+            data, encoding = encoded
+            # 压缩中间件不会再次压缩已带Content-Encoding的响应
+            return PrecompressedResponse(media_type="application/json", variants={encoding: data})
+    grade_data = await resolve_grade_data(GradeDataRequest(environment=environment, record_id=index))
+    return Response(content=grade_data, media_type="application/json", headers={"Vary": "Accept-Encoding"})
+
+
+@app.post("/api/grade-stats", response_model=GradeStatsResponse)
+def get_grade_stats(request: GradeStatsRequest):
+    """
+    班级维度的批改统计
+    逐页遍历圈定的记录，把每条批改结果折叠成题目计数后立即丢弃原文，
+    部分聚合按记录缓存，重复统计同一批学生时无需再次下载JSON
+
+    Returns:
+        GradeStatsResponse: data为按题号/题型汇总的紧凑统计表
+    """
+    app_token, table_id, index_field_name = resolve_environment_config(request.environment)
+
+    if not request.index_values and request.index_start is None \
+            and request.index_end is None and not request.view_id:
+        raise HTTPException(
+            status_code=400,
+            detail="请提供index_values、index_start/index_end或view_id中的至少一种"
+        )
+    max_records = max(1, min(request.max_records, STATS_MAX_RECORDS))
+    # 超出预算后剩余的记录会进入failed列表，已统计的部分照常返回
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
+
+    tenant_access_token = get_tenant_access_token(deadline=deadline)
+    field_names = grade_field_names(index_field_name)
+
+    accumulator = GradeStatsAccumulator()
+    cached_records = 0
+    truncated = False
+    seen_record_ids = set()
+
+    def summarize_item(item: dict, pending_corrections: Corrections) -> RecordStats:
+        fields = item.get("fields") or {}
+        grade_data = resolve_grade_data_from_fields(fields, deadline=deadline)
         if not grade_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"索引值为 '{request.record_id}' 的记录的批改结果数据为空"
-            )
-        
-        # 验证数据格式（尝试解析JSON）
+            raise ValueError("批改结果数据为空")
+        # 已接受但尚未写回的修正
+        grade_data = apply_corrections(grade_data, pending_corrections)
+        # 统计时下载的批改结果顺便建立倒排索引
+        grade_indexes.get(request.environment).add(index_value_text(fields.get(index_field_name)), grade_data)
+        return summarize_grade_data(grade_data)
+
+    with ThreadPoolExecutor(max_workers=STATS_FETCH_WORKERS) as executor:
         try:
-            json.loads(grade_data)
-        except json.JSONDecodeError:
-            raise HTTPException(
-                status_code=400,
-                detail="批改结果数据格式错误，无法解析为JSON"
-            )
-        
-        return GradeDataResponse(
-            success=True,
-            message="获取成功",
-            data=grade_data
+            for batch in _batched(
+                _iter_stats_records(
+                    app_token, table_id, tenant_access_token, field_names,
+                    index_field_name, request, max_records, deadline,
+                ),
+                STATS_FETCH_WORKERS * 2,
+            ):
+                pending = []
+                for item in batch:
+                    record_id = item.get("record_id", "")
+                    if not record_id or record_id in seen_record_ids:
+                        continue
+                    seen_record_ids.add(record_id)
+
+                    pending_corrections = correction_writer.pending_for((app_token, table_id, record_id))
+                    cache_key = (
+                        request.environment, record_id,
+                        _stats_source_key(item.get("fields") or {}, pending_corrections),
+                    )
+                    stats = record_stats_cache.get(cache_key)
+                    if stats is not None:
+                        cached_records += 1
+                        accumulator.merge(stats)
+                    else:
+                        pending.append((item, cache_key, executor.submit(summarize_item, item, pending_corrections)))
+
+                for item, cache_key, future in pending:
+                    index_value = index_value_text((item.get("fields") or {}).get(index_field_name))
+                    try:
+                        stats = future.result()
+                    except (ValueError, HTTPException) as e:
+                        # 单条记录失败不影响整体统计，记录到failed列表中
+                        reason = e.detail if isinstance(e, HTTPException) else str(e)
+                        accumulator.add_failure(index_value, reason)
+                        continue
+                    record_stats_cache.put(cache_key, stats)
+                    accumulator.merge(stats)
+        except HTTPException as e:
+            # 搜索阶段预算耗尽时返回已统计的部分，并标记结果不完整
+            if e.status_code != 504:
+                raise
+            truncated = True
+
+    table = accumulator.to_table()
+    table["cached_records"] = cached_records
+    table["truncated"] = truncated
+    logger.info(
+        "班级统计完成 - 记录数: %s, 缓存命中: %s, 失败: %s",
+        accumulator.records, cached_records, len(accumulator.failed),
+    )
+    message = "统计完成（超时，结果不完整）" if truncated else "统计完成"
+    return GradeStatsResponse(success=True, message=message, data=table)
+
+
+def _iter_stats_records(
+    app_token: str,
+    table_id: str,
+    tenant_access_token: str,
+    field_names: List[str],
+    index_field_name: str,
+    request: GradeStatsRequest,
+    max_records: int,
+    deadline: Optional[Deadline] = None,
+) -> Iterator[dict]:
+    """按统计请求的圈定方式产出记录"""
+    if request.index_values:
+        yield from iter_records_by_index_values(
+            app_token, table_id, tenant_access_token, field_names,
+            index_field_name, request.index_values,
+            view_id=request.view_id,
+            max_records=max_records,
+            deadline=deadline,
         )
-        
-    except HTTPException:
-        raise
-    except httpx.HTTPError as e:
-        logger.error(f"获取批改数据时网络错误: {str(e)}", exc_info=True)
+        return
+
+    conditions = []
+    if request.index_start is not None:
+        conditions.append({"field_name": index_field_name, "operator": "isGreaterEqual", "value": [request.index_start]})
+    if request.index_end is not None:
+        conditions.append({"field_name": index_field_name, "operator": "isLessEqual", "value": [request.index_end]})
+    yield from iter_table_records(
+        app_token, table_id, tenant_access_token, field_names,
+        filter_spec={"conjunction": "and", "conditions": conditions} if conditions else None,
+        view_id=request.view_id,
+        sort_field_name=index_field_name,
+        max_records=max_records,
+        deadline=deadline,
+    )
+
+
+def _coerce_index_value(index_value: str):
+    """与find_record_by_index_value一致：数字字符串按数字过滤，否则按字符串过滤"""
+    try:
+        return int(index_value)
+    except ValueError:
+        return index_value
+
+
+def _stats_source_key(fields: dict, pending_corrections: Optional[Corrections] = None) -> str:
+    """
+    部分聚合缓存键中的数据来源部分：链接地址或参考字段内容指纹，
+    有教师修正（含尚未写回的修正）时附加修正的指纹
+    """
+    link_value = extract_field_text(fields.get("自动批改结果json链接"), "text", "link").strip()
+    if link_value:
+        source = f"link:{link_value}"
+    else:
+        reference = extract_field_text(fields.get("自动批改结果参考"), "text").strip()
+        source = f"ref:{content_fingerprint(reference)}"
+    corrections = extract_field_text(fields.get(CORRECTIONS_FIELD_NAME), "text").strip() if CORRECTIONS_FIELD_NAME else ""
+    if corrections:
+        source = f"{source}:fix:{content_fingerprint(corrections)}"
+    if pending_corrections:
+        pending = json.dumps(pending_corrections, ensure_ascii=False, sort_keys=True)
+        source = f"{source}:pending:{content_fingerprint(pending)}"
+    return source
+
+
+def _batched(items: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fetch_corrections(app_token: str, table_id: str, record_ids: List[str]) -> Dict[str, Corrections]:
+    """
+    批量读取记录当前的修正字段
+    文档: https://open.feishu.cn/document/docs/bitable-v1/app-table-record/batch_get
+    """
+    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_get"
+    headers = {
+        "Authorization": f"Bearer {get_tenant_access_token()}",
+        "Content-Type": "application/json",
+    }
+    response = feishu_http.post(url, headers=headers, json={"record_ids": record_ids}, timeout=10)
+    response.raise_for_status()
+    result = response.json()
+    if result.get("code") != 0:
+        raise RuntimeError(f"读取修正字段失败: {result.get('msg', '未知错误')}")
+    return {
+        record.get("record_id"): parse_corrections(
+            extract_field_text((record.get("fields") or {}).get(CORRECTIONS_FIELD_NAME), "text")
+        )
+        for record in (result.get("data") or {}).get("records") or []
+    }
+
+
+def write_corrections(app_token: str, table_id: str, corrections: Dict[str, Corrections]) -> None:
+    """
+    批量写入修正字段
+    文档: https://open.feishu.cn/document/server-docs/docs/bitable-v1/app-table-record/batch_update
+    """
+    url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_update"
+    headers = {
+        "Authorization": f"Bearer {get_tenant_access_token()}",
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "records": [
+            {"record_id": record_id, "fields": {CORRECTIONS_FIELD_NAME: json.dumps(edits, ensure_ascii=False)}}
+            for record_id, edits in corrections.items()
+        ]
+    }
+    response = feishu_http.post(url, headers=headers, json=payload, timeout=10)
+    response.raise_for_status()
+    result = response.json()
+    if result.get("code") != 0:
+        raise RuntimeError(f"写入修正字段失败: {result.get('msg', '未知错误')}")
+    logger.info("教师修正已写回 - 记录数: %s", len(corrections))
+
+
+correction_writer = CorrectionWriter(
+    fetch_current=fetch_corrections,
+    write=write_corrections,
+    flush_window=CORRECTION_FLUSH_WINDOW,
+    max_requests_per_second=CORRECTION_MAX_RPS,
+)
+# 按缓存键分段的锁，串行化同一条记录的修正对缓存的更新
+correction_cache_locks = [threading.Lock() for _ in range(64)]
+
+
+@app.post("/api/grade-data/corrections", status_code=202, response_model=GradeCorrectionResponse)
+def submit_grade_corrections(request: GradeCorrectionRequest):
+    """
+    提交教师对批改结果的修正（修改某一步的is_correct或解析）
+    修正立即生效于本服务的缓存和后续读取，并在后台合并、批量写回多维表格
+
+    Returns:
+        GradeCorrectionResponse: 202，data中为接受的修正数和待写回的修正数
+    """
+    if not CORRECTIONS_FIELD_NAME:
+        raise HTTPException(status_code=503, detail="未配置修正字段（CORRECTIONS_FIELD_NAME），无法保存修正")
+    edits: Corrections = {}
+    for item in request.corrections:
+        edit = {field: getattr(item, field) for field in CORRECTABLE_FIELDS if getattr(item, field) is not None}
+        if not edit:
+            raise HTTPException(status_code=400, detail="每条修正至少需要提供is_correct或analysis")
+        edits.setdefault(correction_key(item.question_number, item.step_id), {}).update(edit)
+    if not edits:
+        raise HTTPException(status_code=400, detail="corrections不能为空")
+
+    app_token, table_id, index_field_name = resolve_environment_config(request.environment)
+    index_value = request.record_id.strip()
+    record_id = find_record_by_index_value(
+        app_token=app_token,
+        table_id=table_id,
+        index_value=index_value,
+        tenant_access_token=get_tenant_access_token(),
+        index_field_name=index_field_name,
+    )
+    if not record_id:
         raise HTTPException(
-            status_code=503,
-            detail=f"网络请求失败: {str(e)}"
+            status_code=404,
+            detail=f"未找到索引值为 '{request.record_id}' 的记录，请检查索引值是否正确"
         )
-    except Exception as e:
-        logger.error(f"获取批改数据时出错: {str(e)}", exc_info=True)
+
+    # 本地缓存立即更新，写回完成前后的读取结果一致；
+    # 同一条记录的读取-覆盖-写入依次进行，并发提交的修正不会互相覆盖
+    grade_cache_key = grade_data_cache_key(app_token, table_id, record_id)
+    with correction_cache_locks[hash(grade_cache_key) % len(correction_cache_locks)]:
+        correction_writer.submit((app_token, table_id, record_id), edits)
+        cached_grade_data = grade_cache.get(grade_cache_key)
+        if cached_grade_data:
+            corrected = apply_corrections(cached_grade_data, edits)
+            grade_cache.set(grade_cache_key, corrected, ttl=GRADE_CACHE_TTL)
+            grade_indexes.get(request.environment).add(index_value, corrected)
+
+    return GradeCorrectionResponse(
+        success=True,
+        message="修正已接受，将在后台写回",
+        data={"accepted": len(edits), "pending_edits": correction_writer.stats()["pending_edits"]},
+    )
+
+
+@app.get("/api/grade-index/search", response_model=GradeIndexSearchResponse)
+def search_grade_index(
+    environment: str,
+    question_number: Optional[str] = None,
+    question_type: Optional[str] = None,
+    is_correct: Optional[bool] = None,
+    q: Optional[str] = None,
+):
+    """
+    在倒排索引中查找学生，返回索引值列表
+    条件需落在同一道题上，如 question_number=3&is_correct=false&q=不等式 表示第3题答错且作答或解析中含"不等式"。
+    只覆盖本进程取到过的批改结果（单条查询、批量订阅和班级统计都会建立索引），
+    需要覆盖全班时先对同一范围调用一次 /api/grade-stats
+
+    Args:
+        environment: test或production
+        question_number: 题号
+        question_type: 题型，如objective
+        is_correct: 该题是否答对（任一步骤错误即为答错）
+        q: 作答或解析中包含的文本，至少2个字符
+    """
+    resolve_environment_config(environment)
+    index = grade_indexes.get(environment)
+    try:
+        index_values, took_ms = timed_search(
+            index,
+            question_number=question_number,
+            question_type=question_type,
+            is_correct=is_correct,
+            text=q,
+        )
+    except QueryTooShortError:
+        raise HTTPException(status_code=400, detail="文本查询至少需要2个字符")
+    return GradeIndexSearchResponse(
+        success=True,
+        message="查询成功",
+        data={
+            "index_values": index_values,
+            "count": len(index_values),
+            "took_ms": took_ms,
+            "indexed_documents": index.stats()["documents"],
+        },
+    )
+
+
+@app.get("/api/image")
+def proxy_image(url: str, request: Request):
+    """
+    答题卡图片代理
+    每张图片只从上游下载一次并缓存在磁盘上，支持Range（含多段）和条件请求，
+    响应带长缓存头，按块流式输出或由服务器零拷贝发送，不把整张图片读入内存
+
+    Args:
+        url: 批改结果中的image_url
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        raise HTTPException(status_code=400, detail="url参数必须是http(s)图片地址")
+    if "*" not in IMAGE_PROXY_ALLOWED_HOSTS and not any(
+        host == allowed or (allowed.startswith(".") and host.endswith(allowed))
+        for allowed in IMAGE_PROXY_ALLOWED_HOSTS
+    ):
+        raise HTTPException(status_code=403, detail=f"不允许代理该域名的图片: {host}")
+
+    entry, file = _open_cached_image(url)
+
+    headers = {
+        "Cache-Control": f"public, max-age={IMAGE_PROXY_MAX_AGE}, immutable",
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+    }
+
+    if _image_not_modified(request, entry.etag, entry.last_modified):
+        file.close()
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse处理Range（含多段）和If-Range，服务器支持zerocopysend扩展时由服务器sendfile发送；
+    # 传入已打开的文件，发送期间条目被淘汰（文件被删除）也不影响响应
+    return FileResponse(
+        entry.path,
+        media_type=entry.content_type,
+        headers=headers,
+        stat_result=os.fstat(file.fileno()),
+        method=request.method,
+        file=file,
+    )
+
+
+def _open_cached_image(url: str):
+    """从磁盘缓存取图（未命中时下载），返回缓存条目和已打开的文件"""
+    # 文件可能在命中后被其他请求淘汰，此时重新下载一次
+    for _ in range(2):
+        try:
+            entry = image_cache.get_or_fetch(url, link_http)
+        except NotAnImageError as e:
+            raise HTTPException(status_code=502, detail=f"上游返回的不是图片: {e}")
+        except ImageTooLargeError:
+            raise HTTPException(status_code=502, detail="上游图片超过大小限制")
+        except httpx.HTTPStatusError as e:
+            status_code = 404 if e.response.status_code in (403, 404) else 502
+            raise HTTPException(status_code=status_code, detail=f"获取图片失败: {str(e)}")
+        except httpx.RequestError as e:
+            logger.error("获取图片时网络错误: %s", e)
+            raise HTTPException(status_code=503, detail=f"网络请求失败: {str(e)}")
+        try:
+            return entry, open(entry.path, "rb")
+        except FileNotFoundError:
+            continue
+    raise HTTPException(status_code=503, detail="图片缓存暂不可用，请重试")
+
+
+def _image_not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """处理If-None-Match / If-Modified-Since条件请求"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def fetch_grade_data_batch(environment: str, index_values: List[str]) -> Dict[str, str]:
+    """
+    批量获取一组索引值的批改结果，返回 {索引值: 批改结果JSON字符串}
+    一次搜索请求取回所有记录的字段，只有json链接需要逐条下载
+    """
+    app_token, table_id, index_field_name = resolve_environment_config(environment)
+    tenant_access_token = get_tenant_access_token()
+    field_names = grade_field_names(index_field_name)
+
+    correction_generation = correction_writer.generation()
+    items = list(iter_records_by_index_values(
+        app_token, table_id, tenant_access_token, field_names,
+        index_field_name, index_values,
+    ))
+
+    # 已完成批改的结果一次批量读取缓存，远程缓存只需一次往返
+    cache_keys = {
+        item.get("record_id"): grade_data_cache_key(app_token, table_id, item.get("record_id"))
+        for item in items if item.get("record_id")
+    }
+    cached = grade_cache.get_many(cache_keys.values())
+
+    def resolve_item(item: dict) -> Tuple[str, Optional[str], bool]:
+        fields = item.get("fields") or {}
+        index_value = index_value_text(fields.get(index_field_name))
+        cached_grade_data = cached.get(cache_keys.get(item.get("record_id"), ""))
+        if cached_grade_data:
+            return index_value, with_pending_corrections(cached_grade_data, (app_token, table_id, item["record_id"])), True
+        grade_data = resolve_grade_data_from_fields(fields)
+        if grade_data and item.get("record_id"):
+            grade_data = apply_corrections(grade_data, correction_writer.pending_for((app_token, table_id, item["record_id"])))
+        return index_value, grade_data, False
+
+    results: Dict[str, str] = {}
+    record_ids: Dict[str, str] = {}
+    completed: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=STATS_FETCH_WORKERS) as executor:
+        for item, (index_value, grade_data, from_cache) in zip(items, executor.map(resolve_item, items)):
+            record_id = item.get("record_id")
+            if record_id and index_value:
+                record_ids[record_id_cache_key(app_token, table_id, index_field_name, index_value)] = record_id
+            if not grade_data:
+                continue
+            results[index_value] = grade_data
+            if record_id and not from_cache and markup_status_of(grade_data) == COMPLETED_STATUS:
+                completed[cache_keys[record_id]] = grade_data
+    grade_cache.set_many(record_ids, ttl=RECORD_ID_CACHE_TTL)
+    # 与load_grade_data相同：读取期间有修正写回成功时不缓存
+    if correction_writer.generation() == correction_generation:
+        grade_cache.set_many(completed, ttl=GRADE_CACHE_TTL)
+    grade_indexes.add_many(environment, results.items())
+    return results
+
+
+def warm_tenant_token() -> str:
+    get_tenant_access_token()
+    return "ok"
+
+
+def warm_link_hosts() -> List[str]:
+    """向链接域名发一个HEAD请求，建立的连接保留在连接池中；响应状态码无关紧要"""
+    for host in WARMUP_LINK_HOSTS:
+        link_http.head(f"https://{host}/", timeout=5)
+    return WARMUP_LINK_HOSTS
+
+
+def warm_hot_keys() -> Dict[str, int]:
+    """按热点列表批量查询一次，record_id和已完成的批改结果随之写入缓存"""
+    loaded = {}
+    for environment, config in ENV_CONFIG.items():
+        index_values = hot_keys.top(environment, WARMUP_HOT_KEYS)
+        if not index_values or not config["app_token"] or not config["table_id"]:
+            continue
+        loaded[environment] = len(fetch_grade_data_batch(environment, index_values))
+    return loaded
+
+
+warmup = Warmup(steps=[
+    ("tenant_token", warm_tenant_token),
+    ("link_hosts", warm_link_hosts),
+    ("hot_keys", warm_hot_keys),
+])
+
+
+@app.get("/api/ready")
+async def readiness():
+    """就绪检查：预热完成（或未启用预热）时返回200，否则返回503"""
+    status = warmup.status()
+    if WARMUP_ENABLED and not warmup.ready:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
+status_watchers: Dict[str, StatusWatcher] = {}
+
+
+def get_status_watcher(environment: str) -> StatusWatcher:
+    """每个环境一个共享观察者，所有订阅者合并为同一个轮询任务"""
+    watcher = status_watchers.get(environment)
+    if watcher is None:
+        watcher = status_watchers[environment] = StatusWatcher(
+            fetch_batch=lambda index_values: fetch_grade_data_batch(environment, index_values),
+            poll_interval=WATCH_POLL_INTERVAL,
+        )
+    return watcher
+
+
+@app.get("/api/grade-data/subscribe")
+async def subscribe_grade_data(environment: str, index: List[str] = Query(...)):
+    """
+    订阅批改状态（Server-Sent Events）
+    客户端用EventSource订阅一组索引值，服务端用共享的批量轮询观察这些记录：
+    markup_status变化时推送status事件，批改完成时推送带批改结果的ready事件，
+    全部完成后推送done事件并结束。需要长连接，适用于uvicorn部署
+
+    Args:
+        environment: test或production
+        index: 索引列的单元格值，可重复传入多个
+    """
+    resolve_environment_config(environment)
+    index_values = list(dict.fromkeys(v.strip() for v in index if v and v.strip()))
+    if not index_values:
+        raise HTTPException(status_code=400, detail="index参数不能为空")
+    if len(index_values) > WATCH_MAX_INDEX_VALUES:
         raise HTTPException(
-            status_code=500,
-            detail=f"服务器内部错误: {str(e)}"
+            status_code=400,
+            detail=f"单个订阅最多观察{WATCH_MAX_INDEX_VALUES}个索引值"
         )
 
+    watcher = get_status_watcher(environment)
+
+    async def event_stream():
+        async for event, payload in watcher.watch(index_values):
+            yield format_sse(event, payload)
+        yield format_sse("done", {"index_values": index_values})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 前端构建产物（npm run build生成的dist/）挂载到FRONTEND_MOUNT_PATH，目录不存在时不挂载；
+# vite的base为'./'，资源使用相对路径，可挂载在任意前缀下
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR", os.path.join(current_dir, "..", "dist"))
+FRONTEND_MOUNT_PATH = os.getenv("FRONTEND_MOUNT_PATH", "/app")
+# 文件元信息缓存时间（秒），期间重复请求省去路径查找；0表示不缓存。
+# 发送时按打开的文件校验大小和修改时间，内容变化的文件照常发送，新增或删除的文件最多延迟这么久生效
+STATIC_STAT_CACHE_TTL = float(os.getenv("STATIC_STAT_CACHE_TTL", "60"))
+if FRONTEND_DIST_DIR and os.path.isdir(FRONTEND_DIST_DIR):
+    # 带.br/.zst/.gz同名预压缩文件时按Accept-Encoding直接发送，不再实时压缩
+    app.mount(
+        FRONTEND_MOUNT_PATH,
+        StaticFiles(
+            directory=FRONTEND_DIST_DIR,
+            html=True,
+            precompressed=True,
+            stat_cache_ttl=STATIC_STAT_CACHE_TTL,
+        ),
+        name="frontend",
+    )
+
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WEB_CONCURRENCY > 1:
+        # 多进程模式需要以导入字符串启动，各worker通过SQLite共享缓存
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+本地开发用的Redis协议替身服务
+实现缓存层用到的命令子集（PING/AUTH/SELECT/GET/SET/MGET/MSET/DEL/EXISTS/DBSIZE/FLUSHALL/QUIT），
+数据只保存在内存中，用于在没有Redis的环境下测试RedisCache和运行基准测试
+
+    python resp_server.py --port 6390 [--requirepass 密码]
+    CACHE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6390/0 python main.py
+"""
+import argparse
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class RespStore:
+    """带过期时间的键值存储，过期键在读取时惰性删除"""
+
+    def __init__(self) -> None:
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+
+    def delete(self, key: bytes) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def size(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+def _bulk(value: Optional[bytes]) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _error(message: str) -> bytes:
+    return f"-ERR {message}\r\n".encode("utf-8")
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # 内联命令（如telnet手动输入）
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        length = int(header[1:-2])
+        data = await reader.readexactly(length + 2)
+        args.append(data[:-2])
+    return args
+
+
+def execute(store: RespStore, args: List[bytes]) -> bytes:
+    if not args:
+        return _error("empty command")
+    name, params = args[0].upper(), args[1:]
+    if name == b"PING":
+        return b"+PONG\r\n" if not params else _bulk(params[0])
+    if name == b"SELECT" and len(params) == 1:
+        # 替身服务只有一个库
+        return b"+OK\r\n" if params[0] == b"0" else _error("DB index is out of range")
+    if name == b"GET" and len(params) == 1:
+        return _bulk(store.get(params[0]))
+    if name == b"SET" and len(params) >= 2:
+        ttl = None
+        options = [option.upper() for option in params[2:]]
+        if len(options) == 2 and options[0] in (b"EX", b"PX"):
+            try:
+                ttl = float(options[1]) / (1 if options[0] == b"EX" else 1000)
+            except ValueError:
+                return _error("value is not an integer or out of range")
+        elif options:
+            return _error("syntax error")
+        store.set(params[0], params[1], ttl)
+        return b"+OK\r\n"
+    if name == b"MGET" and params:
+        return b"*%d\r\n" % len(params) + b"".join(_bulk(store.get(key)) for key in params)
+    if name == b"MSET" and params and len(params) % 2 == 0:
+        for i in range(0, len(params), 2):
+            store.set(params[i], params[i + 1])
+        return b"+OK\r\n"
+    if name == b"DEL" and params:
+        return b":%d\r\n" % sum(store.delete(key) for key in params)
+    if name == b"EXISTS" and params:
+        return b":%d\r\n" % sum(store.get(key) is not None for key in params)
+    if name == b"DBSIZE":
+        return b":%d\r\n" % store.size()
+    if name == b"FLUSHALL":
+        store.clear()
+        return b"+OK\r\n"
+    return _error(f"unknown command or wrong number of arguments for '{name.decode(errors='replace')}'")
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 6390,
+    store: Optional[RespStore] = None,
+    password: Optional[str] = None,
+) -> asyncio.AbstractServer:
+    """password不为空时与Redis的requirepass一样，连接需先AUTH才能执行其他命令"""
+    store = store or RespStore()
+    expected = password.encode("utf-8") if password else None
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authenticated = expected is None
+        try:
+            while True:
+                args = await _read_command(reader)
+                if args is None:
+                    break
+                name = args[0].upper() if args else b""
+                if name == b"QUIT":
+                    writer.write(b"+OK\r\n")
+                    break
+                if name == b"AUTH":
+                    authenticated = expected is None or args[1:] == [expected]
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                else:
+                    writer.write(execute(store, args))
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def start_in_thread(
+    host: str = "127.0.0.1", port: int = 0, password: Optional[str] = None
+) -> Tuple[int, asyncio.AbstractEventLoop]:
+    """在后台线程中启动替身服务，返回实际监听的端口（port=0时由系统分配）和事件循环"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result = {}
+
+    def run() -> None:
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(serve(host, port, password=password))
+        result["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="resp-server", daemon=True).start()
+    started.wait()
+    return result["port"], loop
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地Redis协议替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--requirepass", default=None, help="要求客户端先AUTH的密码")
+    args = parser.parse_args()
+
+    async def run() -> None:
+        server = await serve(args.host, args.port, password=args.requirepass)
+        print(f"Redis协议替身服务已启动: redis://{args.host}:{args.port}/0")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
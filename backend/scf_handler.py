@@ -2,30 +2,49 @@
 腾讯云SCF入口函数
 处理函数URL/API Gateway事件，将HTTP请求转发给FastAPI应用
 """
+import base64
 import json
+import logging
 import os
 import sys
 import asyncio
-import traceback
 from urllib.parse import parse_qs, urlencode
 
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(__file__))
 
-from main import app
+from main import WARMUP_ENABLED, WARMUP_TIMEOUT, app, correction_writer, warmup
+from structured_logging import flush_logs, log_payload
+
+logger = logging.getLogger("scf_handler")
+
+# 冷启动（模块初始化）时同步预热，首个请求不再承担获取令牌、TLS握手和缓存未命中的开销；
+# 最多等待WARMUP_TIMEOUT秒，上游缓慢时不拖住初始化
+if WARMUP_ENABLED:
+    warmup.run(timeout=WARMUP_TIMEOUT)
+
+# 需要透传给API网关的响应头
+PASSTHROUGH_HEADERS = (
+    "Cache-Control", "ETag", "Last-Modified", "Accept-Ranges", "Content-Range", "Content-Encoding", "Vary",
+    # 429/503响应的重试提示
+    "Retry-After",
+    # CORS头由应用的CORSMiddleware按配置生成（含预检的Access-Control-Max-Age），不再另行覆盖
+    "Access-Control-Allow-Origin", "Access-Control-Allow-Credentials", "Access-Control-Allow-Methods",
+    "Access-Control-Allow-Headers", "Access-Control-Expose-Headers", "Access-Control-Max-Age",
+)
 
 def main_handler(event, context):
     """
     腾讯云SCF入口函数
     直接处理API Gateway事件
     """
+    path = event.get("path", "/")
     try:
-        # 打印事件信息用于调试
-        print(f"Received event: {json.dumps(event, ensure_ascii=False)}")
-        
         # 解析API Gateway事件
-        path = event.get("path", "/")
         http_method = event.get("httpMethod", "GET").upper()
+        logger.info("收到请求 %s %s", http_method, path, extra={"route": path})
+        # 完整事件只按路由采样记录（LOG_PAYLOAD_SAMPLE_RATES），避免高峰期淹没日志投递
+        log_payload(logger, path, "Received event", event)
         headers = event.get("headers", {})
         query_params = event.get("queryStringParameters", {})
         
@@ -39,7 +58,6 @@ def main_handler(event, context):
         is_base64_encoded = event.get("isBase64Encoded", False)
         
         if body and is_base64_encoded:
-            import base64
             body = base64.b64decode(body).decode('utf-8')
         
         # 尝试解析JSON body
@@ -68,15 +86,14 @@ def main_handler(event, context):
             return loop.run_until_complete(handle_asgi_request(scope, body))
         finally:
             loop.close()
+            # 函数返回后容器会被冻结，后台线程无法按时工作：返回前写回教师修正、写出队列中的日志
+            correction_writer.flush()
+            flush_logs()
             
     except Exception as e:
-        # 打印详细的错误信息
-        error_info = {
-            "error": str(e),
-            "traceback": traceback.format_exc(),
-            "event": event
-        }
-        print(f"Error occurred: {json.dumps(error_info, ensure_ascii=False)}")
+        # 错误日志总是记录完整事件（受单条日志大小限制）
+        logger.error("Error occurred: %s", e, exc_info=True, extra={"route": path, "event": event})
+        flush_logs()
         
         return {
             "statusCode": 500,
@@ -90,17 +107,28 @@ def main_handler(event, context):
 async def handle_asgi_request(scope, body):
     """处理ASGI请求"""
     # 创建接收和发送函数
+    request_sent = False
+    response_complete = asyncio.Event()
+
     async def receive():
-        return {
-            "type": "http.request",
-            "body": (json.dumps(body).encode() if isinstance(body, dict) else str(body).encode()) if body else b"",
-            "more_body": False
-        }
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {
+                "type": "http.request",
+                "body": (json.dumps(body).encode() if isinstance(body, dict) else str(body).encode()) if body else b"",
+                "more_body": False
+            }
+        # 请求体已发送完毕，等响应结束后再报告断开（StreamingResponse会持续监听断开事件）
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
     
     response_parts = []
     
     async def send(message):
         response_parts.append(message)
+        if message.get("type") == "http.response.body" and not message.get("more_body", False):
+            response_complete.set()
     
     # 调用FastAPI应用
     await app(scope, receive, send)
@@ -118,6 +146,28 @@ async def handle_asgi_request(scope, body):
         elif part.get("type") == "http.response.body":
             response_body += part.get("body", b"")
     
+    # 缓存与Range相关的响应头需要原样透传（如/api/image）
+    passthrough_headers = {
+        name: response_headers[name.lower()]
+        for name in PASSTHROUGH_HEADERS
+        if name.lower() in response_headers
+    }
+    # 图片等二进制响应和已压缩的响应按base64返回
+    content_type = response_headers.get("content-type", "")
+    if "content-encoding" in response_headers or (
+        content_type and not content_type.startswith(("application/json", "text/"))
+    ):
+        return {
+            "statusCode": status_code,
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(len(response_body)),
+                **passthrough_headers,
+            },
+            "body": base64.b64encode(response_body).decode("ascii"),
+            "isBase64Encoded": True
+        }
+    
     # 转换响应体为JSON字符串，确保编码一致
     try:
         # 尝试解析为JSON
@@ -134,9 +184,7 @@ async def handle_asgi_request(scope, body):
     headers = {
         "Content-Type": "application/json; charset=utf-8",
         "Content-Length": str(content_length),
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization"
+        **passthrough_headers,
     }
     
     return {
@@ -0,0 +1,584 @@
+"""
+缓存层：飞书访问令牌、索引值→record_id映射和批改结果
+所有实现遵循BaseCache接口：
+- MemoryCache：进程内缓存（SCF单进程容器默认使用）
+- SQLiteCache：WAL模式的SQLite文件，同一台机器上的多个uvicorn worker共享
+- RedisCache：Redis协议的远程缓存，多个SCF容器共享，连接池复用连接，批量读写使用MGET/管道化SET
+"""
+import logging
+import math
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class BaseCache:
+    """
+    缓存后端接口
+    值为字符串；读写失败时实现应退化为未命中，不影响主流程
+    """
+
+    backend = "base"
+
+    def __init__(self) -> None:
+        self._hits = 0
+        self._misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """批量读取，只返回命中的键；远程实现应在一次往返内完成"""
+        result = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, items: Dict[str, str], ttl: float) -> None:
+        """批量写入，所有键使用相同的TTL"""
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def get_encoded(self, key: str, accept_encoding: str) -> Optional[Tuple[bytes, str]]:
+        """
+        以客户端接受的编码（如gzip）直接取出压缩形式的值，返回 (数据, 编码)
+        不支持或该值未压缩时返回None，调用方改用get
+        """
+        return None
+
+    def _count(self, hit: bool) -> None:
+        with self._counter_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self._hits + self._misses
+        return {
+            "backend": self.backend,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else None,
+        }
+
+
+class ValueCodec:
+    """
+    MemoryCache中值的存储形式
+    默认原样保存字符串；子类可以换成更紧凑的表示，读取时再还原
+    """
+
+    def encode(self, value: str) -> object:
+        return value
+
+    def decode(self, stored: object) -> str:
+        return stored
+
+    def size(self, stored: object) -> int:
+        """计入缓存容量的字节数"""
+        return len(stored.encode("utf-8"))
+
+    def release(self, stored: object) -> None:
+        """条目被删除或淘汰时调用，用于释放共享的数据"""
+
+    def encoded(self, stored: object, accept_encoding: str) -> Optional[Tuple[bytes, str]]:
+        """存储形式本身就是客户端接受的内容编码时返回 (数据, 编码)"""
+        return None
+
+    def stats(self) -> Dict[str, object]:
+        return {}
+
+
+class MemoryCache(BaseCache):
+    """
+    进程内LRU缓存，按条目数和总字节数淘汰
+    eviction_sample大于1时按大小感知淘汰：从最久未访问的若干条目中淘汰最大的一个，
+    每次淘汰腾出更多空间，同样的容量保留更多条目
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        codec: Optional[ValueCodec] = None,
+        eviction_sample: int = 1,
+    ) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction_sample = max(1, eviction_sample)
+        self.codec = codec or ValueCodec()
+        # key -> (编码后的值, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[object, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        self._count(entry is not None)
+        if entry is None:
+            return None
+        # 存储形式不可变，解压、还原在锁外进行，大文档不会让其他键的读写排队
+        return self.codec.decode(entry[0])
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        stored = self.codec.encode(value)
+        size = self.codec.size(stored)
+        if size > self.max_bytes:
+            # 新值放不下，旧值也已过时，不能继续返回
+            self.codec.release(stored)
+            self.delete(key)
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (stored, time.time() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(self._pick_victim(exclude=key))
+
+    def get_encoded(self, key: str, accept_encoding: str) -> Optional[Tuple[bytes, str]]:
+        result = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                result = self.codec.encoded(entry[0], accept_encoding)
+                if result is not None:
+                    self._entries.move_to_end(key)
+        if result is not None:
+            self._count(True)
+        return result
+
+    def _pick_victim(self, exclude: str) -> str:
+        # 调用方持有self._lock；刚写入的条目在末尾，不参与大小比较
+        oldest = next(iter(self._entries))
+        if self.eviction_sample == 1 or len(self._entries) > self.max_entries:
+            return oldest
+        candidates = islice(self._entries.items(), self.eviction_sample)
+        victim = max(
+            ((candidate, entry[2]) for candidate, entry in candidates if candidate != exclude),
+            key=lambda pair: pair[1],
+            default=(oldest, 0),
+        )
+        return victim[0]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+            self.codec.release(entry[0])
+
+    def stats(self) -> Dict[str, object]:
+        return {**super().stats(), "entries": len(self._entries), "bytes": self._bytes, **self.codec.stats()}
+
+
+class SQLiteCache(BaseCache):
+    """
+    跨进程共享缓存
+    WAL模式下读不阻塞写；每个线程使用独立连接。
+    访问时间按分钟粒度更新以减少读路径上的写入，总大小超限时按访问时间淘汰
+    """
+
+    backend = "sqlite"
+
+    # 访问时间的更新粒度（秒）
+    TOUCH_INTERVAL = 60
+    # 每写入多少次检查一次总大小
+    EVICT_CHECK_EVERY = 50
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024) -> None:
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自动提交模式，每条语句即一个事务；busy_timeout让并发写入的worker排队而不是报错
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                row = None
+            elif row is not None and now - row[2] > self.TOUCH_INTERVAL:
+                conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            # 缓存不可用时退化为未命中，不影响主流程
+            logger.warning("读取共享缓存失败: %s", e)
+            row = None
+        self._count(row is not None)
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        size = len(value.encode("utf-8"))
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now + ttl, now, size),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_CHECK_EVERY == 0:
+                self._evict()
+        except sqlite3.Error as e:
+            logger.warning("写入共享缓存失败: %s", e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("删除共享缓存失败: %s", e)
+
+    def _evict(self) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 按访问时间从旧到新删除，直到总大小回落到上限的90%
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        logger.info("共享缓存淘汰 %s 条记录", len(victims))
+
+    def stats(self) -> Dict[str, object]:
+        try:
+            entries, total = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, total = None, None
+        return {**super().stats(), "entries": entries, "bytes": total, "path": self.path}
+
+
+class RespError(Exception):
+    """Redis返回的错误回复"""
+
+
+def encode_command(*args) -> bytes:
+    """按RESP协议编码一条命令"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        elif isinstance(arg, (int, float)):
+            arg = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+class RespConnection:
+    """一个到Redis协议服务端的阻塞连接"""
+
+    def __init__(self, host: str, port: int, timeout: float) -> None:
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self.sock.makefile("rb")
+
+    def send(self, commands: List[Tuple]) -> None:
+        # 管道化：多条命令合并为一次写入
+        self.sock.sendall(b"".join(encode_command(*command) for command in commands))
+
+    def read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("连接已关闭")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RespError(body.decode("utf-8", errors="replace"))
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("连接已关闭")
+            return data[:-2]
+        if prefix == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self.read_reply() for _ in range(count)]
+        raise ConnectionError(f"无法解析的RESP回复: {line[:20]!r}")
+
+    def execute(self, commands: List[Tuple]) -> list:
+        """发送一批命令并按顺序读取全部回复；单条命令的错误回复作为RespError对象返回"""
+        self.send(commands)
+        replies = []
+        for _ in commands:
+            try:
+                replies.append(self.read_reply())
+            except RespError as e:
+                replies.append(e)
+        return replies
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RespConnectionPool:
+    """
+    线程安全的连接池
+    空闲连接后进先出复用，连接数达到上限时等待归还；出错的连接直接关闭不再归还
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: Optional[str] = None,
+        db: int = 0,
+        max_connections: int = 16,
+        timeout: float = 2.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.password = password
+        self.db = db
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[RespConnection]" = queue.LifoQueue()
+        self._created = 0
+        # 归还连接或释放名额（连接损坏、建连失败）时通知等待者
+        self._cond = threading.Condition()
+
+    def acquire(self) -> RespConnection:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                try:
+                    return self._idle.get_nowait()
+                except queue.Empty:
+                    pass
+                if self._created < self.max_connections:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionError("缓存连接池已耗尽")
+                self._cond.wait(remaining)
+        # 在锁外建连，不阻塞其他线程取用空闲连接
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _connect(self) -> RespConnection:
+        conn = RespConnection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            for reply in conn.execute(setup):
+                if isinstance(reply, RespError):
+                    conn.close()
+                    raise reply
+        return conn
+
+    def release(self, conn: RespConnection, broken: bool = False) -> None:
+        if broken:
+            conn.close()
+        with self._cond:
+            if broken:
+                self._created -= 1
+            else:
+                self._idle.put(conn)
+            self._cond.notify()
+
+    def execute(self, commands: List[Tuple]) -> list:
+        conn = self.acquire()
+        try:
+            replies = conn.execute(commands)
+        except (OSError, ConnectionError, ValueError):
+            self.release(conn, broken=True)
+            raise
+        self.release(conn)
+        return replies
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class RedisCache(BaseCache):
+    """
+    Redis协议的远程缓存，多个SCF容器共享同一份缓存
+    使用阻塞socket连接池而非asyncio连接：SCF入口每次调用都新建事件循环，
+    绑定在事件循环上的异步连接无法跨调用复用
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "grade-query:", max_connections: int = 16, timeout: float = 2.0) -> None:
+        super().__init__()
+        parsed = urlparse(url)
+        self.url = f"{parsed.scheme}://{parsed.hostname}:{parsed.port or 6379}"
+        self.key_prefix = key_prefix
+        self.pool = RespConnectionPool(
+            host=parsed.hostname or "127.0.0.1",
+            port=parsed.port or 6379,
+            password=unquote(parsed.password) if parsed.password else None,
+            db=int(parsed.path.lstrip("/") or 0),
+            max_connections=max_connections,
+            timeout=timeout,
+        )
+
+    def _execute(self, commands: List[Tuple], action: str) -> Optional[list]:
+        try:
+            return self.pool.execute(commands)
+        except (OSError, ConnectionError, ValueError, RespError) as e:
+            # 建连时AUTH/SELECT失败返回RespError，同样退化为未命中
+            logger.warning("%s远程缓存失败: %s", action, e)
+            return None
+
+    @staticmethod
+    def _decode(value) -> Optional[str]:
+        if value is None or isinstance(value, RespError):
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    def get(self, key: str) -> Optional[str]:
+        replies = self._execute([("GET", self.key_prefix + key)], "读取")
+        value = self._decode(replies[0]) if replies else None
+        self._count(value is not None)
+        return value
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._execute([("SET", self.key_prefix + key, value, "EX", max(1, math.ceil(ttl)))], "写入")
+
+    def delete(self, key: str) -> None:
+        self._execute([("DEL", self.key_prefix + key)], "删除")
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        replies = self._execute([("MGET", *[self.key_prefix + key for key in keys])], "批量读取")
+        values = replies[0] if replies and isinstance(replies[0], list) else [None] * len(keys)
+        result = {}
+        for key, raw in zip(keys, values):
+            value = self._decode(raw)
+            self._count(value is not None)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def set_many(self, items: Dict[str, str], ttl: float) -> None:
+        if not items or ttl <= 0:
+            return
+        # 管道化的SET EX：一次往返写入全部键，且每个键都带过期时间（MSET不支持TTL）
+        seconds = max(1, math.ceil(ttl))
+        self._execute(
+            [("SET", self.key_prefix + key, value, "EX", seconds) for key, value in items.items()],
+            "批量写入",
+        )
+
+    def stats(self) -> Dict[str, object]:
+        # DBSIZE统计的是整个库的键数，不区分key_prefix，与其他服务共用一个库时会偏大
+        replies = self._execute([("DBSIZE",)], "统计")
+        db_keys = replies[0] if replies and isinstance(replies[0], int) else None
+        return {**super().stats(), "db_keys": db_keys, "url": self.url}
+
+
+def create_cache(
+    backend: str,
+    max_bytes: int,
+    sqlite_path: str,
+    redis_url: str = "",
+    redis_key_prefix: str = "grade-query:",
+    codec: Optional[ValueCodec] = None,
+    eviction_sample: int = 1,
+) -> BaseCache:
+    """按配置创建缓存后端；codec只用于进程内缓存，跨进程的后端保存原始字符串"""
+    if backend == "sqlite":
+        return SQLiteCache(path=sqlite_path, max_bytes=max_bytes)
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("CACHE_BACKEND=redis时必须配置REDIS_URL")
+        return RedisCache(url=redis_url, key_prefix=redis_key_prefix)
+    if backend != "memory":
+        raise ValueError(f"不支持的缓存后端: {backend}")
+    return MemoryCache(max_bytes=max_bytes, codec=codec, eviction_sample=eviction_sample)
@@ -6,6 +6,7 @@ from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.errors import ServerErrorMiddleware
 from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.middleware.hooks import HOOK_MIDDLEWARE
 from starlette.requests import Request
 from starlette.responses import Response
 from starlette.routing import BaseRoute, Router
@@ -250,12 +251,16 @@ class Starlette:
             "Refer to https://www.starlette.io/middleware/#using-middleware for recommended approach.",  # noqa: E501
             DeprecationWarning,
         )
-        assert (
-            middleware_type == "http"
-        ), 'Currently only middleware("http") is supported.'
+        assert middleware_type == "http" or middleware_type in HOOK_MIDDLEWARE, (
+            'Currently only middleware("http"), middleware("request") and '
+            'middleware("response") are supported.'
+        )
 
         def decorator(func: typing.Callable) -> typing.Callable:
-            self.add_middleware(BaseHTTPMiddleware, dispatch=func)
+            if middleware_type == "http":
+                self.add_middleware(BaseHTTPMiddleware, dispatch=func)
+            else:
+                self.add_middleware(HOOK_MIDDLEWARE[middleware_type], hook=func)
             return func
 
         return decorator
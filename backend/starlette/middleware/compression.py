@@ -0,0 +1,368 @@
+import typing
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli  # type: ignore[no-redef]
+    except ImportError:
+        brotli = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore[assignment]
+
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+# zlib with wbits=31 writes the gzip container (header and CRC trailer)
+_GZIP_WBITS = 31
+
+
+def available_encodings() -> typing.Tuple[str, ...]:
+    """The content codings that can be produced, by default preference."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def parse_accept_encoding(accept_encoding: str) -> typing.Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its quality value."""
+    qualities: typing.Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def negotiate_encoding(
+    accept_encoding: str, encodings: typing.Sequence[str]
+) -> typing.Optional[str]:
+    """
+    Pick the coding from `encodings` the client accepts with the highest
+    quality, ties going to the earlier one. `None` means identity.
+    """
+    if not accept_encoding:
+        return None
+    qualities = parse_accept_encoding(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    best: typing.Optional[str] = None
+    best_quality = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _Compressor:
+    """Incremental compressor that can flush a complete block at any point."""
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+        elif encoding == "br":
+            self._brotli = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+        else:  # pragma: no cover
+            raise ValueError(f"Unsupported content coding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress `data` and flush it, so the client can decode it right away."""
+        if self.encoding == "gzip":
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zstd.compress(data) + self._zstd.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "gzip":
+            return self._zlib.compress(data) + self._zlib.flush()
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zstd.compress(data) + self._zstd.flush()
+
+
+class CompressionRule:
+    """
+    How responses of a content type are compressed: the minimum size of a
+    non-streaming body worth compressing, and levels per content coding that
+    override the middleware defaults.
+    """
+
+    def __init__(
+        self,
+        minimum_size: typing.Optional[int] = None,
+        levels: typing.Optional[typing.Mapping[str, int]] = None,
+    ) -> None:
+        self.minimum_size = minimum_size
+        self.levels = dict(levels or {})
+
+
+# Media types that are already compressed. Rules are matched by exact media
+# type first, then by prefix ("image/"), a `None` rule disables compression.
+DEFAULT_CONTENT_TYPES: typing.Dict[str, typing.Optional[CompressionRule]] = {
+    "image/": None,
+    "image/svg+xml": CompressionRule(),
+    "audio/": None,
+    "video/": None,
+    "font/woff": None,
+    "font/woff2": None,
+    "application/gzip": None,
+    "application/zip": None,
+    "application/zstd": None,
+    "application/octet-stream": None,
+}
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best content coding both sides support:
+    zstd (with `zstandard` installed), br (with `brotli` or `brotlicffi`) or
+    gzip, in the order of `encodings`.
+
+    Levels and the minimum body size can be set per content type through
+    `content_types`. Streaming responses are compressed chunk by chunk and
+    each chunk is flushed, so server-sent events and other incremental
+    responses reach the client without waiting for the compressor buffer.
+
+    Responses that already have a Content-Encoding are sent untouched, which
+    is how endpoints serve precompressed bodies (see `PrecompressedResponse`).
+    Partial (206) responses and responses with `Cache-Control: no-transform`
+    are not compressed either. Every other response gets
+    `Vary: Accept-Encoding`, including those sent uncompressed because the
+    client accepts none of the codings or the body is below the minimum size,
+    so shared caches don't serve one client's representation to another.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        encodings: typing.Optional[typing.Sequence[str]] = None,
+        levels: typing.Optional[typing.Mapping[str, int]] = None,
+        content_types: typing.Optional[
+            typing.Mapping[str, typing.Optional[CompressionRule]]
+        ] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        available = available_encodings()
+        self.encodings = tuple(
+            encoding
+            for encoding in (encodings or available)
+            if encoding in available
+        )
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.content_types = {**DEFAULT_CONTENT_TYPES, **(content_types or {})}
+        self._rules: typing.Dict[str, typing.Optional[CompressionRule]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            encoding = negotiate_encoding(
+                headers.get("accept-encoding", ""), self.encodings
+            )
+            responder = CompressionResponder(self.app, self, encoding)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def rule_for(self, content_type: str) -> typing.Optional[CompressionRule]:
+        """The rule for a Content-Type header value, `None` to not compress."""
+        media_type = content_type.partition(";")[0].strip().lower()
+        try:
+            return self._rules[media_type]
+        except KeyError:
+            pass
+        rule: typing.Optional[CompressionRule] = CompressionRule()
+        if media_type in self.content_types:
+            rule = self.content_types[media_type]
+        else:
+            prefix = media_type.partition("/")[0] + "/"
+            if prefix in self.content_types:
+                rule = self.content_types[prefix]
+        # Content types come from the application, so this stays small
+        self._rules[media_type] = rule
+        return rule
+
+
+def _vary_on_accept_encoding(headers: MutableHeaders) -> None:
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in [name.strip().lower() for name in vary.split(",")]:
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        middleware: CompressionMiddleware,
+        encoding: typing.Optional[str],
+    ) -> None:
+        self.app = app
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send: Send = unattached_send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor: typing.Optional[_Compressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _start(self, message: Message) -> typing.Optional[CompressionRule]:
+        # The rule to compress this response with, or None to pass it through
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers or message.get("status") == 206:
+            return None
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return None
+        return self.middleware.rule_for(headers.get("content-type", ""))
+
+    def _set_headers(self, content_length: typing.Optional[int]) -> None:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
+        _vary_on_accept_encoding(headers)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # The compressed body is a different representation
+            headers["ETag"] = "W/" + etag
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Don't send the initial message until we've determined how to
+            # modify the outgoing headers correctly.
+            self.initial_message = message
+            return
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            rule = self._start(self.initial_message)
+            minimum_size = self.middleware.minimum_size
+            if rule is not None and rule.minimum_size is not None:
+                minimum_size = rule.minimum_size
+            if (
+                rule is None
+                or self.encoding is None
+                or (not more_body and len(body) < minimum_size)
+            ):
+                self.passthrough = True
+                if rule is not None:
+                    # Eligible, so another request may get it compressed
+                    _vary_on_accept_encoding(
+                        MutableHeaders(raw=self.initial_message["headers"])
+                    )
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            level = rule.levels.get(
+                self.encoding, self.middleware.levels[self.encoding]
+            )
+            self.compressor = _Compressor(self.encoding, level)
+            if not more_body:
+                body = self.compressor.finish(body)
+                self._set_headers(len(body))
+            else:
+                body = self.compressor.compress(body)
+                self._set_headers(None)
+            await self.send(self.initial_message)
+            await self.send({**message, "body": body})
+            return
+        assert self.compressor is not None
+        if more_body:
+            body = self.compressor.compress(body)
+        else:
+            body = self.compressor.finish(body)
+        await self.send({**message, "body": body})
+
+
+class PrecompressedResponse(Response):
+    """
+    A response with bodies compressed ahead of time, e.g. kept compressed in
+    a cache. The variant matching the request's Accept-Encoding is sent as
+    is, with a Content-Encoding header that makes `CompressionMiddleware`
+    leave it alone; otherwise `content` is sent (and may still be compressed
+    by the middleware).
+
+    `variants` maps content codings ("gzip", "br", "zstd") to the body in
+    that coding.
+    """
+
+    def __init__(
+        self,
+        content: typing.Any = None,
+        status_code: int = 200,
+        headers: typing.Optional[typing.Mapping[str, str]] = None,
+        media_type: typing.Optional[str] = None,
+        variants: typing.Optional[typing.Mapping[str, bytes]] = None,
+    ) -> None:
+        self.variants = dict(variants or {})
+        super().__init__(content, status_code, headers, media_type)
+        if self.variants:
+            self.headers.add_vary_header("Accept-Encoding")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, tuple(self.variants))
+        body = self.body
+        raw_headers = self.raw_headers
+        if encoding is not None:
+            body = self.variants[encoding]
+            headers = MutableHeaders(raw=list(raw_headers))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            raw_headers = headers.raw
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": raw_headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+        if self.background is not None:
+            await self.background()
+
+
+async def unattached_send(message: Message) -> typing.NoReturn:
+    raise RuntimeError("send awaitable not set")  # pragma: no cover
@@ -9,8 +9,48 @@ from starlette.types import ASGIApp, Message, Receive, Scope, Send
 ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
 SAFELISTED_HEADERS = {"Accept", "Accept-Language", "Content-Language", "Content-Type"}
 
+RawHeaders = typing.Tuple[typing.Tuple[bytes, bytes], ...]
+
+# Response headers the middleware sets, when the app already set one of them
+# the headers are merged one by one instead of appending a precomputed block
+CORS_RESPONSE_HEADERS = frozenset(
+    {
+        b"access-control-allow-origin",
+        b"access-control-allow-credentials",
+        b"access-control-expose-headers",
+    }
+)
+
+
+def encode_headers(headers: typing.Mapping[str, str]) -> RawHeaders:
+    return tuple(
+        (key.lower().encode("latin-1"), value.encode("latin-1"))
+        for key, value in headers.items()
+    )
+
+
+class _RawResponse(Response):
+    """A response with its status, headers and body already encoded."""
+
+    def __init__(
+        self, status_code: int, raw_headers: typing.List[typing.Tuple[bytes, bytes]]
+    ) -> None:
+        self.status_code = status_code
+        self.raw_headers = raw_headers
+        self.body = b"OK"
+        self.background = None
+
 
 class CORSMiddleware:
+    """
+    Header blocks for simple and preflight responses are encoded once per
+    configuration; a request only adds its origin (and, with
+    `allow_headers=["*"]`, its requested headers) to them. Preflight requests
+    are answered without calling the app, with `Access-Control-Max-Age` set to
+    `max_age` so browsers cache them. Origins matched against
+    `allow_origin_regex` are memoized, for at most `origin_cache_size` origins.
+    """
+
     def __init__(
         self,
         app: ASGIApp,
@@ -21,6 +61,7 @@ class CORSMiddleware:
         allow_origin_regex: typing.Optional[str] = None,
         expose_headers: typing.Sequence[str] = (),
         max_age: int = 600,
+        origin_cache_size: int = 1024,
     ) -> None:
         if "*" in allow_methods:
             allow_methods = ALL_METHODS
@@ -70,6 +111,27 @@ class CORSMiddleware:
         self.simple_headers = simple_headers
         self.preflight_headers = preflight_headers
 
+        self.allow_origins_set = frozenset(allow_origins)
+        self.allow_methods_set = frozenset(allow_methods)
+        self.allow_headers_set = frozenset(self.allow_headers)
+        self.match_origin_regex = functools.lru_cache(maxsize=origin_cache_size)(
+            self._match_origin_regex
+        )
+        # Simple responses: the configured headers as they are (with
+        # "Access-Control-Allow-Origin: *" when all origins are allowed), or
+        # without an origin, for responses that mirror the request's origin
+        self.simple_raw_headers = encode_headers(simple_headers)
+        self.explicit_origin_raw_headers = encode_headers(
+            {
+                key: value
+                for key, value in simple_headers.items()
+                if key != "Access-Control-Allow-Origin"
+            }
+        )
+        self.preflight_raw_headers: RawHeaders = tuple(
+            PlainTextResponse("OK", headers=preflight_headers).raw_headers
+        )
+
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":  # pragma: no cover
             await self.app(scope, receive, send)
@@ -94,22 +156,51 @@ class CORSMiddleware:
         if self.allow_all_origins:
             return True
 
-        if self.allow_origin_regex is not None and self.allow_origin_regex.fullmatch(
-            origin
-        ):
+        if origin in self.allow_origins_set:
             return True
 
-        return origin in self.allow_origins
+        return self.allow_origin_regex is not None and self.match_origin_regex(origin)
+
+    def _match_origin_regex(self, origin: str) -> bool:
+        assert self.allow_origin_regex is not None
+        return self.allow_origin_regex.fullmatch(origin) is not None
 
     def preflight_response(self, request_headers: Headers) -> Response:
         requested_origin = request_headers["origin"]
         requested_method = request_headers["access-control-request-method"]
         requested_headers = request_headers.get("access-control-request-headers")
 
+        allowed_origin = self.is_allowed_origin(origin=requested_origin)
+        if (
+            allowed_origin
+            and requested_method in self.allow_methods_set
+            and (
+                requested_headers is None
+                or self.allow_all_headers
+                or all(
+                    header.strip() in self.allow_headers_set
+                    for header in requested_headers.lower().split(",")
+                )
+            )
+        ):
+            raw_headers = list(self.preflight_raw_headers)
+            if self.preflight_explicit_allow_origin:
+                raw_headers.append(
+                    (b"access-control-allow-origin", requested_origin.encode("latin-1"))
+                )
+            if self.allow_all_headers and requested_headers is not None:
+                raw_headers.append(
+                    (
+                        b"access-control-allow-headers",
+                        requested_headers.encode("latin-1"),
+                    )
+                )
+            return _RawResponse(200, raw_headers)
+
         headers = dict(self.preflight_headers)
         failures = []
 
-        if self.is_allowed_origin(origin=requested_origin):
+        if allowed_origin:
             if self.preflight_explicit_allow_origin:
                 # The "else" case is already accounted for in self.preflight_headers
                 # and the value would be "*".
@@ -117,7 +208,7 @@ class CORSMiddleware:
         else:
             failures.append("origin")
 
-        if requested_method not in self.allow_methods:
+        if requested_method not in self.allow_methods_set:
             failures.append("method")
 
         # If we allow all headers, then we have to mirror back any requested
@@ -126,7 +217,7 @@ class CORSMiddleware:
             headers["Access-Control-Allow-Headers"] = requested_headers
         elif requested_headers is not None:
             for header in [h.lower() for h in requested_headers.split(",")]:
-                if header.strip() not in self.allow_headers:
+                if header.strip() not in self.allow_headers_set:
                     failures.append("headers")
                     break
 
@@ -152,23 +243,38 @@ class CORSMiddleware:
             await send(message)
             return
 
-        message.setdefault("headers", [])
-        headers = MutableHeaders(scope=message)
-        headers.update(self.simple_headers)
         origin = request_headers["Origin"]
         has_cookie = "cookie" in request_headers
 
         # If request includes any cookie headers, then we must respond
         # with the specific origin instead of '*'.
-        if self.allow_all_origins and has_cookie:
-            self.allow_explicit_origin(headers, origin)
-
         # If we only allow specific origins, then we have to mirror back
         # the Origin header in the response.
-        elif not self.allow_all_origins and self.is_allowed_origin(origin=origin):
-            self.allow_explicit_origin(headers, origin)
+        if self.allow_all_origins:
+            explicit_origin = has_cookie
+        else:
+            explicit_origin = self.is_allowed_origin(origin=origin)
+
+        raw_headers = message.get("headers") or []
+        if any(key in CORS_RESPONSE_HEADERS for key, _ in raw_headers) or (
+            explicit_origin and any(key == b"vary" for key, _ in raw_headers)
+        ):
+            headers = MutableHeaders(raw=list(raw_headers))
+            headers.update(self.simple_headers)
+            if explicit_origin:
+                self.allow_explicit_origin(headers, origin)
+            raw_headers = headers.raw
+        elif explicit_origin:
+            raw_headers = [
+                *raw_headers,
+                *self.explicit_origin_raw_headers,
+                (b"access-control-allow-origin", origin.encode("latin-1")),
+                (b"vary", b"Origin"),
+            ]
+        else:
+            raw_headers = [*raw_headers, *self.simple_raw_headers]
 
-        await send(message)
+        await send({**message, "headers": raw_headers})
 
     @staticmethod
     def allow_explicit_origin(headers: MutableHeaders, origin: str) -> None:
@@ -0,0 +1,148 @@
+import typing
+from collections import deque
+
+from starlette._utils import is_async_callable
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ResponseHead:
+    """
+    The status code and headers of a response, before they are sent.
+    Response hooks modify them in place.
+    """
+
+    __slots__ = ("status_code", "headers")
+
+    def __init__(self, status_code: int, headers: MutableHeaders) -> None:
+        self.status_code = status_code
+        self.headers = headers
+
+
+RequestHook = typing.Callable[
+    [Request],
+    typing.Union[
+        typing.Optional[Response], typing.Awaitable[typing.Optional[Response]]
+    ],
+]
+ResponseHook = typing.Callable[
+    [Request, ResponseHead], typing.Union[None, typing.Awaitable[None]]
+]
+
+
+def _recording_receive(
+    receive: Receive,
+) -> typing.Tuple[Receive, typing.List[Message]]:
+    # Keep every message the request hook receives, however it reads them:
+    # `request.body()`, `request.stream()` or `request.is_disconnected()`
+    messages: typing.List[Message] = []
+
+    async def recording_receive() -> Message:
+        message = await receive()
+        messages.append(message)
+        return message
+
+    return recording_receive, messages
+
+
+def _replay(messages: typing.List[Message], receive: Receive) -> Receive:
+    # The app gets the messages the hook consumed first, then the rest
+    pending = deque(messages)
+
+    async def wrapped_receive() -> Message:
+        if pending:
+            return pending.popleft()
+        return await receive()
+
+    return wrapped_receive
+
+
+class RequestHookMiddleware:
+    """
+    Run `hook(request)` before the app. If it returns a response, that response
+    is sent and the app is not called, e.g. to reject unauthenticated requests.
+
+    Unlike `BaseHTTPMiddleware`, this is plain ASGI: the app runs in the same
+    task, with the original `receive` and `send`, so there are no streams or
+    task groups per request and streaming responses keep their backpressure.
+    Sync hooks are run in the threadpool.
+
+    The hook may read the request body, with `request.body()` or by iterating
+    `request.stream()`, in full or in part. Whatever it read is replayed to
+    the app before the rest of the body.
+    """
+
+    def __init__(self, app: ASGIApp, hook: RequestHook) -> None:
+        self.app = app
+        self.hook = hook
+        self.is_async = is_async_callable(hook)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        hook_receive, consumed = _recording_receive(receive)
+        request = Request(scope, hook_receive)
+        if self.is_async:
+            response = await self.hook(request)  # type: ignore[misc]
+        else:
+            response = await run_in_threadpool(self.hook, request)
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        if consumed:
+            receive = _replay(consumed, receive)
+        await self.app(scope, receive, send)
+
+
+class ResponseHookMiddleware:
+    """
+    Run `hook(request, head)` when the app starts its response, where `head`
+    is the `ResponseHead` about to be sent, e.g. to add headers or to log the
+    status code. The body is passed through untouched, chunk by chunk.
+
+    Like `RequestHookMiddleware`, this is plain ASGI. Sync hooks are run in
+    the threadpool.
+    """
+
+    def __init__(self, app: ASGIApp, hook: ResponseHook) -> None:
+        self.app = app
+        self.hook = hook
+        self.is_async = is_async_callable(hook)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Copy the headers, responses may reuse their list between calls
+                head = ResponseHead(
+                    message["status"], MutableHeaders(raw=list(message["headers"]))
+                )
+                if self.is_async:
+                    await self.hook(request, head)  # type: ignore[misc]
+                else:
+                    await run_in_threadpool(self.hook, request, head)
+                message = {
+                    **message,
+                    "status": head.status_code,
+                    "headers": head.headers.raw,
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Middleware classes for the hook types of the `middleware` decorators
+HOOK_MIDDLEWARE: typing.Dict[str, typing.Type[typing.Any]] = {
+    "request": RequestHookMiddleware,
+    "response": ResponseHookMiddleware,
+}
@@ -1,6 +1,7 @@
 import http.cookies
 import json
 import os
+import re
 import stat
 import sys
 import typing
@@ -8,6 +9,7 @@ from datetime import datetime
 from email.utils import format_datetime, formatdate
 from functools import partial
 from mimetypes import guess_type as mimetypes_guess_type
+from secrets import token_hex
 from urllib.parse import quote
 
 import anyio
@@ -15,7 +17,7 @@ import anyio
 from starlette._compat import md5_hexdigest
 from starlette.background import BackgroundTask
 from starlette.concurrency import iterate_in_threadpool
-from starlette.datastructures import URL, MutableHeaders
+from starlette.datastructures import URL, Headers, MutableHeaders
 from starlette.types import Receive, Scope, Send
 
 if sys.version_info >= (3, 8):  # pragma: no cover
@@ -280,7 +282,79 @@ class StreamingResponse(Response):
             await self.background()
 
 
+_CRLF = "\r\n"
+
+# "first-last", "first-" or "-suffix_length" in a Range header
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def parse_range_header(
+    value: str, size: int, max_ranges: int = 100
+) -> typing.Optional[typing.List[typing.Tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header against a representation of `size`
+    bytes into sorted, coalesced, inclusive `(start, end)` pairs.
+
+    Returns `None` when the header should be ignored (another unit, a
+    malformed or an excessive header), and an empty list when no range is
+    satisfiable.
+    """
+    unit, _, specs = value.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges: typing.List[typing.Tuple[int, int]] = []
+    seen = 0
+    for spec in specs.split(","):
+        if not spec.strip():
+            continue
+        seen += 1
+        match = _RANGE_SPEC.match(spec)
+        if match is None:
+            return None
+        first, last = match.groups()
+        if not first:
+            if not last:
+                return None
+            suffix_length = int(last)
+            if suffix_length > 0 and size > 0:
+                ranges.append((max(size - suffix_length, 0), size - 1))
+            continue
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    if not seen or seen > max_ranges:
+        return None
+    ranges.sort()
+    coalesced: typing.List[typing.Tuple[int, int]] = []
+    for start, end in ranges:
+        if coalesced and start <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(coalesced[-1][1], end))
+        else:
+            coalesced.append((start, end))
+    return coalesced
+
+
 class FileResponse(Response):
+    """
+    Send a file from disk.
+
+    `Range` requests (honoured for 200 responses, and subject to `If-Range`)
+    are answered with a 206 response, or a `multipart/byteranges` body for
+    several ranges. When the server supports the ASGI `http.response.pathsend`
+    or `http.response.zerocopysend` extension, the file is handed over to the
+    server (which can use `sendfile`) instead of being read into Python.
+
+    The file is opened before the response starts. If it changed since
+    `stat_result` was taken (e.g. by a cache), the headers derived from it are
+    updated, so `Content-Length` matches the bytes sent. `file` is an already
+    open binary file to send instead of opening `path`, e.g. one that may be
+    unlinked in the meantime; it is closed once sent, and `pathsend` is not
+    used for it.
+    """
+
     chunk_size = 64 * 1024
 
     def __init__(
@@ -294,8 +368,10 @@ class FileResponse(Response):
         stat_result: typing.Optional[os.stat_result] = None,
         method: typing.Optional[str] = None,
         content_disposition_type: str = "attachment",
+        file: typing.Optional[typing.BinaryIO] = None,
     ) -> None:
         self.path = path
+        self.file = file
         self.status_code = status_code
         self.filename = filename
         self.send_header_only = method is not None and method.upper() == "HEAD"
@@ -319,27 +395,108 @@ class FileResponse(Response):
         if stat_result is not None:
             self.set_stat_headers(stat_result)
 
-    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+    def stat_headers(self, stat_result: os.stat_result) -> typing.Dict[str, str]:
         content_length = str(stat_result.st_size)
         last_modified = formatdate(stat_result.st_mtime, usegmt=True)
         etag_base = str(stat_result.st_mtime) + "-" + str(stat_result.st_size)
         etag = md5_hexdigest(etag_base.encode(), usedforsecurity=False)
+        return {
+            "content-length": content_length,
+            "last-modified": last_modified,
+            "etag": etag,
+        }
 
-        self.headers.setdefault("content-length", content_length)
-        self.headers.setdefault("last-modified", last_modified)
-        self.headers.setdefault("etag", etag)
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        for key, value in self.stat_headers(stat_result).items():
+            self.headers.setdefault(key, value)
+        if self.status_code == 200:
+            self.headers.setdefault("accept-ranges", "bytes")
+
+    def update_stat_headers(self, stat_result: os.stat_result) -> None:
+        """
+        Replace the headers derived from an outdated `self.stat_result`.
+        Headers that were given explicitly are kept.
+        """
+        assert self.stat_result is not None
+        outdated = self.stat_headers(self.stat_result)
+        for key, value in self.stat_headers(stat_result).items():
+            if self.headers.get(key) == outdated[key]:
+                self.headers[key] = value
+        self.stat_result = stat_result
+
+    def open_file(self) -> typing.Tuple[typing.BinaryIO, os.stat_result]:
+        file = self.file if self.file is not None else open(self.path, "rb")
+        try:
+            return file, os.fstat(file.fileno())
+        except BaseException:
+            file.close()
+            raise
+
+    def requested_ranges(
+        self, scope: Scope, size: int
+    ) -> typing.Optional[typing.List[typing.Tuple[int, int]]]:
+        """
+        The byte ranges to send, `None` for the whole file. An empty list
+        means the requested ranges can't be satisfied.
+        """
+        if self.status_code != 200:
+            return None
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        if http_range is None:
+            return None
+        if_range = headers.get("if-range")
+        if if_range is not None and if_range.strip() not in (
+            self.headers.get("etag"),
+            self.headers.get("last-modified"),
+        ):
+            # The client's copy is stale, so it gets the whole file
+            return None
+        return parse_range_header(http_range, size)
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        if self.stat_result is None:
-            try:
-                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+        try:
+            if self.file is not None:
+                file, stat_result = self.open_file()
+            else:
+                file, stat_result = await anyio.to_thread.run_sync(self.open_file)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        except IsADirectoryError:
+            raise RuntimeError(f"File at path {self.path} is not a file.")
+        async with anyio.wrap_file(file) as async_file:
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            if self.stat_result is None:
+                self.stat_result = stat_result
                 self.set_stat_headers(stat_result)
-            except FileNotFoundError:
-                raise RuntimeError(f"File at path {self.path} does not exist.")
+            elif (stat_result.st_size, stat_result.st_mtime) != (
+                self.stat_result.st_size,
+                self.stat_result.st_mtime,
+            ):
+                # The file changed since `stat_result` was taken
+                self.update_stat_headers(stat_result)
+            size = stat_result.st_size
+            ranges = self.requested_ranges(scope, size)
+            extensions = scope.get("extensions") or {}
+            pathsend = self.file is None and "http.response.pathsend" in extensions
+            zerocopy = "http.response.zerocopysend" in extensions
+            if ranges is None:
+                await self.send_file(send, async_file, pathsend, zerocopy)
+            elif not ranges:
+                await self.send_not_satisfiable(send, size)
             else:
-                mode = stat_result.st_mode
-                if not stat.S_ISREG(mode):
-                    raise RuntimeError(f"File at path {self.path} is not a file.")
+                await self.send_ranges(send, async_file, ranges, size, zerocopy)
+        if self.background is not None:
+            await self.background()
+
+    async def send_file(
+        self,
+        send: Send,
+        file: "anyio.AsyncFile[bytes]",
+        pathsend: bool,
+        zerocopy: bool,
+    ) -> None:
         await send(
             {
                 "type": "http.response.start",
@@ -349,18 +506,135 @@ class FileResponse(Response):
         )
         if self.send_header_only:
             await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif pathsend:
+            path = os.path.abspath(os.fspath(self.path))
+            await send({"type": "http.response.pathsend", "path": path})
+        elif zerocopy:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped,
+                    "more_body": False,
+                }
+            )
         else:
-            async with await anyio.open_file(self.path, mode="rb") as file:
-                more_body = True
-                while more_body:
-                    chunk = await file.read(self.chunk_size)
-                    more_body = len(chunk) == self.chunk_size
-                    await send(
-                        {
-                            "type": "http.response.body",
-                            "body": chunk,
-                            "more_body": more_body,
-                        }
-                    )
-        if self.background is not None:
-            await self.background()
+            more_body = True
+            while more_body:
+                chunk = await file.read(self.chunk_size)
+                more_body = len(chunk) == self.chunk_size
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": more_body,
+                    }
+                )
+
+    async def send_not_satisfiable(self, send: Send, size: int) -> None:
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        for key in ("content-type", "content-encoding"):
+            if key in headers:
+                del headers[key]
+        headers["content-range"] = f"bytes */{size}"
+        headers["content-length"] = "0"
+        await send(
+            {"type": "http.response.start", "status": 416, "headers": headers.raw}
+        )
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send_ranges(
+        self,
+        send: Send,
+        file: "anyio.AsyncFile[bytes]",
+        ranges: typing.List[typing.Tuple[int, int]],
+        size: int,
+        zerocopy: bool,
+    ) -> None:
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            parts = [(b"", start, end)]
+            trailer = b""
+        else:
+            boundary = token_hex(13)
+            content_type = headers.get("content-type", "application/octet-stream")
+            parts = [
+                (
+                    (
+                        f"{_CRLF if i else ''}--{boundary}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                    ).encode("latin-1"),
+                    start,
+                    end,
+                )
+                for i, (start, end) in enumerate(ranges)
+            ]
+            trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            content_length = len(trailer) + sum(
+                len(part_header) + end - start + 1
+                for part_header, start, end in parts
+            )
+            headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            headers["content-length"] = str(content_length)
+        await send(
+            {"type": "http.response.start", "status": 206, "headers": headers.raw}
+        )
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        for part_header, start, end in parts:
+            if part_header:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": part_header,
+                        "more_body": True,
+                    }
+                )
+            await self.send_range(
+                send, file, start, end - start + 1, bool(trailer), zerocopy
+            )
+        if trailer:
+            await send(
+                {"type": "http.response.body", "body": trailer, "more_body": False}
+            )
+
+    async def send_range(
+        self,
+        send: Send,
+        file: "anyio.AsyncFile[bytes]",
+        offset: int,
+        count: int,
+        more_body: bool,
+        zerocopy: bool,
+    ) -> None:
+        if zerocopy:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": more_body,
+                }
+            )
+            return
+        await file.seek(offset)
+        while count > 0:
+            chunk = await file.read(min(self.chunk_size, count))
+            if not chunk:
+                # The file was truncated after its size was taken
+                break
+            count -= len(chunk)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": more_body or count > 0,
+                }
+            )
+        if count > 0 and not more_body:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
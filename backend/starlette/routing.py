@@ -572,6 +572,136 @@ class _DefaultLifespan:
         return self
 
 
+class _RouteList(list):
+    """
+    A list of routes that counts in-place modifications, so that a router can
+    tell when its dispatch index is stale. Routes are commonly registered by
+    appending to `router.routes` directly.
+    """
+
+    version = 0
+
+
+def _counting_mutator(name: str) -> typing.Callable:
+    method = getattr(list, name)
+
+    def mutator(self: _RouteList, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutator.__name__ = name
+    return mutator
+
+
+for _name in (
+    "append",
+    "extend",
+    "insert",
+    "remove",
+    "pop",
+    "clear",
+    "sort",
+    "reverse",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+):
+    setattr(_RouteList, _name, _counting_mutator(_name))
+
+
+class _SegmentNode:
+    __slots__ = ("literal", "param", "positions")
+
+    def __init__(self) -> None:
+        self.literal: typing.Dict[str, "_SegmentNode"] = {}
+        self.param: typing.Optional["_SegmentNode"] = None
+        self.positions: typing.List[int] = []
+
+    def collect(
+        self, segments: typing.List[str], depth: int, into: typing.List[int]
+    ) -> None:
+        if depth == len(segments):
+            into.extend(self.positions)
+            return
+        child = self.literal.get(segments[depth])
+        if child is not None:
+            child.collect(segments, depth + 1, into)
+        if self.param is not None:
+            self.param.collect(segments, depth + 1, into)
+
+
+class _DispatchIndex:
+    """
+    Narrows the routes that need to be tried for a request path, while
+    preserving the router's first-match-in-registration-order semantics.
+
+    * `Route` paths without parameters go into a hash map keyed by path.
+    * `Route` paths whose parameters each span a whole segment (and are not
+      `:path` parameters) go into a segment trie, with parameters as wildcards.
+    * Everything else (mounts, hosts, `:path` parameters, parameters embedded
+      in a segment, custom route classes) is tried for every request.
+
+    Candidates are still confirmed with `route.matches()`, so the index only
+    ever skips routes whose path regex could not have matched.
+    """
+
+    def __init__(self, routes: typing.Sequence[BaseRoute]) -> None:
+        self.routes = list(routes)
+        self.methods: typing.List[typing.Optional[typing.Set[str]]] = []
+        self.literal: typing.Dict[str, typing.List[int]] = {}
+        self.trie = _SegmentNode()
+        self.always = {"http": [], "websocket": []}  # type: typing.Dict[str, typing.List[int]]
+
+        for position, route in enumerate(self.routes):
+            if isinstance(route, Route):
+                self.methods.append(route.methods)
+                self._index_http_route(position, route)
+            else:
+                self.methods.append(None)
+                if not isinstance(route, WebSocketRoute):
+                    self.always["http"].append(position)
+                self.always["websocket"].append(position)
+
+    def _index_http_route(self, position: int, route: Route) -> None:
+        if not PARAM_REGEX.search(route.path):
+            self.literal.setdefault(route.path, []).append(position)
+            return
+        node = self.trie
+        for segment in route.path.split("/")[1:]:
+            match = PARAM_REGEX.fullmatch(segment)
+            if match is None:
+                if PARAM_REGEX.search(segment):
+                    # A parameter embedded in a segment, eg. "/{name}.json".
+                    self.always["http"].append(position)
+                    return
+                node = node.literal.setdefault(segment, _SegmentNode())
+            elif match.group(2) == ":path":
+                self.always["http"].append(position)
+                return
+            else:
+                if node.param is None:
+                    node.param = _SegmentNode()
+                node = node.param
+        node.positions.append(position)
+
+    def candidates(self, scope: Scope) -> typing.List[int]:
+        """
+        Positions of the routes that may match `scope`, in registration order.
+        """
+        if scope["type"] != "http":
+            return self.always["websocket"]
+        path = scope["path"]
+        # Route regexes end in "$", which also matches before a trailing newline.
+        paths = (path, path[:-1]) if path.endswith("\n") else (path,)
+        positions = list(self.always["http"])
+        for candidate in paths:
+            positions.extend(self.literal.get(candidate, ()))
+            self.trie.collect(candidate.split("/")[1:], 0, positions)
+        positions.sort()
+        return positions
+
+
 class Router:
     def __init__(
         self,
@@ -584,6 +714,8 @@ class Router:
         # which the router cannot know statically, so we use typing.Any
         lifespan: typing.Optional[Lifespan[typing.Any]] = None,
     ) -> None:
+        self._dispatch_index: typing.Optional[_DispatchIndex] = None
+        self._dispatch_version = -1
         self.routes = [] if routes is None else list(routes)
         self.redirect_slashes = redirect_slashes
         self.default = self.not_found if default is None else default
@@ -622,6 +754,23 @@ class Router:
         else:
             self.lifespan_context = lifespan
 
+    @property
+    def routes(self) -> typing.List[BaseRoute]:
+        return self._routes
+
+    @routes.setter
+    def routes(self, routes: typing.Iterable[BaseRoute]) -> None:
+        self._routes = _RouteList(routes)
+        self._dispatch_index = None
+
+    def _get_dispatch_index(self) -> _DispatchIndex:
+        # Rebuilt lazily on the first request after the routes have changed.
+        routes = self._routes
+        if self._dispatch_index is None or self._dispatch_version != routes.version:
+            self._dispatch_index = _DispatchIndex(routes)
+            self._dispatch_version = routes.version
+        return self._dispatch_index
+
     async def not_found(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] == "websocket":
             websocket_close = WebSocketClose()
@@ -707,19 +856,41 @@ class Router:
             await self.lifespan(scope, receive, send)
             return
 
+        index = self._get_dispatch_index()
+        method = scope.get("method")
         partial = None
-
-        for route in self.routes:
+        partial_position = -1
+        deferred = []
+
+        for position in index.candidates(scope):
+            methods = index.methods[position]
+            if methods and method not in methods:
+                # This route can at best be a partial match, so only run its
+                # regex if no other route turns out to be a full match.
+                deferred.append(position)
+                continue
             # Determine if any route matches the incoming scope,
             # and hand over to the matching route if found.
+            route = index.routes[position]
             match, child_scope = route.matches(scope)
             if match == Match.FULL:
                 scope.update(child_scope)
                 await route.handle(scope, receive, send)
                 return
             elif match == Match.PARTIAL and partial is None:
+                partial = route
+                partial_position = position
+                partial_scope = child_scope
+
+        for position in deferred:
+            if partial is not None and partial_position < position:
+                break
+            route = index.routes[position]
+            match, child_scope = route.matches(scope)
+            if match != Match.NONE:
                 partial = route
                 partial_scope = child_scope
+                break
 
         if partial is not None:
             #  Handle partial matches. These are cases where an endpoint is
@@ -736,8 +907,8 @@ class Router:
             else:
                 redirect_scope["path"] = redirect_scope["path"] + "/"
 
-            for route in self.routes:
-                match, child_scope = route.matches(redirect_scope)
+            for position in index.candidates(redirect_scope):
+                match, child_scope = index.routes[position].matches(redirect_scope)
                 if match != Match.NONE:
                     redirect_url = URL(scope=redirect_scope)
                     response = RedirectResponse(url=str(redirect_url))
@@ -1,18 +1,28 @@
 import importlib.util
 import os
 import stat
+import threading
+import time
 import typing
+from collections import OrderedDict
 from email.utils import parsedate
 
 import anyio
 
 from starlette.datastructures import URL, Headers
 from starlette.exceptions import HTTPException
-from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.middleware.compression import negotiate_encoding
+from starlette.responses import FileResponse, RedirectResponse, Response, guess_type
 from starlette.types import Receive, Scope, Send
 
 PathLike = typing.Union[str, "os.PathLike[str]"]
 
+# Content coding -> file name suffix of a precompressed sibling, by preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("zstd", ".zst"), ("gzip", ".gz"))
+
+Variants = typing.Dict[str, typing.Tuple[str, os.stat_result]]
+LookupResult = typing.Tuple[str, typing.Optional[os.stat_result], Variants]
+
 
 class NotModifiedResponse(Response):
     NOT_MODIFIED_HEADERS = (
@@ -36,6 +46,21 @@ class NotModifiedResponse(Response):
 
 
 class StaticFiles:
+    """
+    Serve files from `directory` and the `statics` directories of `packages`.
+
+    With `precompressed=True`, a `.br`, `.zst` or `.gz` file next to the
+    requested one is sent instead when the client accepts that coding.
+
+    With `stat_cache_ttl` set, path lookups (and precompressed sibling
+    lookups) are kept for that many seconds, for at most `stat_cache_size`
+    paths, so repeated requests for the same file skip the lookup. A cached
+    file that was changed is still sent with its current length and
+    validators, since `FileResponse` checks the file it opens. Files added or
+    removed show up once an entry expires, or right away after
+    `clear_stat_cache()`.
+    """
+
     def __init__(
         self,
         *,
@@ -46,6 +71,9 @@ class StaticFiles:
         html: bool = False,
         check_dir: bool = True,
         follow_symlink: bool = False,
+        precompressed: bool = False,
+        stat_cache_ttl: float = 0.0,
+        stat_cache_size: int = 1024,
     ) -> None:
         self.directory = directory
         self.packages = packages
@@ -53,6 +81,13 @@ class StaticFiles:
         self.html = html
         self.config_checked = False
         self.follow_symlink = follow_symlink
+        self.precompressed = precompressed
+        self.stat_cache_ttl = stat_cache_ttl
+        self.stat_cache_size = stat_cache_size
+        self._stat_cache: "OrderedDict[str, typing.Tuple[float, LookupResult]]" = (
+            OrderedDict()
+        )
+        self._stat_cache_lock = threading.Lock()
         if check_dir and directory is not None and not os.path.isdir(directory):
             raise RuntimeError(f"Directory '{directory}' does not exist")
 
@@ -118,9 +153,7 @@ class StaticFiles:
             raise HTTPException(status_code=405)
 
         try:
-            full_path, stat_result = await anyio.to_thread.run_sync(
-                self.lookup_path, path
-            )
+            full_path, stat_result, variants = await self.lookup(path)
         except PermissionError:
             raise HTTPException(status_code=401)
         except OSError:
@@ -128,28 +161,26 @@ class StaticFiles:
 
         if stat_result and stat.S_ISREG(stat_result.st_mode):
             # We have a static file to serve.
-            return self.file_response(full_path, stat_result, scope)
+            return self.file_response(full_path, stat_result, scope, variants=variants)
 
         elif stat_result and stat.S_ISDIR(stat_result.st_mode) and self.html:
             # We're in HTML mode, and have got a directory URL.
             # Check if we have 'index.html' file to serve.
             index_path = os.path.join(path, "index.html")
-            full_path, stat_result = await anyio.to_thread.run_sync(
-                self.lookup_path, index_path
-            )
+            full_path, stat_result, variants = await self.lookup(index_path)
             if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
                 if not scope["path"].endswith("/"):
                     # Directory URLs should redirect to always end in "/".
                     url = URL(scope=scope)
                     url = url.replace(path=url.path + "/")
                     return RedirectResponse(url=url)
-                return self.file_response(full_path, stat_result, scope)
+                return self.file_response(
+                    full_path, stat_result, scope, variants=variants
+                )
 
         if self.html:
             # Check for '404.html' if we're in HTML mode.
-            full_path, stat_result = await anyio.to_thread.run_sync(
-                self.lookup_path, "404.html"
-            )
+            full_path, stat_result, _ = await self.lookup("404.html")
             if stat_result and stat.S_ISREG(stat_result.st_mode):
                 return FileResponse(
                     full_path,
@@ -159,6 +190,58 @@ class StaticFiles:
                 )
         raise HTTPException(status_code=404)
 
+    async def lookup(self, path: str) -> LookupResult:
+        """
+        Look up `path` and its precompressed siblings, from the stat cache
+        when it has a fresh entry.
+        """
+        if self.stat_cache_ttl <= 0:
+            return await anyio.to_thread.run_sync(self.lookup_uncached, path)
+        now = time.monotonic()
+        with self._stat_cache_lock:
+            entry = self._stat_cache.get(path)
+            if entry is not None and now - entry[0] < self.stat_cache_ttl:
+                self._stat_cache.move_to_end(path)
+                return entry[1]
+        result = await anyio.to_thread.run_sync(self.lookup_uncached, path)
+        with self._stat_cache_lock:
+            self._stat_cache[path] = (now, result)
+            self._stat_cache.move_to_end(path)
+            while len(self._stat_cache) > self.stat_cache_size:
+                self._stat_cache.popitem(last=False)
+        return result
+
+    def lookup_uncached(self, path: str) -> LookupResult:
+        full_path, stat_result = self.lookup_path(path)
+        variants: Variants = {}
+        if self.precompressed and stat_result and stat.S_ISREG(stat_result.st_mode):
+            variants = self.lookup_variants(full_path)
+        return full_path, stat_result, variants
+
+    def lookup_variants(self, full_path: str) -> Variants:
+        """
+        Find the precompressed siblings of a file, by content coding.
+        """
+        variants: Variants = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            try:
+                stat_result = os.stat(full_path + suffix)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if stat.S_ISREG(stat_result.st_mode):
+                variants[encoding] = (full_path + suffix, stat_result)
+        return variants
+
+    def clear_stat_cache(self, path: typing.Optional[str] = None) -> None:
+        """
+        Forget cached lookups, of one path (as returned by `get_path`) or all.
+        """
+        with self._stat_cache_lock:
+            if path is None:
+                self._stat_cache.clear()
+            else:
+                self._stat_cache.pop(path, None)
+
     def lookup_path(
         self, path: str
     ) -> typing.Tuple[str, typing.Optional[os.stat_result]]:
@@ -185,13 +268,35 @@ class StaticFiles:
         stat_result: os.stat_result,
         scope: Scope,
         status_code: int = 200,
+        variants: typing.Optional[Variants] = None,
     ) -> Response:
         method = scope["method"]
         request_headers = Headers(scope=scope)
 
-        response = FileResponse(
-            full_path, status_code=status_code, stat_result=stat_result, method=method
-        )
+        encoding = None
+        if variants:
+            encoding = negotiate_encoding(
+                request_headers.get("accept-encoding", ""), tuple(variants)
+            )
+        if encoding is None:
+            response = FileResponse(
+                full_path,
+                status_code=status_code,
+                stat_result=stat_result,
+                method=method,
+            )
+        else:
+            variant_path, variant_stat_result = variants[encoding]  # type: ignore
+            response = FileResponse(
+                variant_path,
+                status_code=status_code,
+                headers={"content-encoding": encoding},
+                media_type=guess_type(full_path)[0] or "text/plain",
+                stat_result=variant_stat_result,
+                method=method,
+            )
+        if variants:
+            response.headers.add_vary_header("Accept-Encoding")
         if self.is_not_modified(response.headers, request_headers):
             return NotModifiedResponse(response.headers)
         return response
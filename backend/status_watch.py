@@ -0,0 +1,161 @@
+"""
+批改状态订阅
+所有订阅者共享一个后台轮询任务：每轮把全部待观察的索引值合并成一次批量查询，
+markup_status变化时推送给对应订阅者，批改完成后推送完整批改结果
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUS = "completed"
+NOT_FOUND_STATUS = "not_found"
+
+# 批量查询函数：索引值列表 -> {索引值: 批改结果JSON字符串}，查不到的索引值不出现在结果中
+FetchBatch = Callable[[List[str]], Dict[str, str]]
+
+
+def markup_status_of(grade_data: str) -> str:
+    """
+    批改结果的整体状态：所有页面都是completed才算completed，
+    否则返回第一个未完成页面的状态
+    """
+    try:
+        document = json.loads(grade_data)
+    except (TypeError, ValueError):
+        return "invalid"
+    pages = document if isinstance(document, list) else [document]
+    for page in pages:
+        status = page.get("markup_status") if isinstance(page, dict) else None
+        if status != COMPLETED_STATUS:
+            return str(status or "unknown")
+    return COMPLETED_STATUS if pages else "unknown"
+
+
+class StatusWatcher:
+    """
+    单个环境的共享观察者
+    N个客户端订阅同一批记录时，上游仍然只有一个轮询任务和每轮一次批量查询
+    """
+
+    def __init__(
+        self,
+        fetch_batch: FetchBatch,
+        poll_interval: float = 5.0,
+        heartbeat_interval: float = 15.0,
+    ) -> None:
+        self.fetch_batch = fetch_batch
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        # 索引值 -> 订阅者队列
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # 索引值 -> 最近一次观察到的状态
+        self._last_status: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def watched_count(self) -> int:
+        return len(self._subscribers)
+
+    async def watch(self, index_values: List[str]) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        订阅一组索引值，依次产出 (事件名, 数据)
+        事件：status（状态变化）、ready（批改完成，附带批改结果）、heartbeat（保活），
+        全部索引值ready后结束
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = set(index_values)
+        for index_value in pending:
+            self._subscribers.setdefault(index_value, set()).add(queue)
+            status = self._last_status.get(index_value)
+            if status is not None:
+                queue.put_nowait(("status", {"index_value": index_value, "markup_status": status}))
+        self._ensure_running()
+
+        try:
+            while pending:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield "heartbeat", {}
+                    continue
+                if event == "ready":
+                    pending.discard(payload["index_value"])
+                yield event, payload
+        finally:
+            for index_value in index_values:
+                queues = self._subscribers.get(index_value)
+                if queues is None:
+                    continue
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[index_value]
+                    self._last_status.pop(index_value, None)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            # 有新订阅时立即进行一轮查询，不必等到下一个轮询周期
+            self._wakeup.set()
+            return
+        # SCF入口每次调用都会新建事件循环，循环变化时在当前循环里重新启动轮询任务
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(self._wakeup))
+
+    async def _run(self, wakeup: asyncio.Event) -> None:
+        while self._subscribers:
+            index_values = list(self._subscribers)
+            try:
+                results = await run_in_threadpool(self.fetch_batch, index_values)
+            except Exception as e:
+                # 单轮失败不终止观察，下一轮重试
+                logger.warning("批量查询批改状态失败: %s", e)
+                results = None
+
+            if results is not None:
+                self._publish(index_values, results)
+
+            if not self._subscribers:
+                break
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+
+    def _publish(self, index_values: List[str], results: Dict[str, str]) -> None:
+        for index_value in index_values:
+            queues = self._subscribers.get(index_value)
+            if not queues:
+                continue
+            grade_data = results.get(index_value)
+            status = markup_status_of(grade_data) if grade_data else NOT_FOUND_STATUS
+
+            if status == COMPLETED_STATUS:
+                payload = {"index_value": index_value, "markup_status": status, "data": grade_data}
+                for queue in queues:
+                    queue.put_nowait(("ready", payload))
+                # 已完成的记录不再观察，后续订阅会重新查询一次
+                del self._subscribers[index_value]
+                self._last_status.pop(index_value, None)
+                continue
+
+            if self._last_status.get(index_value) != status:
+                self._last_status[index_value] = status
+                payload = {"index_value": index_value, "markup_status": status}
+                for queue in queues:
+                    queue.put_nowait(("status", payload))
+
+
+def format_sse(event: str, payload: dict) -> str:
+    """格式化为Server-Sent Events消息，心跳使用注释行"""
+    if event == "heartbeat":
+        return ": keep-alive\n\n"
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
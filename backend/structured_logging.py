@@ -0,0 +1,175 @@
+"""
+结构化日志
+请求线程只负责把日志记录放入队列，格式化和写出都在后台线程完成；
+冗长的请求内容日志按路由采样，单条日志限制大小，高峰期不会淹没SCF的日志投递
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# LogRecord自带的属性，其余属性视为通过extra传入的结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}...(已截断，共{len(text)}字符)"
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，消息、异常堆栈和extra字段都受max_chars限制"""
+
+    def __init__(self, max_chars: int = 4000) -> None:
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), self.max_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            entry[key] = truncate(value, self.max_chars) if isinstance(value, str) else value
+        if record.exc_info:
+            # 堆栈保留末尾部分，异常发生处在最后
+            entry["exc_info"] = self.formatException(record.exc_info)[-self.max_chars:]
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    不在调用线程格式化日志（QueueHandler默认会先格式化再入队），
+    队列已满时丢弃日志并计数，而不是阻塞请求
+    """
+
+    def __init__(self, log_queue: "queue.Queue") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class PayloadSampler:
+    """
+    按路由设置请求内容日志的采样率
+    配置格式：`/api/grade-data=0.01,/api/image=0,*=0.05`，`*`为其余路由的默认采样率
+    """
+
+    def __init__(self, rates: Dict[str, float], default_rate: float = 0.0) -> None:
+        self.rates = rates
+        self.default_rate = default_rate
+
+    @classmethod
+    def parse(cls, spec: str) -> "PayloadSampler":
+        rates: Dict[str, float] = {}
+        default_rate = 0.0
+        for item in spec.split(","):
+            route, sep, rate = item.strip().rpartition("=")
+            if not sep:
+                continue
+            try:
+                value = min(1.0, max(0.0, float(rate)))
+            except ValueError:
+                continue
+            if route == "*":
+                default_rate = value
+            else:
+                rates[route] = value
+        return cls(rates, default_rate)
+
+    def should_log(self, route: str) -> bool:
+        rate = self.rates.get(route, self.default_rate)
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_sampler = PayloadSampler({}, 0.0)
+_max_chars = 4000
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    queue_size: int = 10000,
+    max_chars: int = 4000,
+    payload_sample_rates: str = "*=0",
+) -> None:
+    """
+    替换根日志的处理器：请求路径上只入队，后台线程格式化并写到标准输出
+    fmt为json时每条日志一行JSON，为text时保持原来的文本格式
+    """
+    global _handler, _listener, _sampler, _max_chars
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter(max_chars) if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+    _sampler = PayloadSampler.parse(payload_sample_rates)
+    _max_chars = max_chars
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+
+
+def flush_logs(timeout: float = 0.2) -> None:
+    """
+    等待队列中的日志写出，最多等待timeout秒
+    SCF在函数返回后会冻结容器，返回前调用，避免日志滞留到下一次调用甚至丢失
+    """
+    if _handler is None:
+        return
+    deadline = time.monotonic() + timeout
+    while _handler.queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def log_payload(logger: logging.Logger, route: str, label: str, payload: Any) -> None:
+    """按路由采样记录请求内容；未被采样时不做任何序列化"""
+    if not logger.isEnabledFor(logging.INFO) or not _sampler.should_log(route):
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+    logger.info("%s: %s", label, truncate(text, _max_chars), extra={"route": route, "sampled": True})
+
+
+def logging_stats() -> Dict[str, object]:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+    }
+
+
+@atexit.register
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
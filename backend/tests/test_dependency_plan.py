@@ -0,0 +1,182 @@
+import anyio
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+
+def test_failing_dependency_stops_later_ones():
+    calls = []
+
+    async def auth():
+        calls.append("auth")
+        raise HTTPException(status_code=401)
+
+    async def side():
+        calls.append("side")
+
+    app = FastAPI()
+
+    @app.get("/", dependencies=[Depends(auth), Depends(side)])
+    async def endpoint():
+        calls.append("endpoint")
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 401
+    assert calls == ["auth"]
+
+
+def test_dependencies_run_in_declaration_order():
+    calls = []
+
+    async def first():
+        await anyio.sleep(0.01)
+        calls.append("first")
+
+    def second():
+        calls.append("second")
+
+    async def third():
+        calls.append("third")
+
+    app = FastAPI()
+
+    @app.get("/", dependencies=[Depends(first), Depends(second), Depends(third)])
+    async def endpoint():
+        return calls
+
+    assert TestClient(app).get("/").json() == ["first", "second", "third"]
+
+
+def test_concurrent_dependencies_overlap():
+    started = anyio.Event()
+
+    async def waiter():
+        # Only finishes if `starter` runs while it is waiting
+        with anyio.fail_after(1):
+            await started.wait()
+        return "waiter"
+
+    async def starter():
+        started.set()
+        return "starter"
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def endpoint(
+        a: str = Depends(waiter, concurrent=True),
+        b: str = Depends(starter, concurrent=True),
+    ):
+        return [a, b]
+
+    assert TestClient(app).get("/").json() == ["waiter", "starter"]
+
+
+def test_concurrent_dependency_errors_raise_first_declared():
+    async def forbidden():
+        await anyio.sleep(0.01)
+        raise HTTPException(status_code=403)
+
+    async def missing():
+        raise HTTPException(status_code=404)
+
+    app = FastAPI()
+
+    @app.get(
+        "/",
+        dependencies=[
+            Depends(forbidden, concurrent=True),
+            Depends(missing, concurrent=True),
+        ],
+    )
+    async def endpoint():
+        pass
+
+    assert TestClient(app).get("/").status_code == 403
+
+
+def test_use_cache():
+    counts = {"cached": 0, "uncached": 0}
+
+    async def cached():
+        counts["cached"] += 1
+        return counts["cached"]
+
+    async def uncached():
+        counts["uncached"] += 1
+        return counts["uncached"]
+
+    async def uses_both(
+        a: int = Depends(cached), b: int = Depends(uncached, use_cache=False)
+    ):
+        return [a, b]
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def endpoint(
+        pair=Depends(uses_both),
+        a: int = Depends(cached),
+        b: int = Depends(uncached, use_cache=False),
+    ):
+        return {"pair": pair, "a": a, "b": b}
+
+    assert TestClient(app).get("/").json() == {"pair": [1, 1], "a": 1, "b": 2}
+    assert counts == {"cached": 1, "uncached": 2}
+
+
+def test_dependency_overrides():
+    async def get_user(name: str = "alice"):
+        return name
+
+    async def get_greeting(user: str = Depends(get_user)):
+        return f"hello {user}"
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def endpoint(greeting: str = Depends(get_greeting)):
+        return greeting
+
+    client = TestClient(app)
+    assert client.get("/", params={"name": "bob"}).json() == "hello bob"
+    app.dependency_overrides[get_user] = lambda: "override"
+    try:
+        assert client.get("/").json() == "hello override"
+    finally:
+        app.dependency_overrides.clear()
+    assert client.get("/").json() == "hello alice"
+
+
+def test_generator_dependencies_enter_in_order_and_exit_in_reverse():
+    events = []
+
+    async def outer():
+        events.append("enter outer")
+        yield "outer"
+        events.append("exit outer")
+
+    def inner(parent: str = Depends(outer)):
+        events.append(f"enter inner after {parent}")
+        yield "inner"
+        events.append("exit inner")
+
+    async def plain(value: str = Depends(inner)):
+        events.append(f"plain sees {value}")
+        return value
+
+    app = FastAPI()
+
+    @app.get("/")
+    async def endpoint(value: str = Depends(plain)):
+        events.append("endpoint")
+        return value
+
+    assert TestClient(app).get("/").json() == "inner"
+    assert events == [
+        "enter outer",
+        "enter inner after outer",
+        "plain sees inner",
+        "endpoint",
+        "exit inner",
+        "exit outer",
+    ]
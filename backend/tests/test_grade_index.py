@@ -0,0 +1,44 @@
+import json
+
+from grade_index import GradeIndex
+
+
+def grade_data(answer):
+    return json.dumps(
+        [
+            {
+                "questions_info": [
+                    {
+                        "question_number": "1",
+                        "question_type": "解答题",
+                        "answer_steps": [{"student_answer": answer, "analysis": "解析", "is_correct": False}],
+                    }
+                ]
+            }
+        ],
+        ensure_ascii=False,
+    )
+
+
+def test_byte_budget_evicts_oldest():
+    probe = GradeIndex()
+    probe.add("probe", grade_data("甲" * 50))
+    size = probe.stats()["bytes"]
+    assert size > 0
+
+    index = GradeIndex(max_bytes=size * 3)
+    for student in range(5):
+        index.add(str(student), grade_data(str(student) * 50))
+        assert index.stats()["bytes"] <= size * 3
+    assert index.search(question_number="1") == ["2", "3", "4"]
+    assert index.search(text="44") == ["4"]
+    assert index.search(text="00") == []
+
+
+def test_oversize_document_drops_old_content():
+    index = GradeIndex(max_bytes=10_000)
+    index.add("1", grade_data("短答案"))
+    assert index.search(text="短答") == ["1"]
+    assert not index.add("1", grade_data("长" * 10_000))
+    assert index.search() == []
+    assert index.stats() == {"documents": 0, "questions": 0, "terms": 0, "bytes": 0}
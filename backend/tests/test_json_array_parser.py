@@ -0,0 +1,50 @@
+import json
+import random
+
+import pytest
+from fastapi.routing import _JSONArrayParser
+
+DOCUMENTS = [
+    "[1.0, 2.5, 3]",
+    "[-1, -2.25e-3, 1E+10, 0.5e1, -0]",
+    '[{"a": 1.5}, "x,]", true, null, 12345.678e-2]',
+    "[ 10 , 20.0 ,30e2 ]",
+]
+
+
+def parse_in_chunks(text, splits):
+    parser = _JSONArrayParser()
+    items = []
+    start = 0
+    for end in splits + [len(text)]:
+        items.extend(parser.feed(text[start:end]))
+        start = end
+    items.extend(parser.close())
+    return items
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_every_two_chunk_split(text):
+    expected = json.loads(text)
+    for split in range(len(text) + 1):
+        assert parse_in_chunks(text, [split]) == expected
+
+
+def test_number_split_at_dot_exponent_and_sign():
+    assert parse_in_chunks("[1.0, 2.5, 3]", [8]) == [1.0, 2.5, 3]
+    assert parse_in_chunks("[1e5, 2]", [3]) == [1e5, 2]
+    assert parse_in_chunks("[1e-5, 2]", [4]) == [1e-5, 2]
+    assert parse_in_chunks("[-12, 2]", [2]) == [-12, 2]
+
+
+def test_random_splits():
+    rng = random.Random(0)
+    for _ in range(2000):
+        values = [
+            rng.choice([rng.uniform(-1e6, 1e6), rng.randint(-1000, 1000), "s", None])
+            for _ in range(rng.randint(0, 8))
+        ]
+        text = json.dumps(values)
+        count = min(len(text) + 1, rng.randint(0, 4))
+        splits = sorted(rng.sample(range(len(text) + 1), count))
+        assert parse_in_chunks(text, splits) == values
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+import resp_server
+from shared_cache import RedisCache, RespConnectionPool
+
+PASSWORD = "secret"
+
+
+@pytest.fixture(scope="module")
+def server_port():
+    # The servers run in daemon threads and go away with the test process
+    return resp_server.start_in_thread()[0]
+
+
+@pytest.fixture(scope="module")
+def auth_server_port():
+    return resp_server.start_in_thread(password=PASSWORD)[0]
+
+
+def make_cache(port, prefix="test:", password=None, db=0, **kwargs):
+    auth = f":{password}@" if password else ""
+    return RedisCache(f"redis://{auth}127.0.0.1:{port}/{db}", key_prefix=prefix, **kwargs)
+
+
+def test_get_set_delete(server_port):
+    cache = make_cache(server_port)
+    assert cache.get("missing") is None
+    cache.set("key", "值", ttl=60)
+    assert cache.get("key") == "值"
+    cache.delete("key")
+    assert cache.get("key") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert isinstance(stats["db_keys"], int)
+
+
+def test_key_prefix_isolates_caches(server_port):
+    first = make_cache(server_port, prefix="first:")
+    second = make_cache(server_port, prefix="second:")
+    first.set("key", "a", ttl=60)
+    assert second.get("key") is None
+    assert first.get("key") == "a"
+
+
+def test_get_many_set_many(server_port):
+    cache = make_cache(server_port, prefix="many:")
+    cache.set_many({"a": "1", "b": "2"}, ttl=60)
+    assert cache.get_many(["a", "b", "c"]) == {"a": "1", "b": "2"}
+    assert cache.get_many([]) == {}
+
+
+def test_ttl(server_port):
+    cache = make_cache(server_port, prefix="ttl:")
+    cache.set("short", "x", ttl=1)
+    cache.set("long", "y", ttl=60)
+    cache.set("never", "z", ttl=0)
+    assert cache.get("short") == "x"
+    assert cache.get("never") is None
+    time.sleep(1.1)
+    assert cache.get("short") is None
+    assert cache.get("long") == "y"
+
+
+def test_auth(auth_server_port):
+    cache = make_cache(auth_server_port, password=PASSWORD)
+    cache.set("key", "v", ttl=60)
+    assert cache.get("key") == "v"
+
+
+@pytest.mark.parametrize(
+    "options, connections",
+    [
+        ({"password": "wrong"}, 0),
+        ({"password": PASSWORD, "db": 1}, 0),
+        # Connecting works, each command gets a NOAUTH error reply
+        ({"password": None}, 1),
+    ],
+    ids=["wrong-password", "bad-db", "no-auth"],
+)
+def test_auth_and_select_errors_are_misses(auth_server_port, options, connections):
+    cache = make_cache(auth_server_port, max_connections=1, timeout=2, **options)
+    started = time.monotonic()
+    for _ in range(3):
+        cache.set("key", "v", ttl=60)
+        assert cache.get("key") is None
+        assert cache.get_many(["key"]) == {}
+    # A failed connect frees its slot instead of making later calls wait for it
+    assert time.monotonic() - started < 1
+    assert cache.pool._created == connections
+    assert cache.stats()["misses"] == 6
+
+
+def test_broken_release_wakes_waiter(server_port):
+    pool = RespConnectionPool("127.0.0.1", server_port, max_connections=1, timeout=5)
+    conn = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    started = time.monotonic()
+    waiter.start()
+    time.sleep(0.1)
+    pool.release(conn, broken=True)
+    waiter.join(timeout=5)
+    assert acquired and time.monotonic() - started < 1
+    assert acquired[0].execute([("PING",)]) == ["PONG"]
+    pool.release(acquired[0])
+    pool.close()
+
+
+def test_release_wakes_waiter_with_idle_connection(server_port):
+    pool = RespConnectionPool("127.0.0.1", server_port, max_connections=1, timeout=5)
+    conn = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.1)
+    pool.release(conn)
+    waiter.join(timeout=5)
+    assert acquired == [conn]
+    pool.release(conn)
+    pool.close()
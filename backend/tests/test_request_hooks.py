@@ -0,0 +1,50 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+BODY = b"0123456789" * 1000
+
+
+async def read_body(request):
+    await request.body()
+
+
+async def read_stream(request):
+    async for _ in request.stream():
+        pass
+
+
+async def read_first_chunk(request):
+    async for _ in request.stream():
+        break
+
+
+async def check_disconnect(request):
+    await request.is_disconnected()
+
+
+async def ignore_body(request):
+    pass
+
+
+def chunks():
+    for start in range(0, len(BODY), 1000):
+        yield BODY[start:start + 1000]
+
+
+@pytest.mark.parametrize(
+    "hook", [read_body, read_stream, read_first_chunk, check_disconnect, ignore_body]
+)
+@pytest.mark.parametrize("streamed", [False, True], ids=["whole", "chunked"])
+def test_app_receives_body_read_by_hook(hook, streamed):
+    app = FastAPI()
+    app.middleware("request")(hook)
+
+    @app.post("/")
+    async def echo(request: Request):
+        return PlainTextResponse(await request.body())
+
+    content = chunks() if streamed else BODY
+    response = TestClient(app).post("/", content=content)
+    assert response.content == BODY
@@ -0,0 +1,118 @@
+"""
+缓存值压缩
+批改结果是体积较大、大部分时间闲置的UTF-8字符串，压缩后保存可以让同样的内存放下数倍的记录。
+安装了zstandard时使用zstd，否则使用gzip格式（zlib）；压缩结果本身就是合法的HTTP响应体，
+客户端接受该编码时可以不解压直接输出
+"""
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+from shared_cache import ValueCodec
+from starlette.middleware.compression import negotiate_encoding
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖
+    zstandard = None
+
+# zlib的wbits取31时输出带gzip头和校验的格式，可直接用作Content-Encoding: gzip的响应体
+GZIP_WBITS = 31
+
+
+class CompressedValue:
+    """压缩后的缓存值：压缩数据、编码名称（即Content-Encoding）和原始字节数"""
+
+    __slots__ = ("data", "encoding", "raw_size")
+
+    def __init__(self, data: bytes, encoding: str, raw_size: int) -> None:
+        self.data = data
+        self.encoding = encoding
+        self.raw_size = raw_size
+
+
+def default_algorithm() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data, GZIP_WBITS)
+
+
+class CompressingCodec(ValueCodec):
+    """
+    MemoryCache的值编码：达到min_size且压缩后确实变小的值以压缩形式保存，
+    只在读取时解压；条目大小按压缩后的字节数计入缓存容量
+    """
+
+    def __init__(self, algorithm: str = "auto", level: Optional[int] = None, min_size: int = 1024) -> None:
+        if algorithm == "auto":
+            algorithm = default_algorithm()
+        if algorithm == "zstd" and zstandard is None:
+            raise ValueError("使用zstd压缩需要安装zstandard")
+        if algorithm not in ("zstd", "gzip"):
+            raise ValueError(f"不支持的压缩算法: {algorithm}")
+        self.encoding = algorithm
+        self.level = level if level is not None else (3 if algorithm == "zstd" else 6)
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._entries = 0
+        self._raw_bytes = 0
+        self._stored_bytes = 0
+
+    def encode(self, value: str) -> object:
+        raw = value.encode("utf-8")
+        if len(raw) < self.min_size:
+            return value
+        data = compress(raw, self.encoding, self.level)
+        if len(data) >= len(raw):
+            return value
+        with self._lock:
+            self._entries += 1
+            self._raw_bytes += len(raw)
+            self._stored_bytes += len(data)
+        return CompressedValue(data, self.encoding, len(raw))
+
+    def decode(self, stored: object) -> str:
+        if isinstance(stored, CompressedValue):
+            return decompress(stored.data, stored.encoding).decode("utf-8")
+        return stored
+
+    def size(self, stored: object) -> int:
+        if isinstance(stored, CompressedValue):
+            return len(stored.data)
+        return super().size(stored)
+
+    def release(self, stored: object) -> None:
+        if isinstance(stored, CompressedValue):
+            with self._lock:
+                self._entries -= 1
+                self._raw_bytes -= stored.raw_size
+                self._stored_bytes -= len(stored.data)
+
+    def encoded(self, stored: object, accept_encoding: str) -> Optional[Tuple[bytes, str]]:
+        # 与PrecompressedResponse使用同一套协商规则，二者对是否接受该编码的判断一致
+        if isinstance(stored, CompressedValue) and negotiate_encoding(accept_encoding, (stored.encoding,)):
+            return stored.data, stored.encoding
+        return None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "compression": {
+                    "encoding": self.encoding,
+                    "entries": self._entries,
+                    "raw_bytes": self._raw_bytes,
+                    "stored_bytes": self._stored_bytes,
+                    "ratio": round(self._raw_bytes / self._stored_bytes, 2) if self._stored_bytes else None,
+                }
+            }
@@ -0,0 +1,161 @@
+"""
+启动预热
+部署或SCF冷启动后的第一个请求不必再承担获取令牌、TLS握手和缓存未命中的开销：
+启动时预先获取访问令牌、建立到飞书和链接域名的连接，并按持久化的热点索引值列表重新加载缓存
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HotKeyTracker:
+    """
+    最近被查询的索引值，按最近访问排序，定期写入文件
+    文件放在/tmp下时，同一容器重启或重新部署后仍可读回
+    """
+
+    def __init__(self, path: str, max_keys: int = 200, save_interval: float = 30.0) -> None:
+        self.path = path
+        self.max_keys = max_keys
+        self.save_interval = save_interval
+        self._keys: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in entries[-self.max_keys:]:
+            if isinstance(entry, list) and len(entry) == 3:
+                environment, index_value, seen_at = entry
+                self._keys[(str(environment), str(index_value))] = float(seen_at)
+
+    def record(self, environment: str, index_value: str) -> None:
+        if not index_value:
+            return
+        key = (environment, index_value)
+        with self._lock:
+            self._keys.pop(key, None)
+            self._keys[key] = time.time()
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.save_interval
+        if due:
+            self.save()
+
+    def top(self, environment: str, limit: int) -> List[str]:
+        """某个环境最近被查询的索引值，最近的在前"""
+        with self._lock:
+            keys = list(self._keys)
+        values = [index_value for env, index_value in reversed(keys) if env == environment]
+        return values[:limit]
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = [[env, index_value, seen_at] for (env, index_value), seen_at in self._keys.items()]
+            self._dirty = False
+            self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("保存热点索引值失败: %s", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+# 预热步骤：(名称, 函数)，函数的返回值作为该步骤的结果说明
+WarmupStep = Tuple[str, Callable[[], object]]
+
+
+class Warmup:
+    """
+    按顺序执行预热步骤，单个步骤失败只记录错误，不影响其余步骤和服务启动
+    run可重复调用，只会执行一次；给出timeout时超过整体时限后不再开始新的步骤
+    """
+
+    def __init__(self, steps: List[WarmupStep]) -> None:
+        self.steps = steps
+        self._lock = threading.Lock()
+        self._state = "pending"
+        self._results: Dict[str, Dict[str, object]] = {}
+        self._started_at: Optional[float] = None
+        self._deadline: Optional[float] = None
+        self._duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state == "ready"
+
+    def run(self, timeout: Optional[float] = None) -> bool:
+        """
+        执行预热，timeout为整体时限（秒）
+        超过时限时立即返回，正在执行的步骤在后台线程中继续，其后的步骤跳过
+        返回预热是否已完成
+        """
+        if timeout is None:
+            self._run()
+            return self.ready
+        with self._lock:
+            if self._state == "pending":
+                self._deadline = time.monotonic() + timeout
+        thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if not self.ready:
+            logger.warning("预热未在%g秒内完成，不再等待", timeout)
+        return self.ready
+
+    def _run(self) -> None:
+        with self._lock:
+            if self._state != "pending":
+                return
+            self._state = "running"
+            self._started_at = time.monotonic()
+        for name, step in self.steps:
+            start = time.monotonic()
+            if self._deadline is not None and start >= self._deadline:
+                self._results[name] = {"ok": False, "error": "超过预热时限，已跳过", "duration_ms": 0.0}
+                continue
+            try:
+                detail = step()
+                result = {"ok": True, "detail": detail}
+            except Exception as e:
+                logger.warning("预热步骤 %s 失败: %s", name, e)
+                result = {"ok": False, "error": str(e)}
+            result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+            self._results[name] = result
+        self._duration = time.monotonic() - self._started_at
+        self._state = "ready"
+        logger.info("预热完成，耗时%.0fms", self._duration * 1000)
+
+    def start_in_background(self) -> None:
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "ready": self.ready,
+            "state": self._state,
+            "duration_ms": None if self._duration is None else round(self._duration * 1000, 1),
+            "steps": dict(self._results),
+        }